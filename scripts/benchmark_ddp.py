@@ -0,0 +1,123 @@
+"""
+Benchmark de scaling de l'entraînement DistributedDataParallel sur CPU.
+
+Lance pour chaque nombre de processus un groupe gloo (même répartition des
+threads que train.py sous torchrun) et mesure le débit d'entraînement du
+ResNet18 sur des batchs synthétiques : le chargement des données est exclu
+pour isoler le calcul et la synchronisation des gradients.
+
+Usage:
+    python scripts/benchmark_ddp.py
+    python scripts/benchmark_ddp.py --processes 1 2 4 8 --batch-size 32 --steps 20
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.nn.parallel import DistributedDataParallel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.resnet import create_resnet18
+from src.training.distributed import available_cpus
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def free_port():
+    """Port TCP libre pour le rendez-vous du groupe."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def worker(rank, world_size, port, args, results):
+    """Boucle d'entraînement synthétique d'un rang."""
+    os.environ['MASTER_ADDR'] = '127.0.0.1'
+    os.environ['MASTER_PORT'] = str(port)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    torch.set_num_threads(max(1, available_cpus() // world_size))
+    torch.manual_seed(rank)
+
+    model = DistributedDataParallel(create_resnet18(num_classes=args.num_classes, pretrained=False))
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+    criterion = nn.CrossEntropyLoss()
+    images = torch.randn(args.batch_size, 3, args.image_size, args.image_size)
+    labels = torch.randint(0, args.num_classes, (args.batch_size,))
+
+    def step():
+        optimizer.zero_grad()
+        loss = criterion(model(images), labels)
+        loss.backward()
+        optimizer.step()
+
+    for _ in range(args.warmup):
+        step()
+    dist.barrier()
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        step()
+    dist.barrier()
+    elapsed = time.perf_counter() - start
+
+    if rank == 0:
+        results.put(world_size * args.batch_size * args.steps / elapsed)
+    dist.destroy_process_group()
+
+
+def run(world_size, args):
+    """Débit global (images/s) pour un nombre de processus."""
+    context = mp.get_context('spawn')
+    results = context.SimpleQueue()
+    mp.start_processes(worker, args=(world_size, free_port(), args, results),
+                       nprocs=world_size, start_method='spawn')
+    return results.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de scaling DDP sur CPU')
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Nombres de processus à mesurer')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Batch par processus')
+    parser.add_argument('--image-size', type=int, default=224,
+                        help='Taille des images')
+    parser.add_argument('--num-classes', type=int, default=15,
+                        help='Nombre de classes')
+    parser.add_argument('--steps', type=int, default=10,
+                        help='Pas d\'entraînement mesurés')
+    parser.add_argument('--warmup', type=int, default=2,
+                        help='Pas de chauffe')
+    args = parser.parse_args()
+
+    cores = available_cpus()
+    print(f"[INFO] {cores} coeurs, batch {args.batch_size} par processus\n")
+    print(f"{'Processus':>10} {'Threads/proc':>13} {'Images/s':>10} {'Speedup':>9} {'Efficacite':>11}")
+    print("-" * 57)
+
+    baseline = None
+    for world_size in args.processes:
+        if world_size > cores:
+            print(f"[WARN] {world_size} processus > {cores} coeurs, mesure ignoree")
+            continue
+        throughput = run(world_size, args)
+        if baseline is None:
+            # Référence : débit par processus de la première mesure (1 processus)
+            baseline = throughput / world_size
+        speedup = throughput / baseline
+        print(f"{world_size:>10} {max(1, cores // world_size):>13} {throughput:>10.1f} "
+              f"{speedup:>8.2f}x {speedup / world_size:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
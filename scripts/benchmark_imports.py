@@ -0,0 +1,132 @@
+"""
+Benchmark du temps d'import de l'API d'inférence (python -X importtime).
+
+Importe le module dans un interpréteur neuf, plusieurs fois, et rapporte :
+- le temps d'import cumulé du module (médiane des essais)
+- les modules les plus coûteux
+- les dépendances lourdes chargées alors qu'elles devraient être différées
+
+Avec --check, le script échoue (code 1) si le budget est dépassé ou si une
+dépendance lourde est importée (vérifié aussi par test_functionality.py).
+
+Usage:
+    python scripts/benchmark_imports.py
+    python scripts/benchmark_imports.py --module src.inference.api --budget-ms 1000 --check
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budget de src.inference.api (large : mesuré ~0.3 s, torch seul prend ~2 s)
+IMPORT_BUDGET_MS = 1000
+
+# Dépendances chargées au démarrage de l'API, jamais à l'import
+LAZY_MODULES = ('torch', 'torchvision', 'PIL', 'numpy', 'yaml')
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def parse_importtime(stderr):
+    """
+    Lit la sortie de -X importtime.
+
+    Returns:
+        dict: {module: (self_us, cumulative_us)}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import(module):
+    """
+    Importe module dans un nouvel interpréteur.
+
+    Returns:
+        tuple: (temps cumulé du module en ms, {module: (self_us, cumulative_us)})
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    return modules[module][1] / 1000, modules
+
+
+def lazy_violations(modules):
+    """Dépendances lourdes (LAZY_MODULES) présentes dans l'import."""
+    return [name for name in LAZY_MODULES if name in modules]
+
+
+def check_import_budget(module='src.inference.api', budget_ms=IMPORT_BUDGET_MS, runs=3):
+    """
+    Vérifie le temps d'import et l'absence de dépendances lourdes.
+
+    Returns:
+        tuple: (ok, temps médian en ms, dépendances lourdes importées)
+    """
+    measures = [measure_import(module) for _ in range(runs)]
+    median_ms = statistics.median(total for total, _ in measures)
+    violations = lazy_violations(measures[-1][1])
+    return median_ms <= budget_ms and not violations, median_ms, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du temps d\'import (python -X importtime)')
+    parser.add_argument('--module', type=str, default='src.inference.api',
+                        help='Module à importer')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Nombre d\'imports mesurés (interpréteurs neufs)')
+    parser.add_argument('--top', type=int, default=15,
+                        help='Nombre de modules les plus coûteux affichés')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help='Budget du temps d\'import cumulé (ms)')
+    parser.add_argument('--check', action='store_true',
+                        help='Code de sortie 1 si le budget est dépassé')
+    args = parser.parse_args()
+
+    measures = [measure_import(args.module) for _ in range(args.runs)]
+    totals = [total for total, _ in measures]
+    median_ms = statistics.median(totals)
+    modules = measures[-1][1]
+
+    print(f"[INFO] import {args.module}: {median_ms:.0f} ms (mediane de {args.runs}, "
+          f"min {min(totals):.0f} ms, max {max(totals):.0f} ms), {len(modules)} modules\n")
+    print(f"{'Module':<50} {'Self (ms)':>10} {'Cumule (ms)':>12}")
+    print("-" * 74)
+    heaviest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in heaviest[:args.top]:
+        print(f"{name:<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>12.1f}")
+
+    violations = lazy_violations(modules)
+    print()
+    if violations:
+        print(f"[ERREUR] Dependances lourdes importees: {', '.join(violations)}")
+    else:
+        print(f"[OK] Aucune dependance lourde importee ({', '.join(LAZY_MODULES)})")
+    if median_ms > args.budget_ms:
+        print(f"[ERREUR] Budget depasse: {median_ms:.0f} ms > {args.budget_ms:.0f} ms")
+    else:
+        print(f"[OK] Budget respecte: {median_ms:.0f} ms <= {args.budget_ms:.0f} ms")
+
+    if args.check and (violations or median_ms > args.budget_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Micro-benchmark de l'accès aux métadonnées du dataset.
+
+Compare le chemin historique (DataFrame pandas lu depuis metadata.csv,
+self.metadata.iloc[idx] par échantillon) avec les colonnes NumPy du sidecar
+metadata.npz : chargement, coût par échantillon, taille sérialisée vers
+chaque worker du DataLoader et mémoire occupée une fois désérialisée.
+
+Usage:
+    python scripts/benchmark_metadata.py
+    python scripts/benchmark_metadata.py --metadata data/metadata.csv --split train
+"""
+
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.metadata import load_metadata_arrays, write_metadata_arrays
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def make_metadata(num_images, num_classes=15, seed=0):
+    """Génère un metadata.csv synthétique (chemins du style PlantVillage)."""
+    rng = np.random.default_rng(seed)
+    class_ids = rng.integers(0, num_classes, size=num_images)
+    labels = [f"Plant_{c:02d}___disease_{c:02d}" for c in class_ids]
+    return pd.DataFrame({
+        'path': [f"data/raw/PlantVillage/{label}/{i:08x}-{i * 7919 % 100003:05d}.JPG"
+                 for i, label in enumerate(labels)],
+        'label': labels,
+        'class_name': labels,
+        'class_id': class_ids,
+        'split': rng.choice(['train', 'val', 'test'], size=num_images, p=[0.7, 0.15, 0.15])
+    })
+
+
+def load_dataframe(metadata_path, split):
+    """Chemin historique : read_csv puis filtrage du split."""
+    df = pd.read_csv(metadata_path)
+    return df[df['split'] == split].reset_index(drop=True)
+
+
+def time_load(fn, repeats=5):
+    """Temps moyen de chargement (ms)."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def time_items(get_item, count, iterations):
+    """Temps moyen par échantillon (µs)."""
+    indices = np.random.default_rng(0).integers(0, count, size=iterations)
+    start = time.perf_counter()
+    for idx in indices:
+        get_item(int(idx))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def unpickled_size(payload):
+    """Mémoire allouée par la désérialisation (copie reçue par un worker)."""
+    tracemalloc.start()
+    obj = pickle.loads(payload)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de l\'accès aux métadonnées')
+    parser.add_argument('--metadata', type=str, default=None,
+                        help='metadata.csv à utiliser (sinon métadonnées synthétiques)')
+    parser.add_argument('--num-images', type=int, default=50000,
+                        help='Nombre d\'images des métadonnées synthétiques')
+    parser.add_argument('--split', type=str, default='train',
+                        help='Split chargé par le dataset')
+    parser.add_argument('--iterations', type=int, default=20000,
+                        help='Nombre d\'accès par mesure')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.metadata:
+            metadata_path = Path(args.metadata)
+        else:
+            metadata_path = Path(tmp_dir) / 'metadata.csv'
+            make_metadata(args.num_images).to_csv(metadata_path, index=False)
+        # Sidecar écrit dans le répertoire temporaire (metadata.npz à côté de arrays_path)
+        arrays_path = Path(tmp_dir) / 'metadata.csv'
+        write_metadata_arrays(pd.read_csv(metadata_path), arrays_path)
+
+        df = load_dataframe(metadata_path, args.split)
+        arrays = load_metadata_arrays(arrays_path, args.split)
+        print(f"Split {args.split}: {len(df)} images\n")
+
+        def dataframe_item(idx):
+            row = df.iloc[idx]
+            return row['path'], int(row['class_id'])
+
+        def arrays_item(idx):
+            return arrays.path(idx), int(arrays.labels[idx])
+
+        df_payload = pickle.dumps(df)
+        arrays_payload = pickle.dumps(arrays)
+
+        rows = [
+            ('Chargement (ms)',
+             time_load(lambda: load_dataframe(metadata_path, args.split)),
+             time_load(lambda: load_metadata_arrays(arrays_path, args.split))),
+            ('Acces / echantillon (us)',
+             time_items(dataframe_item, len(df), args.iterations),
+             time_items(arrays_item, len(arrays), args.iterations)),
+            ('Pickle worker (KB)', len(df_payload) / 1024, len(arrays_payload) / 1024),
+            ('Memoire worker (KB)',
+             unpickled_size(df_payload) / 1024, unpickled_size(arrays_payload) / 1024),
+        ]
+
+    print(f"{'Mesure':<26} {'pandas':>12} {'NumPy':>12} {'Gain':>8}")
+    print("-" * 62)
+    for name, baseline, optimized in rows:
+        print(f"{name:<26} {baseline:>12.2f} {optimized:>12.2f} {baseline / optimized:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
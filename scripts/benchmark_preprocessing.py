@@ -0,0 +1,100 @@
+"""
+Micro-benchmark du preprocessing d'inférence.
+
+Compare le chemin historique (transforms.Compose reconstruit à chaque image)
+avec le PreprocessingEngine (décodage draft JPEG, resize direct, normalisation
+vectorisée dans un buffer réutilisé).
+
+Usage:
+    python scripts/benchmark_preprocessing.py
+    python scripts/benchmark_preprocessing.py --image path/to/leaf.jpg
+"""
+
+import sys
+import time
+import argparse
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.preprocessing import get_transforms, PreprocessingEngine
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def compose_path(image_bytes, image_size):
+    """Chemin historique : Compose reconstruit + ToTensor + Normalize."""
+    transform = get_transforms(image_size, augmentation=False)
+    image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    return transform(image).unsqueeze(0)
+
+
+def make_jpeg(width, height, seed=0):
+    """Génère une image JPEG synthétique (bruit texturé)."""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def measure(fn, image_bytes, image_size, iterations):
+    """Temps CPU moyen par image (ms)."""
+    for _ in range(3):
+        fn(image_bytes, image_size)
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(image_bytes, image_size)
+    return (time.process_time() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du preprocessing d\'inférence')
+    parser.add_argument('--image', type=str, default=None,
+                        help='Image réelle à utiliser (sinon images synthétiques)')
+    parser.add_argument('--image-size', type=int, default=224,
+                        help='Taille cible des images')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='Nombre d\'itérations par mesure')
+    args = parser.parse_args()
+
+    if args.image:
+        samples = {Path(args.image).name: Path(args.image).read_bytes()}
+    else:
+        # 256x256 = taille PlantVillage, 1024x768 / 3000x2000 = photos de terrain
+        samples = {
+            'jpeg 256x256': make_jpeg(256, 256),
+            'jpeg 1024x768': make_jpeg(1024, 768),
+            'jpeg 3000x2000': make_jpeg(3000, 2000),
+        }
+
+    engine = PreprocessingEngine(args.image_size)
+
+    def engine_path(image_bytes, image_size):
+        return engine(image_bytes)
+
+    print(f"{'Image':<20} {'Compose (ms)':>14} {'Engine (ms)':>13} {'Gain':>8}")
+    print("-" * 58)
+    for name, image_bytes in samples.items():
+        iterations = args.iterations if len(image_bytes) < 1_000_000 else max(10, args.iterations // 10)
+        baseline = measure(compose_path, image_bytes, args.image_size, iterations)
+        optimized = measure(engine_path, image_bytes, args.image_size, iterations)
+        print(f"{name:<20} {baseline:>14.3f} {optimized:>13.3f} {baseline / optimized:>7.2f}x")
+
+    # Écart numérique par rapport au chemin historique
+    image_bytes = next(iter(samples.values()))
+    reference = compose_path(image_bytes, args.image_size)
+    result = engine(image_bytes)
+    print(f"\nEcart max vs Compose: {float((reference - result).abs().max()):.4f} "
+          f"(moyen: {float((reference - result).abs().mean()):.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Benchmark du lanceur multi-workers (src/inference/serve.py).
+
+Pour chaque répartition workers x threads intra-op, démarre l'API sur un
+port libre, envoie des requêtes /predict concurrentes pendant une durée
+fixe et rapporte :
+- le débit (images/s) et les latences p50/p95
+- la mémoire de l'ensemble des processus : RSS (pages partagées comptées
+  dans chaque worker) et PSS (pages partagées réparties entre les workers)
+
+Le cache des prédictions est désactivé pendant la mesure (chaque requête
+passe par le modèle). --compare-preload mesure aussi chaque répartition
+sans préchargement (un modèle privé par worker).
+
+Usage:
+    python scripts/benchmark_serving.py
+    python scripts/benchmark_serving.py --splits 1x4 2x2 4x1 --duration 30 --compare-preload
+"""
+
+import io
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.inference.serve import cgroup_cpu_limit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def default_splits(cpus):
+    """Répartitions workers x threads qui occupent tous les CPUs."""
+    cpus = max(1, int(cpus))
+    return [(workers, cpus // workers) for workers in range(1, cpus + 1) if cpus % workers == 0]
+
+
+def parse_split(value):
+    """'2x4' -> (2, 4)."""
+    workers, threads = value.lower().split('x')
+    return int(workers), int(threads)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_image(size=256):
+    """Image JPEG synthétique."""
+    from PIL import Image
+    image = Image.frombytes('RGB', (size, size), os.urandom(size * size * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def process_tree(pid):
+    """pid et tous ses descendants (workers, pools de processus)."""
+    pids = [pid]
+    for current in pids:
+        for task in Path(f'/proc/{current}/task').glob('*'):
+            try:
+                pids.extend(int(child) for child in (task / 'children').read_text().split())
+            except OSError:
+                pass
+    return pids
+
+
+def memory_mb(pid):
+    """(RSS, PSS) cumulés de l'arbre de processus, en MB."""
+    rss = pss = 0
+    for current in process_tree(pid):
+        try:
+            for line in Path(f'/proc/{current}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    rss += int(line.split()[1])
+            for line in Path(f'/proc/{current}/smaps_rollup').read_text().splitlines():
+                if line.startswith('Pss:'):
+                    pss += int(line.split()[1])
+        except OSError:
+            pass
+    return rss / 1024, pss / 1024
+
+
+def write_config(config_path):
+    """Copie de la configuration sans cache des prédictions."""
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    config['inference'].setdefault('cache', {})['enabled'] = False
+    handle, path = tempfile.mkstemp(suffix='.yaml')
+    with os.fdopen(handle, 'w') as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def start_server(workers, threads, preload, config_path, timeout=300):
+    """Démarre le lanceur et attend /health."""
+    port = free_port()
+    command = [sys.executable, '-m', 'src.inference.serve', '--host', '127.0.0.1',
+               '--port', str(port), '--workers', str(workers), '--threads', str(threads),
+               '--log-level', 'warning']
+    if not preload:
+        command.append('--no-preload')
+    env = dict(os.environ, PLANT_API_CONFIG=config_path)
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le lanceur s'est arrete (code {process.returncode})")
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                # Tous les workers doivent avoir terminé leur warm-up
+                time.sleep(2 * workers)
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"API non disponible apres {timeout} s")
+
+
+def run_load(url, image, concurrency, duration):
+    """Requêtes /predict concurrentes pendant duration secondes."""
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.post(f'{url}/predict',
+                                        files={'file': ('image.jpg', image, 'image/jpeg')},
+                                        timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    return latencies, errors, elapsed
+
+
+def benchmark(workers, threads, preload, config_path, image, concurrency, duration):
+    process, url = start_server(workers, threads, preload, config_path)
+    try:
+        latencies, errors, elapsed = run_load(url, image, concurrency, duration)
+        rss, pss = memory_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    if not latencies:
+        raise RuntimeError("Aucune requete reussie")
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'errors': errors,
+        'rss': rss,
+        'pss': pss
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du service multi-workers')
+    parser.add_argument('--config', type=str, default='configs/config.yaml',
+                        help='Chemin vers le fichier de configuration')
+    parser.add_argument('--splits', type=str, nargs='+', default=None,
+                        help='Répartitions workers x threads, ex: 1x4 2x2 4x1 (défaut: selon le quota CPU)')
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='Durée de la mesure par répartition (secondes)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Clients simultanés (défaut: 4 x workers)')
+    parser.add_argument('--compare-preload', action='store_true',
+                        help='Mesurer aussi sans préchargement (un modèle par worker)')
+    args = parser.parse_args()
+
+    if not Path('/proc/self/smaps_rollup').exists():
+        print("[ATTENTION] /proc/<pid>/smaps_rollup indisponible: PSS non mesure")
+
+    cpus = cgroup_cpu_limit()
+    splits = [parse_split(split) for split in args.splits] if args.splits else default_splits(cpus)
+    print(f"[INFO] CPUs disponibles: {cpus:g}, repartitions: "
+          f"{', '.join(f'{w}x{t}' for w, t in splits)}")
+
+    config_path = write_config(ROOT / args.config)
+    image = make_image()
+    rows = []
+    try:
+        for workers, threads in splits:
+            for preload in ((True, False) if args.compare_preload else (True,)):
+                concurrency = args.concurrency or 4 * workers
+                label = f"{workers}x{threads}{'' if preload else ' (sans prechargement)'}"
+                print(f"[INFO] {label}: {concurrency} clients pendant {args.duration:g} s...")
+                try:
+                    result = benchmark(workers, threads, preload, config_path, image,
+                                       concurrency, args.duration)
+                except RuntimeError as e:
+                    print(f"[ERREUR] {label}: {e}")
+                    continue
+                rows.append((workers, threads, preload, result))
+    finally:
+        os.remove(config_path)
+
+    print()
+    print(f"{'Workers':>7} {'Threads':>7} {'Prechargement':>13} {'img/s':>8} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'Erreurs':>7} {'RSS (MB)':>9} {'PSS (MB)':>9}")
+    print("-" * 87)
+    for workers, threads, preload, result in rows:
+        print(f"{workers:>7} {threads:>7} {'oui' if preload else 'non':>13} "
+              f"{result['throughput']:>8.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+              f"{result['errors']:>7} {result['rss']:>9.0f} {result['pss']:>9.0f}")
+    print("\n[NOTE] RSS compte les pages partagees dans chaque processus ; "
+          "PSS mesure la memoire reellement occupee.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Vérification de l'augmentation par batch (src/data/augmentation.py).
+
+Compare, sur les mêmes images, les augmentations PIL par image
+(get_transforms(augmentation=True)) et l'augmentation vectorisée sur le
+batch uint8 :
+- statistiques des sorties normalisées (moyenne/écart-type par canal,
+  part de pixels de remplissage noir, distributions des moyennes et
+  écarts-types par image avec la statistique de Kolmogorov-Smirnov)
+- temps CPU par image dans les workers et coût amorti du batch
+- grille visuelle (originales / PIL / batch) enregistrée en PNG
+
+Usage:
+    python scripts/check_augmentation.py
+    python scripts/check_augmentation.py --num-images 128 --output models/augmentation_check.png
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import yaml
+import numpy as np
+import torch
+from PIL import Image
+from torchvision.utils import save_image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.metadata import load_metadata_arrays
+from src.data.preprocessing import get_transforms, get_uint8_transforms, IMAGENET_MEAN, IMAGENET_STD
+from src.data.augmentation import BatchAugmentation
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def ks_statistic(a, b):
+    """Statistique de Kolmogorov-Smirnov à deux échantillons."""
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side='right') / len(a)
+    cdf_b = np.searchsorted(b, values, side='right') / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+def summarize(outputs):
+    """Statistiques d'un ensemble de sorties normalisées (N, 3, H, W)."""
+    mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+    std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+    black = ((outputs - (-mean / std)).abs() < 1e-3).all(dim=1)
+    return {
+        'channel_mean': outputs.mean(dim=(0, 2, 3)).numpy(),
+        'channel_std': outputs.std(dim=(0, 2, 3)).numpy(),
+        'black_fraction': float(black.float().mean()),
+        'image_means': outputs.mean(dim=(1, 2, 3)).numpy(),
+        'image_stds': outputs.std(dim=(1, 2, 3)).numpy(),
+    }
+
+
+def denormalize(images):
+    mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+    std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+    return (images * std + mean).clamp(0, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vérification de l\'augmentation par batch')
+    parser.add_argument('--config', type=str, default='configs/config.yaml',
+                        help='Chemin vers le fichier de configuration')
+    parser.add_argument('--split', type=str, default='train',
+                        help='Split dont les images sont utilisées')
+    parser.add_argument('--num-images', type=int, default=64,
+                        help='Nombre d\'images distinctes')
+    parser.add_argument('--repeats', type=int, default=8,
+                        help='Tirages d\'augmentation par image')
+    parser.add_argument('--output', type=str, default='models/augmentation_check.png',
+                        help='Grille visuelle de sortie (PNG)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Graine aléatoire')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        data_config = yaml.safe_load(f)['data']
+    image_size = data_config['image_size']
+    torch.manual_seed(args.seed)
+
+    metadata = load_metadata_arrays(data_config['metadata_path'], args.split)
+    paths = [metadata.path(i) for i in range(min(args.num_images, len(metadata)))]
+    images = [Image.open(path).convert('RGB') for path in paths]
+    print(f"[INFO] {len(images)} images x {args.repeats} tirages ({args.split})\n")
+
+    pil_transform = get_transforms(image_size, augmentation=True)
+    uint8_transform = get_uint8_transforms(image_size)
+    augment = BatchAugmentation()
+
+    # Chemin historique : augmentations PIL par image (dans les workers)
+    start = time.process_time()
+    pil_outputs = torch.stack([pil_transform(image) for _ in range(args.repeats) for image in images])
+    pil_ms = (time.process_time() - start) / len(pil_outputs) * 1000
+
+    # Augmentation par batch : resize uint8 dans les workers, puis batch
+    start = time.process_time()
+    uint8_batch = torch.stack([uint8_transform(image) for image in images])
+    worker_ms = (time.process_time() - start) / len(images) * 1000
+    start = time.process_time()
+    batch_outputs = augment(uint8_batch.repeat(args.repeats, 1, 1, 1))
+    batch_ms = (time.process_time() - start) / len(batch_outputs) * 1000
+
+    pil_stats = summarize(pil_outputs)
+    batch_stats = summarize(batch_outputs)
+
+    print(f"{'Statistique':<28} {'PIL':>18} {'Batch':>18}")
+    print("-" * 66)
+    fmt = lambda values: " ".join(f"{v:+.3f}" for v in values)
+    print(f"{'Moyenne par canal':<28} {fmt(pil_stats['channel_mean']):>18} {fmt(batch_stats['channel_mean']):>18}")
+    print(f"{'Ecart-type par canal':<28} {fmt(pil_stats['channel_std']):>18} {fmt(batch_stats['channel_std']):>18}")
+    print(f"{'Pixels noirs (rotation)':<28} {pil_stats['black_fraction']:>18.2%} {batch_stats['black_fraction']:>18.2%}")
+
+    ks_mean = ks_statistic(pil_stats['image_means'], batch_stats['image_means'])
+    ks_std = ks_statistic(pil_stats['image_stds'], batch_stats['image_stds'])
+    print(f"\nKS moyennes par image: {ks_mean:.3f}, KS ecarts-types par image: {ks_std:.3f}")
+
+    print(f"\nTemps CPU par image:")
+    print(f"  PIL par image (worker):      {pil_ms:.2f} ms")
+    print(f"  Resize uint8 (worker):       {worker_ms:.2f} ms")
+    print(f"  Augmentation batch (amorti): {batch_ms:.2f} ms")
+
+    # Grille : originales / PIL / batch
+    count = min(8, len(images))
+    originals = uint8_batch[:count].float() / 255
+    grid = torch.cat([originals, denormalize(pil_outputs[:count]), denormalize(batch_outputs[:count])])
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    save_image(grid, args.output, nrow=count)
+    print(f"\n[OK] Grille visuelle: {args.output} (lignes: originales, PIL, batch)")
+
+    # Seuil indicatif pour un échantillon de quelques centaines de tirages
+    threshold = 1.36 * np.sqrt(2 / len(pil_outputs))
+    if max(ks_mean, ks_std) <= max(threshold, 0.1):
+        print(f"[OK] Distributions compatibles (KS <= {max(threshold, 0.1):.3f})")
+    else:
+        print(f"[WARN] Distributions differentes (KS > {max(threshold, 0.1):.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Script pour exporter le modèle entraîné vers un format optimisé pour l'inférence.
+
+Usage:
+    python scripts/export_model.py --checkpoint models/best_model.pth --output models/model_torchscript.pt
+    python scripts/export_model.py --format onnx --output models/model.onnx
+
+Pour servir le modèle exporté, pointer inference.model_path vers le fichier
+généré dans configs/config.yaml.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.export import export_torchscript, export_onnx, check_parity
+from src.inference.backends import create_backend
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporter le modèle pour l'inférence")
+    parser.add_argument("--checkpoint", default="models/best_model.pth",
+                        help="Checkpoint d'entraînement (.pth)")
+    parser.add_argument("--format", choices=["torchscript", "onnx"], default="torchscript",
+                        help="Format d'export")
+    parser.add_argument("--output", default=None,
+                        help="Fichier de sortie (défaut: models/model_torchscript.pt ou models/model.onnx)")
+    parser.add_argument("--config", default="configs/config.yaml",
+                        help="Fichier de configuration (image_size, num_classes)")
+    parser.add_argument("--atol", type=float, default=1e-4,
+                        help="Tolérance maximale sur les logits pour le contrôle de parité")
+    args = parser.parse_args()
+
+    checkpoint_path = Path(args.checkpoint)
+    if not checkpoint_path.exists():
+        print(f"[ERREUR] Le fichier {checkpoint_path} n'existe pas!")
+        sys.exit(1)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    image_size = config['data']['image_size']
+    num_classes = config['model']['num_classes']
+    if args.output is None:
+        args.output = "models/model.onnx" if args.format == "onnx" else "models/model_torchscript.pt"
+
+    print(f"[INFO] Export {args.format} de {checkpoint_path}...")
+    start = time.perf_counter()
+    if args.format == "onnx":
+        model = export_onnx(checkpoint_path, args.output, image_size=image_size,
+                            num_classes=num_classes)
+    else:
+        model, _ = export_torchscript(checkpoint_path, args.output, image_size=image_size,
+                                      num_classes=num_classes)
+    print(f"[OK] Modele exporte dans {args.output} ({time.perf_counter() - start:.1f}s)")
+
+    # Contrôle de parité avec le modèle eager, via le backend d'inférence
+    exported = create_backend(args.format, args.output, num_classes=num_classes)
+    parity = check_parity(model, exported, image_size=image_size, batch_sizes=(1, 4, 8))
+    print(f"[INFO] Parite: ecart max {parity['max_abs_diff']:.2e}, "
+          f"accord top-1 {parity['top1_agreement']:.0%}")
+
+    if parity['max_abs_diff'] > args.atol or parity['top1_agreement'] < 1.0:
+        print(f"[ERREUR] Le modele exporte differe du modele eager (tolerance {args.atol})")
+        sys.exit(1)
+
+    print(f"[OK] Parite verifiee")
+    print(f"[NOTE] Mettez inference.model_path a {args.output} dans {args.config} pour l'utiliser")
+
+
+if __name__ == "__main__":
+    main()
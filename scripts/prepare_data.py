@@ -1,16 +1,31 @@
 """
 Script pour préparer et organiser les données du dataset PlantVillage.
-- Génère metadata.csv avec les chemins et labels
+- Génère metadata.csv avec les chemins et labels (et le sidecar metadata.npz
+  en colonnes NumPy lu par le dataset)
+- Mise à jour incrémentale via un manifeste (taille, mtime, empreinte) :
+  seuls les fichiers ajoutés, supprimés ou modifiés sont traités
 - Split train/val/test
 - Crée la structure de dossiers pour les données préprocessées
+- Optionnellement (--pack), écrit un shard d'images pré-décodées par split
 """
 
 import os
+import sys
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.metadata import write_metadata_arrays
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG'}
+MANIFEST_NAME = "manifest.csv"
+
 
 def load_config(config_path="configs/config.yaml"):
     """Charge la configuration depuis le fichier YAML."""
@@ -19,39 +34,110 @@ def load_config(config_path="configs/config.yaml"):
     return config
 
 
-def find_image_files(data_dir):
-    """Trouve tous les fichiers images dans le répertoire."""
-    image_extensions = {'.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG'}
-    image_files = []
+def scan_class_dir(class_dir):
+    """
+    Liste les images d'un dossier de classe.
     
+    os.scandir fournit le type de fichier sans appel système supplémentaire ;
+    taille et mtime servent à détecter les fichiers modifiés.
+    """
+    class_name = os.path.basename(class_dir)
+    image_files = []
+    with os.scandir(class_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or os.path.splitext(entry.name)[1] not in IMAGE_EXTENSIONS:
+                continue
+            stat = entry.stat()
+            image_files.append({
+                'path': entry.path,
+                'label': class_name,
+                'class_name': class_name,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            })
+    return image_files
+
+
+def find_image_files(data_dir, num_workers=None):
+    """Trouve tous les fichiers images dans le répertoire (un thread par dossier de classe)."""
     data_path = Path(data_dir)
     if not data_path.exists():
         raise ValueError(f"Le répertoire {data_dir} n'existe pas")
     
-    # Parcourt récursivement tous les dossiers
-    for class_dir in data_path.iterdir():
-        if class_dir.is_dir():
-            class_name = class_dir.name
-            for image_file in class_dir.iterdir():
-                if image_file.suffix in image_extensions:
-                    image_files.append({
-                        'path': str(image_file),
-                        'label': class_name,
-                        'class_name': class_name
-                    })
+    with os.scandir(data_path) as entries:
+        class_dirs = [entry.path for entry in entries if entry.is_dir()]
+    
+    image_files = []
+    with ThreadPoolExecutor(max_workers=num_workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for files in pool.map(scan_class_dir, class_dirs):
+            image_files.extend(files)
     
+    # Ordre déterministe quel que soit le système de fichiers
+    image_files.sort(key=lambda f: f['path'])
     return image_files
 
 
-def create_metadata(data_dir, output_path, config):
+def hash_file(path):
+    """Empreinte du contenu d'un fichier (blake2b, 128 bits)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_files(paths, num_workers=None):
+    """Calcule les empreintes de plusieurs fichiers en parallèle."""
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=num_workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        return dict(zip(paths, pool.map(hash_file, paths)))
+
+
+def load_manifest(manifest_path):
+    """Charge le manifeste {path: {'size', 'mtime_ns', 'hash'}}."""
+    manifest = pd.read_csv(manifest_path, dtype={'hash': str})
+    return {
+        row.path: {'size': row.size, 'mtime_ns': row.mtime_ns, 'hash': row.hash}
+        for row in manifest.itertuples(index=False)
+    }
+
+
+def save_manifest(image_files, hashes, manifest_path):
+    """Sauvegarde le manifeste (path, size, mtime_ns, hash) des images scannées."""
+    manifest = pd.DataFrame({
+        'path': [f['path'] for f in image_files],
+        'size': [f['size'] for f in image_files],
+        'mtime_ns': [f['mtime_ns'] for f in image_files],
+        'hash': [hashes[f['path']] for f in image_files]
+    })
+    tmp_path = Path(manifest_path).with_suffix('.csv.tmp')
+    manifest.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, manifest_path)
+    print(f"Manifeste sauvegardé dans {manifest_path}")
+
+
+def save_class_mapping(class_to_id, mapping_path):
+    """Sauvegarde le mapping classe -> id (et id -> classe)."""
+    with open(mapping_path, 'w') as f:
+        yaml.dump({
+            'class_to_id': class_to_id,
+            'id_to_class': {v: k for k, v in class_to_id.items()},
+            'num_classes': len(class_to_id)
+        }, f)
+    print(f"Mapping des classes sauvegardé dans {mapping_path}")
+
+
+def create_metadata(data_dir, output_path, config, image_files=None):
     """Crée le fichier metadata.csv avec tous les chemins et labels."""
-    print(f"Recherche des images dans {data_dir}...")
-    image_files = find_image_files(data_dir)
+    if image_files is None:
+        print(f"Recherche des images dans {data_dir}...")
+        image_files = find_image_files(data_dir)
     
     if len(image_files) == 0:
         raise ValueError(f"Aucune image trouvée dans {data_dir}")
     
-    df = pd.DataFrame(image_files)
+    df = pd.DataFrame(image_files, columns=['path', 'label', 'class_name'])
     
     # Créer un mapping classe -> class_id
     unique_classes = sorted(df['label'].unique())
@@ -66,18 +152,99 @@ def create_metadata(data_dir, output_path, config):
     print(f"Metadata sauvegardé dans {output_path}")
     
     # Sauvegarder le mapping classe -> id
-    mapping_path = Path(output_path).parent / "class_mapping.yaml"
-    with open(mapping_path, 'w') as f:
-        yaml.dump({
-            'class_to_id': class_to_id,
-            'id_to_class': {v: k for k, v in class_to_id.items()},
-            'num_classes': len(unique_classes)
-        }, f)
-    print(f"Mapping des classes sauvegardé dans {mapping_path}")
+    save_class_mapping(class_to_id, Path(output_path).parent / "class_mapping.yaml")
     
     return df, class_to_id
 
 
+def assign_split(content_hash, config):
+    """
+    Split déterministe d'une nouvelle image d'après l'empreinte de son contenu.
+    
+    Une même image reçoit toujours le même split (pas de fuite entre train et
+    test pour les doublons) et les proportions suivent train_split/val_split.
+    """
+    fraction = int(content_hash[:8], 16) / 0x100000000
+    if fraction < config['data']['train_split']:
+        return 'train'
+    if fraction < config['data']['train_split'] + config['data']['val_split']:
+        return 'val'
+    return 'test'
+
+
+def update_metadata(image_files, metadata_path, manifest_path, config, num_workers=None):
+    """
+    Met à jour metadata.csv de façon incrémentale.
+    
+    Seuls les fichiers nouveaux ou dont la taille/mtime a changé sont relus
+    et hachés. Les images existantes gardent leur split et les class_id
+    existants sont conservés (les nouvelles classes sont ajoutées à la fin).
+    Une classe disparue lève une ValueError : il faut alors repartir de --full.
+    
+    Returns:
+        tuple: (DataFrame avec split, mapping classe -> id, empreintes par chemin, compteurs)
+    """
+    old_df = pd.read_csv(metadata_path)
+    manifest = load_manifest(manifest_path)
+    old_split = dict(zip(old_df['path'], old_df['split']))
+    
+    # Empreintes : réutilisées si taille et mtime sont inchangées
+    hashes = {}
+    to_hash = []
+    for f in image_files:
+        entry = manifest.get(f['path'])
+        if (entry is not None and f['path'] in old_split
+                and entry['size'] == f['size'] and entry['mtime_ns'] == f['mtime_ns']):
+            hashes[f['path']] = entry['hash']
+        else:
+            to_hash.append(f['path'])
+    hashes.update(hash_files(to_hash, num_workers))
+    
+    scanned = {f['path']: f for f in image_files}
+    added = [f for f in image_files if f['path'] not in old_split]
+    removed = [path for path in old_split if path not in scanned]
+    modified = [
+        path for path in to_hash
+        if path in old_split and manifest.get(path, {}).get('hash') != hashes[path]
+    ]
+    
+    # Mapping existant : ids stables, nouvelles classes à la suite
+    mapping_path = Path(metadata_path).parent / "class_mapping.yaml"
+    class_to_id = {}
+    if mapping_path.exists():
+        with open(mapping_path, 'r') as f:
+            class_to_id = dict(yaml.safe_load(f).get('class_to_id', {}))
+    # Classe disparue : retirer son id décalerait num_classes et la tête du modèle
+    stale = sorted((set(class_to_id) | set(old_df['label'])) - {f['label'] for f in image_files})
+    if stale:
+        raise ValueError(
+            f"Classes supprimées depuis la dernière préparation: {stale}. "
+            f"Relancer avec --full pour régénérer le mapping des classes"
+        )
+    for cls in sorted({f['label'] for f in image_files} - set(class_to_id)):
+        class_to_id[cls] = len(class_to_id)
+    
+    # Lignes existantes dans leur ordre d'origine, puis les nouvelles images
+    kept = old_df[old_df['path'].isin(scanned)]
+    new_rows = pd.DataFrame({
+        'path': [f['path'] for f in added],
+        'label': [f['label'] for f in added],
+        'class_name': [f['class_name'] for f in added],
+        'split': [assign_split(hashes[f['path']], config) for f in added]
+    }, columns=['path', 'label', 'class_name', 'split'])
+    df = pd.concat([kept, new_rows], ignore_index=True)
+    df['class_id'] = df['label'].map(class_to_id)
+    df = df[['path', 'label', 'class_name', 'class_id', 'split']]
+    
+    changes = {
+        'added': len(added),
+        'removed': len(removed),
+        'modified': len(modified),
+        'unchanged': len(image_files) - len(added) - len(modified)
+    }
+    return df, class_to_id, hashes, changes
+
+
 def split_data(df, config):
     """Divise les données en train/val/test."""
     train_split = config['data']['train_split']
@@ -121,9 +288,40 @@ def create_directories(processed_dir):
     print(f"Structure de dossiers créée dans {processed_dir}")
 
 
+def pack_splits(df, processed_dir, image_size, num_workers=None):
+    """Écrit un shard d'images pré-décodées par split (data/processed/{split})."""
+    from src.data.shards import write_shard
+    
+    for split in ['train', 'val', 'test']:
+        split_df = df[df['split'] == split]
+        if len(split_df) == 0:
+            continue
+        print(f"Packing du split {split} ({len(split_df)} images)...")
+        shard_dir = write_shard(
+            split_df['path'].tolist(),
+            split_df['class_id'].tolist(),
+            split_df['label'].tolist(),
+            Path(processed_dir, split),
+            image_size=image_size,
+            num_workers=num_workers
+        )
+        print(f"  Shard ecrit dans {shard_dir}")
+
+
 def main():
     """Fonction principale."""
-    config = load_config()
+    parser = argparse.ArgumentParser(description='Préparer les données PlantVillage')
+    parser.add_argument('--config', type=str, default='configs/config.yaml',
+                        help='Chemin vers le fichier de configuration')
+    parser.add_argument('--pack', action='store_true',
+                        help='Écrire des shards d\'images pré-décodées dans data/processed/{split}')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Nombre de processus pour le packing (défaut: nombre de cœurs)')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignorer le manifeste et régénérer metadata.csv et les splits')
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
     
     data_config = config['data']
     raw_dir = data_config['raw_dir']
@@ -143,16 +341,54 @@ def main():
         print(f"   3. Ou utiliser DVC pour recuperer les donnees: dvc pull")
         sys.exit(1)
     
-    # Créer metadata.csv
-    df, class_mapping = create_metadata(raw_dir, metadata_path, config)
+    manifest_path = Path(metadata_path).parent / MANIFEST_NAME
+    incremental = (not args.full and Path(metadata_path).exists() and manifest_path.exists())
+    
+    print(f"Recherche des images dans {raw_dir}...")
+    image_files = find_image_files(raw_dir)
+    if len(image_files) == 0:
+        raise ValueError(f"Aucune image trouvée dans {raw_dir}")
+    
+    changes = None
+    if incremental:
+        # Mise à jour incrémentale : splits et class_id existants conservés
+        try:
+            df_with_split, class_mapping, hashes, changes = update_metadata(
+                image_files, metadata_path, manifest_path, config
+            )
+        except ValueError as e:
+            print(f"[ERREUR] {e}")
+            sys.exit(1)
+        print(f"Mise à jour incrémentale: {changes['added']} ajoutées, "
+              f"{changes['removed']} supprimées, {changes['modified']} modifiées, "
+              f"{changes['unchanged']} inchangées")
+        save_class_mapping(class_mapping, Path(metadata_path).parent / "class_mapping.yaml")
+    else:
+        # Créer metadata.csv
+        df, class_mapping = create_metadata(raw_dir, metadata_path, config, image_files)
+        
+        # Split train/val/test
+        df_with_split = split_data(df, config)
+        
+        print(f"Calcul des empreintes de {len(image_files)} images...")
+        hashes = hash_files([f['path'] for f in image_files])
     
-    # Split train/val/test
-    df_with_split = split_data(df, config)
     df_with_split.to_csv(metadata_path, index=False)
+    print(f"Colonnes NumPy sauvegardées dans {write_metadata_arrays(df_with_split, metadata_path)}")
+    save_manifest(image_files, hashes, manifest_path)
     
     # Créer la structure de dossiers
     create_directories(processed_dir)
     
+    # Shards pré-décodés (optionnel, inutile si rien n'a changé)
+    if args.pack:
+        from src.data.shards import shard_exists
+        unchanged = changes is not None and not (changes['added'] or changes['removed'] or changes['modified'])
+        if unchanged and all(shard_exists(Path(processed_dir, split)) for split in ['train', 'val', 'test']):
+            print("[INFO] Aucun changement, shards existants conserves")
+        else:
+            pack_splits(df_with_split, processed_dir, data_config['image_size'], args.workers)
+    
     # Mettre à jour le nombre de classes dans config si nécessaire
     num_classes = len(class_mapping)
     print(f"\n[SUCCES] Preparation terminee!")
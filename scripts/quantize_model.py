@@ -0,0 +1,200 @@
+"""
+Script de quantification INT8 statique du modèle entraîné.
+
+- Calibre le modèle sur un échantillon du split 'val' de metadata.csv
+- Exporte le modèle INT8 en TorchScript (chargeable par le predictor)
+- Compare la précision par classe et la latence FP32 / INT8
+- Écrit un rapport (Markdown + JSON)
+
+Usage:
+    python scripts/quantize_model.py --checkpoint models/best_model.pth --output models/model_int8.pt
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import yaml
+import torch
+from torch.utils.data import DataLoader, Subset
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.dataset import PlantDiseaseDataset
+from src.models.export import load_checkpoint_model
+from src.models.quantization import (
+    quantize_static,
+    save_quantized,
+    evaluate_per_class,
+    measure_latency
+)
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def load_class_names(num_classes, mapping_path="data/class_mapping.yaml"):
+    """Noms des classes depuis class_mapping.yaml (ou noms génériques)."""
+    if Path(mapping_path).exists():
+        with open(mapping_path, 'r') as f:
+            id_to_class = yaml.safe_load(f).get('id_to_class', {})
+        return [id_to_class.get(i, id_to_class.get(str(i), f"class_{i}")) for i in range(num_classes)]
+    return [f"class_{i}" for i in range(num_classes)]
+
+
+def write_report(report, report_path):
+    """Écrit le rapport précision/latence en Markdown et JSON."""
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path.with_suffix('.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    fp32, int8 = report['fp32'], report['int8']
+    lines = [
+        "# Rapport de quantification INT8",
+        "",
+        f"- Checkpoint FP32: `{report['checkpoint']}`",
+        f"- Modèle INT8: `{report['output']}`",
+        f"- Calibration: {report['calibration_images']} images (split val)",
+        f"- Evaluation: {report['eval_images']} images (split val, hors calibration)",
+        f"- Threads torch: {report['num_threads']}",
+        "",
+        "## Résumé",
+        "",
+        "| | FP32 | INT8 | Delta |",
+        "|---|---|---|---|",
+        f"| Accuracy | {fp32['accuracy']:.4f} | {int8['accuracy']:.4f} | {int8['accuracy'] - fp32['accuracy']:+.4f} |",
+        f"| Latence batch 1 (ms/image) | {fp32['latency_b1_ms']:.2f} | {int8['latency_b1_ms']:.2f} | x{fp32['latency_b1_ms'] / int8['latency_b1_ms']:.2f} |",
+        f"| Latence batch {report['batch_size']} (ms/image) | {fp32['latency_batch_ms']:.2f} | {int8['latency_batch_ms']:.2f} | x{fp32['latency_batch_ms'] / int8['latency_batch_ms']:.2f} |",
+        f"| Taille (MB) | {fp32['size_mb']:.1f} | {int8['size_mb']:.1f} | x{fp32['size_mb'] / int8['size_mb']:.2f} |",
+        "",
+        "## Précision par classe",
+        "",
+        "| Classe | Images | FP32 | INT8 | Delta |",
+        "|---|---|---|---|---|",
+    ]
+    for row in report['per_class']:
+        lines.append(
+            f"| {row['class']} | {row['images']} | {row['fp32_accuracy']:.4f} | "
+            f"{row['int8_accuracy']:.4f} | {row['delta']:+.4f} |"
+        )
+    with open(report_path.with_suffix('.md'), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantification INT8 statique du modèle")
+    parser.add_argument("--checkpoint", default="models/best_model.pth",
+                        help="Checkpoint FP32 d'entraînement (.pth)")
+    parser.add_argument("--output", default="models/model_int8.pt",
+                        help="Modèle INT8 de sortie (TorchScript)")
+    parser.add_argument("--config", default="configs/config.yaml",
+                        help="Fichier de configuration")
+    parser.add_argument("--report", default="models/quantization_report.md",
+                        help="Rapport de sortie (.md, et .json à côté)")
+    parser.add_argument("--calibration-images", type=int, default=512,
+                        help="Nombre d'images de calibration (split val)")
+    parser.add_argument("--max-eval-images", type=int, default=None,
+                        help="Nombre maximum d'images d'évaluation (défaut: tout le split val)")
+    parser.add_argument("--backend", default="x86", choices=["x86", "fbgemm", "qnnpack"],
+                        help="Moteur de quantification")
+    parser.add_argument("--batch-size", type=int, default=32,
+                        help="Taille de batch pour calibration, évaluation et latence")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    data_config = config['data']
+    image_size = data_config['image_size']
+
+    # Modèle FP32
+    model, checkpoint = load_checkpoint_model(args.checkpoint, config['model']['num_classes'])
+    num_classes = checkpoint.get('num_classes', config['model']['num_classes'])
+    print(f"[OK] Modele FP32 charge depuis {args.checkpoint} ({num_classes} classes)")
+
+    # Split val : échantillon de calibration + reste pour l'évaluation
+    val_dataset = PlantDiseaseDataset(
+        metadata_path=data_config['metadata_path'],
+        split='val',
+        image_size=image_size,
+        augmentation=False
+    )
+    indices = torch.randperm(len(val_dataset), generator=torch.Generator().manual_seed(42)).tolist()
+    calibration_indices = indices[:args.calibration_images]
+    eval_indices = indices[args.calibration_images:] or calibration_indices
+    if args.max_eval_images:
+        eval_indices = eval_indices[:args.max_eval_images]
+
+    loader_kwargs = {'batch_size': args.batch_size, 'shuffle': False, 'num_workers': 2}
+    calibration_loader = DataLoader(Subset(val_dataset, calibration_indices), **loader_kwargs)
+    eval_loader = DataLoader(Subset(val_dataset, eval_indices), **loader_kwargs)
+
+    # Quantification
+    print(f"[INFO] Calibration sur {len(calibration_indices)} images...")
+    quantized = quantize_static(model, calibration_loader, image_size=image_size, backend=args.backend)
+    exported = save_quantized(
+        quantized,
+        args.output,
+        image_size=image_size,
+        metadata={'num_classes': num_classes, 'source': Path(args.checkpoint).name},
+        backend=args.backend
+    )
+    print(f"[OK] Modele INT8 exporte dans {args.output}")
+
+    # Précision par classe
+    print(f"[INFO] Evaluation sur {len(eval_indices)} images...")
+    fp32_correct, total = evaluate_per_class(model, eval_loader, num_classes)
+    int8_correct, _ = evaluate_per_class(exported, eval_loader, num_classes)
+
+    class_names = load_class_names(num_classes)
+    per_class = []
+    for i in range(num_classes):
+        images = int(total[i])
+        fp32_acc = fp32_correct[i] / images if images else 0.0
+        int8_acc = int8_correct[i] / images if images else 0.0
+        per_class.append({
+            'class': class_names[i],
+            'images': images,
+            'fp32_accuracy': float(fp32_acc),
+            'int8_accuracy': float(int8_acc),
+            'delta': float(int8_acc - fp32_acc)
+        })
+
+    # Latence et taille
+    print("[INFO] Mesure de la latence...")
+    n = max(int(total.sum()), 1)
+    report = {
+        'checkpoint': str(args.checkpoint),
+        'output': str(args.output),
+        'quantization_backend': args.backend,
+        'calibration_images': len(calibration_indices),
+        'eval_images': len(eval_indices),
+        'batch_size': args.batch_size,
+        'num_threads': torch.get_num_threads(),
+        'fp32': {
+            'accuracy': float(fp32_correct.sum() / n),
+            'latency_b1_ms': measure_latency(model, image_size, 1)['image_ms'],
+            'latency_batch_ms': measure_latency(model, image_size, args.batch_size, iterations=5)['image_ms'],
+            'size_mb': Path(args.checkpoint).stat().st_size / 1e6
+        },
+        'int8': {
+            'accuracy': float(int8_correct.sum() / n),
+            'latency_b1_ms': measure_latency(exported, image_size, 1)['image_ms'],
+            'latency_batch_ms': measure_latency(exported, image_size, args.batch_size, iterations=5)['image_ms'],
+            'size_mb': Path(args.output).stat().st_size / 1e6
+        },
+        'per_class': per_class
+    }
+    write_report(report, args.report)
+
+    print(f"\n[SUCCES] Quantification terminee!")
+    print(f"   Accuracy FP32: {report['fp32']['accuracy']:.4f}, INT8: {report['int8']['accuracy']:.4f}")
+    print(f"   Latence batch 1: {report['fp32']['latency_b1_ms']:.2f} ms -> {report['int8']['latency_b1_ms']:.2f} ms")
+    print(f"   Rapport: {Path(args.report).with_suffix('.md')}")
+    print(f"\n[NOTE] Mettez inference.model_path a {args.output} dans {args.config} pour servir le modele INT8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Auto-tuning du DataLoader d'entraînement.
+
+Pour chaque combinaison (batch_size, num_workers, prefetch_factor), lance
+quelques pas d'entraînement réels sur le split train et mesure :
+- le débit obtenu (images/s), chargement et calcul en parallèle
+- la part du temps passée à attendre le DataLoader
+- le débit du modèle seul (batchs synthétiques), borne haute atteignable
+
+La configuration la plus rapide dont les batchs préchargés tiennent en
+mémoire est retenue, puis écrite dans configs/config.yaml (--write-config)
+et/ou loggée dans MLflow (--mlflow).
+
+Usage:
+    python scripts/tune_dataloader.py
+    python scripts/tune_dataloader.py --batch-sizes 32 64 --workers 2 4 8 --write-config
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import yaml
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.resnet import create_resnet18
+from src.training.train import create_dataset, create_dataloader
+from src.training.mixed_precision import MixedPrecision
+from src.data.augmentation import get_batch_augmentation
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def available_memory():
+    """Mémoire disponible en octets (/proc/meminfo), ou None si inconnue."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def prefetch_memory(batch_size, workers, prefetch_factor, image_size):
+    """Mémoire des batchs float32 préchargés par les workers (octets)."""
+    return max(workers, 1) * prefetch_factor * batch_size * 3 * image_size * image_size * 4
+
+
+class StepRunner:
+    """Pas d'entraînement (forward + backward + optimizer) du ResNet18."""
+
+    def __init__(self, num_classes, device, precision_config, augment=None):
+        self.device = device
+        self.augment = augment
+        self.precision = MixedPrecision(precision_config, device)
+        self.model = self.precision.prepare_model(
+            create_resnet18(num_classes=num_classes, pretrained=False).to(device)
+        )
+        self.model.train()
+        self.optimizer = optim.Adam(self.model.parameters(), lr=1e-3)
+        self.criterion = nn.CrossEntropyLoss()
+
+    def step(self, images, labels):
+        images = images.to(self.device)
+        if self.augment is not None:
+            images = self.augment(images)
+        images = self.precision.prepare_inputs(images)
+        labels = labels.to(self.device)
+        self.optimizer.zero_grad()
+        with self.precision.autocast():
+            loss = self.criterion(self.model(images), labels)
+        self.precision.step(loss, self.optimizer)
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize()
+
+    def model_throughput(self, batch_size, image_size, num_classes, steps, warmup=2):
+        """Débit du modèle seul sur des batchs synthétiques (images/s)."""
+        if self.augment is not None:
+            images = torch.randint(0, 256, (batch_size, 3, image_size, image_size), dtype=torch.uint8)
+        else:
+            images = torch.randn(batch_size, 3, image_size, image_size)
+        labels = torch.randint(0, num_classes, (batch_size,))
+        for _ in range(warmup):
+            self.step(images, labels)
+        start = time.perf_counter()
+        for _ in range(steps):
+            self.step(images, labels)
+        return batch_size * steps / (time.perf_counter() - start)
+
+
+def measure_pipeline(runner, dataset, data_config, device, batch_size, workers, prefetch_factor,
+                     steps):
+    """
+    Débit d'entraînement réel (DataLoader + modèle).
+
+    Le premier batch (démarrage des workers) n'est pas compté.
+
+    Returns:
+        tuple: (images/s, fraction du temps en attente des données)
+    """
+    config = dict(data_config, num_workers=workers, prefetch_factor=prefetch_factor,
+                  persistent_workers=False)
+    loader = create_dataloader(dataset, config, device, shuffle=True, batch_size=batch_size)
+    iterator = iter(loader)
+    runner.step(*next(iterator))
+
+    data_time = 0.0
+    num_images = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        fetch_start = time.perf_counter()
+        try:
+            images, labels = next(iterator)
+        except StopIteration:
+            break
+        data_time += time.perf_counter() - fetch_start
+        runner.step(images, labels)
+        num_images += labels.size(0)
+    elapsed = time.perf_counter() - start
+    del iterator, loader
+    return num_images / elapsed, data_time / elapsed
+
+
+def update_config_values(config_path, section, values):
+    """
+    Met à jour des clés d'une section de premier niveau du YAML en
+    conservant les commentaires et l'ordre du fichier.
+    """
+    lines = Path(config_path).read_text(encoding='utf-8').splitlines(keepends=True)
+    remaining = dict(values)
+    in_section = False
+    section_end = len(lines)
+    for i, line in enumerate(lines):
+        if re.match(r'^\S', line):
+            if in_section:
+                section_end = i
+                break
+            in_section = line.startswith(f"{section}:")
+            continue
+        match = re.match(r'^(  )(\w+):(\s*)([^#\n]*?)(\s*#.*)?(\n?)$', line) if in_section else None
+        if match and match.group(2) in remaining:
+            value = remaining.pop(match.group(2))
+            lines[i] = (f"{match.group(1)}{match.group(2)}: {value}"
+                        f"{match.group(5) or ''}{match.group(6)}")
+    for key, value in remaining.items():
+        lines.insert(section_end, f"  {key}: {value}\n")
+    Path(config_path).write_text(''.join(lines), encoding='utf-8')
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({w for w in (0, 2, 4, 8, 16, cores) if w <= cores})
+
+    parser = argparse.ArgumentParser(description='Auto-tuning du DataLoader d\'entraînement')
+    parser.add_argument('--config', type=str, default='configs/config.yaml',
+                        help='Chemin vers le fichier de configuration')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, 32, 64],
+                        help='Tailles de batch à tester')
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers,
+                        help='Nombres de workers à tester')
+    parser.add_argument('--prefetch', type=int, nargs='+', default=[2, 4],
+                        help='prefetch_factor à tester')
+    parser.add_argument('--steps', type=int, default=10,
+                        help='Pas d\'entraînement mesurés par configuration')
+    parser.add_argument('--memory-fraction', type=float, default=0.5,
+                        help='Part max de la mémoire disponible pour les batchs préchargés')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Écart de débit en dessous duquel la config la plus légère est préférée')
+    parser.add_argument('--write-config', action='store_true',
+                        help='Écrire batch_size, num_workers, prefetch_factor, persistent_workers dans le fichier de config')
+    parser.add_argument('--mlflow', action='store_true',
+                        help='Logger les mesures et le choix dans MLflow')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    data_config = config['data']
+    training_config = config['training']
+    num_classes = config['model']['num_classes']
+    image_size = data_config['image_size']
+    device = torch.device(training_config.get('device', 'cuda' if torch.cuda.is_available() else 'cpu'))
+
+    dataset = create_dataset(data_config, 'train', augmentation=True)
+    runner = StepRunner(num_classes, device, training_config.get('mixed_precision'),
+                        get_batch_augmentation(data_config))
+    memory_budget = available_memory()
+    if memory_budget:
+        memory_budget *= args.memory_fraction
+    print(f"[INFO] {len(dataset)} images, device {device}, {cores} coeurs, "
+          f"{torch.get_num_threads()} threads torch\n")
+
+    results = []
+    print(f"{'Batch':>6} {'Workers':>8} {'Prefetch':>9} {'Images/s':>10} {'Attente':>8} {'Modele seul':>12}")
+    print("-" * 58)
+    for batch_size in args.batch_sizes:
+        try:
+            model_ips = runner.model_throughput(batch_size, image_size, num_classes, args.steps)
+        except torch.cuda.OutOfMemoryError:
+            print(f"[WARN] batch {batch_size}: memoire GPU insuffisante, ignore")
+            torch.cuda.empty_cache()
+            continue
+        for workers in args.workers:
+            for prefetch_factor in (args.prefetch if workers > 0 else [2]):
+                memory = prefetch_memory(batch_size, workers, prefetch_factor, image_size)
+                if memory_budget and memory > memory_budget:
+                    print(f"{batch_size:>6} {workers:>8} {prefetch_factor:>9}   ignore "
+                          f"({memory / 1e9:.1f} GB precharges)")
+                    continue
+                try:
+                    ips, data_wait = measure_pipeline(runner, dataset, data_config, device, batch_size,
+                                                      workers, prefetch_factor, args.steps)
+                except torch.cuda.OutOfMemoryError:
+                    print(f"{batch_size:>6} {workers:>8} {prefetch_factor:>9}   ignore "
+                          f"(memoire GPU insuffisante)")
+                    torch.cuda.empty_cache()
+                    continue
+                results.append({
+                    'batch_size': batch_size,
+                    'num_workers': workers,
+                    'prefetch_factor': prefetch_factor,
+                    'images_per_sec': ips,
+                    'data_wait_fraction': data_wait,
+                    'model_images_per_sec': model_ips
+                })
+                print(f"{batch_size:>6} {workers:>8} {prefetch_factor:>9} {ips:>10.1f} "
+                      f"{data_wait:>8.0%} {model_ips:>12.1f}")
+
+    if not results:
+        print("[ERREUR] Aucune configuration mesuree")
+        sys.exit(1)
+
+    # Plus rapide ; à débit équivalent, la config la plus légère en mémoire
+    best_ips = max(r['images_per_sec'] for r in results)
+    candidates = [r for r in results if r['images_per_sec'] >= best_ips * (1 - args.tolerance)]
+    best = min(candidates, key=lambda r: (
+        prefetch_memory(r['batch_size'], r['num_workers'], r['prefetch_factor'], image_size),
+        -r['images_per_sec']
+    ))
+    chosen = {key: best[key] for key in ('batch_size', 'num_workers', 'prefetch_factor')}
+    # Workers gardés entre les epochs (pas sous Windows : fichiers et mémoire retenus)
+    chosen['persistent_workers'] = 'true' if best['num_workers'] > 0 and sys.platform != 'win32' else 'false'
+
+    print(f"\n[OK] Configuration retenue: batch_size={best['batch_size']}, "
+          f"num_workers={best['num_workers']}, prefetch_factor={best['prefetch_factor']}, "
+          f"persistent_workers={chosen['persistent_workers']}")
+    print(f"   {best['images_per_sec']:.1f} images/s, attente donnees {best['data_wait_fraction']:.0%} "
+          f"(modele seul: {best['model_images_per_sec']:.1f} images/s)")
+    if best['data_wait_fraction'] > 0.2:
+        print("[NOTE] Le chargement reste limitant : envisager data.cache_dir ou "
+              "data.use_packed_shards (prepare_data.py --pack)")
+    if best['batch_size'] != data_config['batch_size']:
+        print("[NOTE] batch_size modifie : ajuster training.learning_rate si necessaire")
+
+    if args.write_config:
+        update_config_values(args.config, 'data', chosen)
+        print(f"[OK] Valeurs ecrites dans {args.config}")
+
+    if args.mlflow:
+        import mlflow
+        mlflow.set_tracking_uri(config['mlflow']['tracking_uri'])
+        mlflow.set_experiment(config['mlflow']['experiment_name'])
+        with mlflow.start_run(run_name='dataloader_tuning'):
+            mlflow.log_params(chosen)
+            mlflow.log_metrics({
+                'images_per_sec': best['images_per_sec'],
+                'data_wait_fraction': best['data_wait_fraction'],
+                'model_images_per_sec': best['model_images_per_sec']
+            })
+            for i, result in enumerate(results):
+                mlflow.log_metrics({
+                    'sweep_images_per_sec': result['images_per_sec'],
+                    'sweep_data_wait_fraction': result['data_wait_fraction']
+                }, step=i)
+            mlflow.log_dict({'results': results, 'chosen': chosen}, 'dataloader_tuning.json')
+        print("[OK] Resultats logges dans MLflow")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Augmentations vectorisées sur un batch de tensors uint8 (N, 3, H, W).
+
+Équivalent de get_transforms(augmentation=True) appliqué après le
+DataLoader, sur tout le batch à la fois (CPU ou GPU) :
+- RandomRotation(30) + flips horizontal/vertical : une seule grille affine
+  par image (affine_grid + grid_sample), remplissage noir comme torchvision
+- ColorJitter(brightness=0.2, contrast=0.2) : facteurs tirés par image,
+  ordre luminosité/contraste aléatoire par image comme torchvision
+- ConvertImageDtype + Normalize ImageNet
+
+Les workers du DataLoader ne font plus que décoder et redimensionner.
+"""
+
+import math
+
+import torch
+import torch.nn.functional as F
+
+from .preprocessing import IMAGENET_MEAN, IMAGENET_STD
+
+# Poids de rgb_to_grayscale (torchvision), pour la moyenne du contraste
+GRAYSCALE_WEIGHTS = (0.2989, 0.587, 0.114)
+
+
+class BatchAugmentation:
+    """Rotation, flips, jitter et normalisation d'un batch uint8."""
+
+    def __init__(self, degrees=30.0, hflip=0.5, vflip=0.5, brightness=0.2, contrast=0.2,
+                 interpolation='nearest'):
+        """
+        Args:
+            degrees: Angle de rotation maximal (uniforme dans [-degrees, degrees])
+            hflip: Probabilité de flip horizontal
+            vflip: Probabilité de flip vertical
+            brightness: Amplitude du facteur de luminosité (uniforme dans [1-b, 1+b])
+            contrast: Amplitude du facteur de contraste (uniforme dans [1-c, 1+c])
+            interpolation: 'nearest' (comme RandomRotation par défaut) ou 'bilinear'
+        """
+        self.degrees = degrees
+        self.hflip = hflip
+        self.vflip = vflip
+        self.brightness = brightness
+        self.contrast = contrast
+        self.interpolation = interpolation
+
+    def _affine(self, batch_size, device, generator):
+        """Matrices affines (N, 2, 3) : rotation puis flips."""
+        angles = (torch.rand(batch_size, device=device, generator=generator) * 2 - 1)
+        angles = angles * math.radians(self.degrees)
+        cos, sin = torch.cos(angles), torch.sin(angles)
+
+        # Flip = symétrie sur l'axe x (horizontal) ou y (vertical) de la grille
+        flip_x = torch.where(torch.rand(batch_size, device=device, generator=generator) < self.hflip,
+                             -1.0, 1.0)
+        flip_y = torch.where(torch.rand(batch_size, device=device, generator=generator) < self.vflip,
+                             -1.0, 1.0)
+
+        theta = torch.zeros(batch_size, 2, 3, device=device)
+        theta[:, 0, 0] = cos * flip_x
+        theta[:, 0, 1] = -sin * flip_y
+        theta[:, 1, 0] = sin * flip_x
+        theta[:, 1, 1] = cos * flip_y
+        return theta
+
+    def _factors(self, amount, batch_size, device, generator):
+        """Facteurs uniformes dans [1 - amount, 1 + amount], forme (N, 1, 1, 1)."""
+        factors = 1 + (torch.rand(batch_size, device=device, generator=generator) * 2 - 1) * amount
+        return factors.view(-1, 1, 1, 1)
+
+    @staticmethod
+    def _adjust_brightness(images, factors):
+        return (images * factors).clamp_(0, 255)
+
+    @staticmethod
+    def _adjust_contrast(images, factors):
+        # Moyenne du niveau de gris = combinaison des moyennes par canal
+        weights = torch.tensor(GRAYSCALE_WEIGHTS, device=images.device)
+        gray_mean = (images.mean(dim=(2, 3)) @ weights).view(-1, 1, 1, 1)
+        return (images * factors).add_((1 - factors) * gray_mean).clamp_(0, 255)
+
+    def _jitter(self, images, generator):
+        """ColorJitter : luminosité et contraste dans un ordre aléatoire par image."""
+        batch_size, device = images.size(0), images.device
+        brightness = self._factors(self.brightness, batch_size, device, generator)
+        contrast = self._factors(self.contrast, batch_size, device, generator)
+        brightness_first = torch.rand(batch_size, device=device, generator=generator) < 0.5
+
+        # Chaque ordre n'est calculé que pour les images qui le tirent
+        output = torch.empty_like(images)
+        for mask, first in ((brightness_first, True), (~brightness_first, False)):
+            subset, b, c = images[mask], brightness[mask], contrast[mask]
+            if first:
+                output[mask] = self._adjust_contrast(self._adjust_brightness(subset, b), c)
+            else:
+                output[mask] = self._adjust_brightness(self._adjust_contrast(subset, c), b)
+        return output
+
+    @torch.no_grad()
+    def __call__(self, batch, generator=None):
+        """
+        Args:
+            batch: Tensor uint8 (N, 3, H, W)
+            generator: torch.Generator optionnel (reproductibilité)
+
+        Returns:
+            torch.Tensor: Batch float32 augmenté et normalisé (N, 3, H, W)
+        """
+        # Calculs en [0, 255] : la division par 255 est fusionnée à la normalisation
+        images = batch.float()
+        batch_size, device = images.size(0), images.device
+
+        # Rotation + flips en un seul rééchantillonnage
+        theta = self._affine(batch_size, device, generator)
+        grid = F.affine_grid(theta, list(images.shape), align_corners=False)
+        images = F.grid_sample(images, grid, mode=self.interpolation, padding_mode='zeros',
+                               align_corners=False)
+
+        images = self._jitter(images, generator)
+
+        # (x / 255 - mean) / std == x * scale - shift
+        std = torch.tensor(IMAGENET_STD, device=device).view(1, 3, 1, 1)
+        mean = torch.tensor(IMAGENET_MEAN, device=device).view(1, 3, 1, 1)
+        return images.mul_(1.0 / (255.0 * std)).sub_(mean / std)
+
+
+def get_batch_augmentation(data_config):
+    """
+    Augmentation par batch si data.augmentation_mode vaut 'batch', sinon None
+    (augmentations par image dans les workers).
+    """
+    if data_config.get('augmentation_mode', 'per_image') != 'batch':
+        return None
+    return BatchAugmentation()
@@ -2,11 +2,15 @@
 Dataset PyTorch pour les images de plantes.
 """
 
-import pandas as pd
+import numpy as np
+import torch
 from torch.utils.data import Dataset
 from PIL import Image
 from pathlib import Path
 from .preprocessing import get_transforms
+from .image_cache import DecodedImageCache
+from .metadata import load_metadata_arrays
+from .shards import shard_exists, load_shard_index, open_shard_images
 
 
 class PlantDiseaseDataset(Dataset):
@@ -14,25 +18,36 @@ class PlantDiseaseDataset(Dataset):
     Dataset pour les images de maladies végétales.
     """
     
-    def __init__(self, metadata_path, split=None, transform=None, image_size=224, augmentation=False):
+    def __init__(self, metadata_path, split=None, transform=None, image_size=224, augmentation=False,
+                 cache_dir=None):
         """
         Args:
-            metadata_path: Chemin vers le fichier metadata.csv
+            metadata_path: Chemin vers le fichier metadata.csv (le sidecar
+                metadata.npz écrit par prepare_data.py est lu s'il est à jour)
             split: 'train', 'val', 'test', ou None pour tous
-            transform: Transformations personnalisées (optionnel)
+            transform: Transformations personnalisées (optionnel). Avec cache_dir,
+                elles reçoivent un tensor uint8 (3, H, W) au lieu d'une image PIL
             image_size: Taille des images
             augmentation: Si True, utilise des augmentations pour train
+            cache_dir: Si défini, cache des images décodées et redimensionnées
+                (memmap partagé entre les workers du DataLoader)
         """
-        self.metadata = pd.read_csv(metadata_path)
+        # Colonnes NumPy (labels + buffer de chemins), filtrées par split si spécifié
+        self.metadata = load_metadata_arrays(metadata_path, split)
         self.image_size = image_size
         
-        # Filtrer par split si spécifié
-        if split:
-            self.metadata = self.metadata[self.metadata['split'] == split].reset_index(drop=True)
+        # Cache des images décodées (optionnel)
+        self.cache = None
+        if cache_dir:
+            self.cache = DecodedImageCache(cache_dir, self.metadata.paths(), image_size)
         
         # Utiliser les transformations fournies ou créer des default
         if transform is None:
-            self.transform = get_transforms(image_size, augmentation=(augmentation and split == 'train'))
+            self.transform = get_transforms(
+                image_size,
+                augmentation=(augmentation and split == 'train'),
+                tensor_input=self.cache is not None
+            )
         else:
             self.transform = transform
     
@@ -47,13 +62,15 @@ class PlantDiseaseDataset(Dataset):
             image (torch.Tensor): Image transformée
             label (int): ID de la classe
         """
-        row = self.metadata.iloc[idx]
-        image_path = row['path']
-        label = int(row['class_id'])
+        image_path = self.metadata.path(idx)
+        label = int(self.metadata.labels[idx])
         
-        # Charger l'image
+        # Charger l'image (depuis le cache si activé)
         try:
-            image = Image.open(image_path).convert('RGB')
+            if self.cache is not None:
+                image = torch.from_numpy(self.cache.get(idx, image_path)).permute(2, 0, 1)
+            else:
+                image = Image.open(image_path).convert('RGB')
         except Exception as e:
             raise ValueError(f"Erreur lors du chargement de {image_path}: {e}")
         
@@ -65,7 +82,84 @@ class PlantDiseaseDataset(Dataset):
     
     def get_class_names(self):
         """Retourne la liste des noms de classes."""
-        return sorted(self.metadata['label'].unique().tolist())
-
+        class_ids = np.unique(self.metadata.labels)
+        return sorted(self.metadata.class_names[class_ids].tolist())
 
 
+class PackedPlantDiseaseDataset(Dataset):
+    """
+    Dataset lisant un shard pré-décodé (scripts/prepare_data.py --pack).
+    
+    Même interface que PlantDiseaseDataset : les images sont lues via
+    np.memmap, sans ouverture de fichier ni décodage par échantillon.
+    """
+    
+    def __init__(self, processed_dir, split, transform=None, image_size=224, augmentation=False):
+        """
+        Args:
+            processed_dir: Répertoire des shards (data/processed)
+            split: 'train', 'val' ou 'test'
+            transform: Transformations personnalisées (reçoivent un tensor uint8 (3, H, W))
+            image_size: Taille des images attendue
+            augmentation: Si True, utilise des augmentations pour train
+        """
+        self.shard_dir = Path(processed_dir) / split
+        if not shard_exists(self.shard_dir):
+            raise FileNotFoundError(
+                f"Shard non trouvé: {self.shard_dir} (lancer scripts/prepare_data.py --pack)"
+            )
+        
+        index = load_shard_index(self.shard_dir)
+        self.labels = index['labels']
+        self.label_names = index['label_names']
+        self.image_size = int(index['image_size'])
+        if self.image_size != image_size:
+            raise ValueError(
+                f"Shard {self.shard_dir} en {self.image_size}px, {image_size}px attendu "
+                f"(relancer scripts/prepare_data.py --pack)"
+            )
+        
+        # Ouvert paresseusement dans chaque worker (voir __getstate__)
+        self._images = None
+        
+        if transform is None:
+            self.transform = get_transforms(
+                image_size,
+                augmentation=(augmentation and split == 'train'),
+                tensor_input=True
+            )
+        else:
+            self.transform = transform
+    
+    def __getstate__(self):
+        # Ne pas sérialiser le memmap vers les workers
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    def __getitem__(self, idx):
+        """
+        Retourne une image et son label.
+        
+        Returns:
+            image (torch.Tensor): Image transformée
+            label (int): ID de la classe
+        """
+        if self._images is None:
+            self._images = open_shard_images(self.shard_dir, len(self.labels), self.image_size)
+        
+        # Copie du bloc de l'image (le memmap est en lecture seule)
+        image = torch.from_numpy(np.array(self._images[idx])).permute(2, 0, 1)
+        label = int(self.labels[idx])
+        
+        if self.transform:
+            image = self.transform(image)
+        
+        return image, label
+    
+    def get_class_names(self):
+        """Retourne la liste des noms de classes."""
+        return sorted(np.unique(self.label_names).tolist())
@@ -0,0 +1,166 @@
+"""
+Cache disque des images décodées et redimensionnées (np.memmap uint8).
+
+Le décodage JPEG pleine résolution domine le temps d'entraînement sur CPU :
+chaque image est décodée une seule fois, redimensionnée à image_size et
+stockée dans un tableau (N, H, W, 3) mappé en mémoire. Les workers du
+DataLoader ouvrent le même fichier : les pages sont partagées via le page
+cache, sans copie par worker.
+"""
+
+import os
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Version du format des pixels stockés (fait partie de l'identifiant du cache) :
+# 2 = redimensionnement torchvision identique à get_transforms
+CACHE_FORMAT = 2
+
+
+def file_signatures(paths):
+    """
+    (taille, mtime en ns) de chaque fichier, (-1, -1) s'il est absent.
+
+    Returns:
+        np.ndarray: Tableau int64 (N, 2)
+    """
+    signatures = np.full((len(paths), 2), -1, dtype=np.int64)
+    for i, path in enumerate(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signatures[i] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+@lru_cache(maxsize=None)
+def _resize_transform(image_size):
+    from torchvision import transforms
+    return transforms.Resize((image_size, image_size))
+
+
+def load_resized(path, image_size):
+    """
+    Décode une image et la redimensionne à (image_size, image_size).
+
+    Même redimensionnement que get_transforms (transforms.Resize sur l'image
+    PIL pleine résolution, sans mode draft) : les images lues depuis le cache
+    ou les shards sont identiques à celles du chemin sans cache.
+
+    Returns:
+        np.ndarray: Image uint8 (H, W, 3)
+    """
+    with Image.open(path) as image:
+        image = _resize_transform(image_size)(image.convert('RGB'))
+    return np.asarray(image, dtype=np.uint8)
+
+
+class DecodedImageCache:
+    """
+    Tableau memmap (N, H, W, 3) uint8 + drapeaux de remplissage (N,).
+
+    Le cache est rempli à la volée : une image absente est décodée puis
+    écrite par le worker qui la lit en premier. Le fichier est identifié
+    par la liste des chemins et la taille d'image ; si elle change, un
+    nouveau fichier est créé. La signature (taille, mtime) de chaque image
+    est conservée : une image remplacée sous le même chemin (mise à jour
+    incrémentale de prepare_data.py) est décodée à nouveau.
+    """
+
+    def __init__(self, cache_dir, paths, image_size):
+        """
+        Args:
+            cache_dir: Répertoire du cache
+            paths: Liste des chemins d'images (l'index du cache suit cet ordre)
+            image_size: Taille des images stockées
+        """
+        self.image_size = image_size
+        self.num_images = len(paths)
+
+        key = "\n".join([f"format={CACHE_FORMAT}", *map(str, paths)])
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        prefix = cache_dir / f"decoded_{image_size}px_{digest}"
+        self.images_path = prefix.with_suffix('.u8')
+        self.flags_path = prefix.with_suffix('.flags')
+        self.info_path = prefix.with_suffix('.json')
+        self.signatures_path = prefix.with_suffix('.sig')
+
+        self._create_files()
+        self._invalidate_changed(file_signatures(paths))
+
+        # Ouverts paresseusement dans chaque processus (voir __getstate__)
+        self._images = None
+        self._flags = None
+
+    @property
+    def shape(self):
+        return (self.num_images, self.image_size, self.image_size, 3)
+
+    def _create_files(self):
+        """Crée les fichiers du cache s'ils n'existent pas (fichiers creux)."""
+        if not self.signatures_path.exists():
+            # Signatures inconnues : toutes les images seront décodées à nouveau
+            np.memmap(self.signatures_path, dtype=np.int64, mode='w+',
+                      shape=(self.num_images, 2)).flush()
+        if self.images_path.exists() and self.flags_path.exists():
+            return
+        np.memmap(self.images_path, dtype=np.uint8, mode='w+', shape=self.shape).flush()
+        np.memmap(self.flags_path, dtype=np.uint8, mode='w+', shape=(self.num_images,)).flush()
+        with open(self.info_path, 'w') as f:
+            json.dump({'num_images': self.num_images, 'image_size': self.image_size}, f)
+
+    def _invalidate_changed(self, signatures):
+        """Vide les entrées dont le fichier source a changé (processus principal, avant les workers)."""
+        stored = np.memmap(self.signatures_path, dtype=np.int64, mode='r+', shape=(self.num_images, 2))
+        changed = np.any(stored != signatures, axis=1)
+        if changed.any():
+            flags = np.memmap(self.flags_path, dtype=np.uint8, mode='r+', shape=(self.num_images,))
+            flags[changed] = 0
+            flags.flush()
+            stored[changed] = signatures[changed]
+            stored.flush()
+
+    def _open(self):
+        """Ouvre les memmaps dans le processus courant."""
+        if self._images is None:
+            self._images = np.memmap(self.images_path, dtype=np.uint8, mode='r+', shape=self.shape)
+            self._flags = np.memmap(self.flags_path, dtype=np.uint8, mode='r+',
+                                    shape=(self.num_images,))
+
+    def __getstate__(self):
+        # Ne pas sérialiser les memmaps vers les workers (copie du tableau)
+        state = self.__dict__.copy()
+        state['_images'] = None
+        state['_flags'] = None
+        return state
+
+    def get(self, idx, path):
+        """
+        Retourne l'image idx depuis le cache, en la décodant si nécessaire.
+
+        Args:
+            idx: Index de l'image
+            path: Chemin de l'image (utilisé si elle n'est pas encore en cache)
+
+        Returns:
+            np.ndarray: Vue uint8 (H, W, 3) sur le memmap
+        """
+        self._open()
+        if not self._flags[idx]:
+            self._images[idx] = load_resized(path, self.image_size)
+            # Le drapeau est écrit après les pixels
+            self._flags[idx] = 1
+        return self._images[idx]
+
+    def filled(self):
+        """Nombre d'images déjà en cache."""
+        self._open()
+        return int(np.count_nonzero(self._flags))
@@ -0,0 +1,146 @@
+"""
+Métadonnées du dataset en colonnes NumPy (sidecar metadata.npz).
+
+Le CSV est lu une fois par scripts/prepare_data.py puis converti en
+tableaux compacts :
+- labels : class_id (int64)
+- splits : code du split (uint8, index dans split_names)
+- path_buffer / path_offsets : chemins UTF-8 concaténés dans un seul buffer
+
+Un dataset ne contient ainsi que quelques tableaux contigus : l'accès à un
+échantillon est un simple indexage et la sérialisation vers les workers du
+DataLoader copie quelques buffers au lieu d'un DataFrame d'objets Python.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+SPLIT_NAMES = ('train', 'val', 'test')
+
+
+def sidecar_path(metadata_path):
+    """Chemin du sidecar NPZ associé à metadata.csv."""
+    return Path(metadata_path).with_suffix('.npz')
+
+
+class MetadataArrays:
+    """Colonnes path / class_id / split d'un metadata.csv."""
+
+    def __init__(self, labels, splits, path_buffer, path_offsets, class_names):
+        """
+        Args:
+            labels: class_id de chaque image (int64)
+            splits: Code du split de chaque image (uint8, index dans SPLIT_NAMES)
+            path_buffer: Chemins UTF-8 concaténés (uint8)
+            path_offsets: Début de chaque chemin dans path_buffer (N + 1 valeurs)
+            class_names: Nom de chaque classe, indexé par class_id
+        """
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.splits = np.asarray(splits, dtype=np.uint8)
+        self.path_buffer = np.asarray(path_buffer, dtype=np.uint8)
+        self.path_offsets = np.asarray(path_offsets, dtype=np.int64)
+        self.class_names = np.asarray(class_names, dtype=str)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Construit les colonnes depuis le DataFrame de metadata.csv."""
+        encoded = [path.encode('utf-8') for path in df['path']]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(path) for path in encoded], out=offsets[1:])
+        buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        labels = df['class_id'].to_numpy(dtype=np.int64)
+        num_classes = int(labels.max()) + 1 if len(labels) else 0
+        class_names = [f"class_{i}" for i in range(num_classes)]
+        for class_id, label in zip(labels, df['label']):
+            class_names[class_id] = label
+
+        if 'split' in df:
+            split_codes = {name: code for code, name in enumerate(SPLIT_NAMES)}
+            splits = df['split'].map(split_codes).to_numpy(dtype=np.uint8)
+        else:
+            splits = np.zeros(len(labels), dtype=np.uint8)
+        return cls(labels, splits, buffer, offsets, class_names)
+
+    @classmethod
+    def load(cls, path):
+        """Charge les colonnes depuis un sidecar NPZ."""
+        with np.load(path) as data:
+            return cls(data['labels'], data['splits'], data['path_buffer'],
+                       data['path_offsets'], data['class_names'])
+
+    def save(self, path):
+        """Écrit les colonnes dans un sidecar NPZ (fichier temporaire puis renommage)."""
+        path = Path(path)
+        tmp_path = path.with_suffix('.tmp.npz')
+        np.savez(
+            tmp_path,
+            labels=self.labels,
+            splits=self.splits,
+            path_buffer=self.path_buffer,
+            path_offsets=self.path_offsets,
+            class_names=self.class_names
+        )
+        os.replace(tmp_path, path)
+
+    def select(self, split):
+        """Retourne les colonnes restreintes à un split."""
+        indices = np.flatnonzero(self.splits == SPLIT_NAMES.index(split))
+        starts = self.path_offsets[indices]
+        ends = self.path_offsets[indices + 1]
+        lengths = ends - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if len(indices):
+            positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+            buffer = self.path_buffer[positions]
+        else:
+            buffer = np.zeros(0, dtype=np.uint8)
+        return MetadataArrays(self.labels[indices], self.splits[indices], buffer, offsets,
+                              self.class_names)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def path(self, idx):
+        """Chemin de l'image idx."""
+        start, end = self.path_offsets[idx], self.path_offsets[idx + 1]
+        return self.path_buffer[start:end].tobytes().decode('utf-8')
+
+    def paths(self):
+        """Liste de tous les chemins."""
+        return [self.path(i) for i in range(len(self))]
+
+
+def write_metadata_arrays(df, metadata_path):
+    """Écrit le sidecar NPZ de metadata.csv (appelé par scripts/prepare_data.py)."""
+    path = sidecar_path(metadata_path)
+    MetadataArrays.from_dataframe(df).save(path)
+    return path
+
+
+def load_metadata_arrays(metadata_path, split=None):
+    """
+    Charge les métadonnées en colonnes.
+
+    Le sidecar NPZ est utilisé s'il est au moins aussi récent que
+    metadata.csv ; sinon le CSV est lu et converti.
+
+    Args:
+        metadata_path: Chemin vers metadata.csv
+        split: 'train', 'val', 'test', ou None pour tous
+
+    Returns:
+        MetadataArrays: Colonnes du split demandé
+    """
+    metadata_path = Path(metadata_path)
+    npz_path = sidecar_path(metadata_path)
+    if npz_path.exists() and (not metadata_path.exists()
+                              or npz_path.stat().st_mtime >= metadata_path.stat().st_mtime):
+        arrays = MetadataArrays.load(npz_path)
+    else:
+        import pandas as pd
+        arrays = MetadataArrays.from_dataframe(pd.read_csv(metadata_path))
+    return arrays.select(split) if split else arrays
@@ -1,24 +1,43 @@
 """
 Fonctions de preprocessing pour les images.
+
+torchvision est importé dans les fonctions qui l'utilisent : son import
+charge aussi torchvision.models et torchvision.ops (plus d'une seconde),
+inutiles pour PreprocessingEngine (API d'inférence).
 """
 
+import threading
+from functools import lru_cache
+from io import BytesIO
+
 import torch
-from torchvision import transforms
 from PIL import Image
 import numpy as np
 
 
-def get_transforms(image_size=224, augmentation=False):
+# Statistiques ImageNet utilisées pour la normalisation
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+
+def get_transforms(image_size=224, augmentation=False, tensor_input=False):
     """
     Retourne les transformations pour preprocessing.
     
     Args:
         image_size: Taille cible des images
         augmentation: Si True, ajoute des augmentations pour l'entraînement
+        tensor_input: Si True, les images sont des tensors uint8 (3, H, W) déjà
+            redimensionnés (cache d'images décodées) au lieu d'images PIL
     
     Returns:
         transforms.Compose: Composition de transformations
     """
+    from torchvision import transforms
+    
+    if tensor_input:
+        return get_tensor_transforms(augmentation)
+    
     if augmentation:
         # Augmentations pour l'entraînement
         transform = transforms.Compose([
@@ -28,21 +47,167 @@ def get_transforms(image_size=224, augmentation=False):
             transforms.RandomVerticalFlip(),
             transforms.ColorJitter(brightness=0.2, contrast=0.2),
             transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                               std=[0.229, 0.224, 0.225])
+            transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
         ])
     else:
         # Transformations pour validation/test/inference
         transform = transforms.Compose([
             transforms.Resize((image_size, image_size)),
             transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                               std=[0.229, 0.224, 0.225])
+            transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
         ])
     
     return transform
 
 
+def get_tensor_transforms(augmentation=False):
+    """
+    Transformations pour des tensors uint8 (3, H, W) déjà redimensionnés.
+    
+    Mêmes augmentations que get_transforms, appliquées au tensor au lieu
+    de l'image PIL.
+    """
+    from torchvision import transforms
+    
+    if augmentation:
+        return transforms.Compose([
+            transforms.RandomRotation(30),
+            transforms.RandomHorizontalFlip(),
+            transforms.RandomVerticalFlip(),
+            transforms.ColorJitter(brightness=0.2, contrast=0.2),
+            transforms.ConvertImageDtype(torch.float32),
+            transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+        ])
+    return transforms.Compose([
+        transforms.ConvertImageDtype(torch.float32),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+
+def get_uint8_transforms(image_size=224, tensor_input=False):
+    """
+    Transformations produisant des tensors uint8 (3, H, W) non normalisés.
+    
+    Utilisées avec l'augmentation par batch (src/data/augmentation.py) :
+    les workers ne font que décoder et redimensionner.
+    """
+    from torchvision import transforms
+    
+    if tensor_input:
+        # Déjà uint8 et redimensionné (cache ou shards)
+        return transforms.Compose([])
+    return transforms.Compose([
+        transforms.Resize((image_size, image_size)),
+        transforms.PILToTensor()
+    ])
+
+
+class PreprocessingEngine:
+    """
+    Pipeline de preprocessing pour l'inférence, construit une seule fois.
+    
+    Équivalent à get_transforms(augmentation=False) mais :
+    - le JPEG est réduit pendant le décodage (mode draft de PIL),
+    - l'image est redimensionnée directement à la taille cible,
+    - ToTensor + Normalize sont fusionnés en une seule opération vectorisée
+      qui écrit dans un buffer réutilisé (un buffer par thread).
+    """
+    
+    def __init__(self, image_size=224):
+        """
+        Args:
+            image_size: Taille cible des images
+        """
+        self.image_size = image_size
+        # (x / 255 - mean) / std == x * scale - shift
+        std = torch.tensor(IMAGENET_STD, dtype=torch.float32).view(3, 1, 1)
+        mean = torch.tensor(IMAGENET_MEAN, dtype=torch.float32).view(3, 1, 1)
+        self._scale = 1.0 / (255.0 * std)
+        self._shift = mean / std
+        self._local = threading.local()
+    
+    def decode(self, source):
+        """
+        Décode une image en RGB (JPEG réduit pendant le décodage).
+        
+        Args:
+            source: Bytes de l'image ou chemin vers l'image
+        
+        Returns:
+            PIL.Image: Image RGB, pas encore à la taille cible
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(source)
+        image = Image.open(source)
+        
+        # Réduction pendant le décodage JPEG (sans effet pour les autres formats)
+        image.draft('RGB', (self.image_size, self.image_size))
+        return image.convert('RGB')
+    
+    def resize(self, image):
+        """Redimensionne une image décodée à (image_size, image_size)."""
+        size = (self.image_size, self.image_size)
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR)
+        return image
+    
+    def load(self, source):
+        """
+        Décode et redimensionne une image.
+        
+        Args:
+            source: Bytes de l'image ou chemin vers l'image
+        
+        Returns:
+            PIL.Image: Image RGB de taille (image_size, image_size)
+        """
+        return self.resize(self.decode(source))
+    
+    def _buffer(self, batch_size):
+        """Buffer de sortie réutilisable, propre au thread courant."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = torch.empty(batch_size, 3, self.image_size, self.image_size)
+            self._local.buffer = buffer
+        return buffer[:batch_size]
+    
+    def normalize(self, images, out=None):
+        """
+        Convertit et normalise des images en un batch de tensors.
+        
+        Args:
+            images: Liste d'images PIL de taille (image_size, image_size)
+            out: Tensor de sortie (N, 3, H, W) optionnel. Par défaut, le buffer
+                du thread courant est utilisé : le résultat n'est valide que
+                jusqu'au prochain appel depuis le même thread.
+        
+        Returns:
+            torch.Tensor: Batch normalisé (N, 3, H, W)
+        """
+        if out is None:
+            out = self._buffer(len(images))
+        for i, image in enumerate(images):
+            pixels = torch.from_numpy(np.array(image, dtype=np.uint8)).permute(2, 0, 1)
+            torch.mul(pixels, self._scale, out=out[i])
+            out[i].sub_(self._shift)
+        return out
+    
+    def __call__(self, source, out=None):
+        """
+        Preprocess une image (bytes ou chemin).
+        
+        Returns:
+            torch.Tensor: Image préprocessée (1, 3, H, W)
+        """
+        return self.normalize([self.load(source)], out=out)
+
+
+@lru_cache(maxsize=None)
+def get_preprocessing_engine(image_size=224):
+    """Retourne le PreprocessingEngine partagé pour une taille d'image."""
+    return PreprocessingEngine(image_size)
+
+
 def preprocess_image(image_path, image_size=224):
     """
     Preprocess une image pour l'inférence.
@@ -54,18 +219,7 @@ def preprocess_image(image_path, image_size=224):
     Returns:
         torch.Tensor: Image préprocessée (1, 3, H, W)
     """
-    transform = get_transforms(image_size, augmentation=False)
-    
-    # Charger l'image
-    image = Image.open(image_path).convert('RGB')
-    
-    # Appliquer les transformations
-    tensor = transform(image)
-    
-    # Ajouter une dimension batch
-    tensor = tensor.unsqueeze(0)
-    
-    return tensor
+    return get_preprocessing_engine(image_size)(image_path).clone()
 
 
 def preprocess_image_from_bytes(image_bytes, image_size=224):
@@ -79,20 +233,4 @@ def preprocess_image_from_bytes(image_bytes, image_size=224):
     Returns:
         torch.Tensor: Image préprocessée (1, 3, H, W)
     """
-    from io import BytesIO
-    
-    transform = get_transforms(image_size, augmentation=False)
-    
-    # Charger l'image depuis bytes
-    image = Image.open(BytesIO(image_bytes)).convert('RGB')
-    
-    # Appliquer les transformations
-    tensor = transform(image)
-    
-    # Ajouter une dimension batch
-    tensor = tensor.unsqueeze(0)
-    
-    return tensor
-
-
-
+    return get_preprocessing_engine(image_size)(image_bytes).clone()
@@ -0,0 +1,104 @@
+"""
+Shards d'images pré-décodées par split (data/processed/{train,val,test}).
+
+Format d'un shard :
+- images.u8 : tableau uint8 (N, H, W, 3) brut, taille fixe par image
+- index.npz : labels (class_id), offsets (octets dans images.u8), noms de
+  classes et chemins sources
+
+La lecture passe par np.memmap : un accès aléatoire ne coûte ni ouverture
+de fichier ni décodage.
+"""
+
+import os
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .image_cache import load_resized
+
+
+IMAGES_FILE = 'images.u8'
+INDEX_FILE = 'index.npz'
+
+
+def _pack_chunk(images_path, shape, start, paths, image_size):
+    """Décode et écrit un bloc d'images contigu dans le shard (processus worker)."""
+    images = np.memmap(images_path, dtype=np.uint8, mode='r+', shape=shape)
+    for i, path in enumerate(paths):
+        images[start + i] = load_resized(path, image_size)
+    images.flush()
+    return len(paths)
+
+
+def write_shard(paths, labels, label_names, output_dir, image_size=224, num_workers=None,
+                chunk_size=256):
+    """
+    Écrit un shard à partir d'une liste d'images.
+
+    Le décodage est réparti sur plusieurs processus ; chaque worker écrit
+    directement sa plage d'images dans le memmap. Les fichiers sont écrits
+    sous un nom temporaire puis renommés.
+
+    Args:
+        paths: Chemins des images
+        labels: class_id de chaque image
+        label_names: Nom de classe de chaque image
+        output_dir: Répertoire du shard (ex: data/processed/train)
+        image_size: Taille des images stockées
+        num_workers: Nombre de processus (défaut: nombre de cœurs)
+        chunk_size: Nombre d'images par tâche
+
+    Returns:
+        Path: Répertoire du shard
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = [str(p) for p in paths]
+    shape = (len(paths), image_size, image_size, 3)
+
+    tmp_images = output_dir / (IMAGES_FILE + '.tmp')
+    np.memmap(tmp_images, dtype=np.uint8, mode='w+', shape=shape).flush()
+
+    num_workers = num_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        futures = [
+            pool.submit(_pack_chunk, str(tmp_images), shape, start,
+                        paths[start:start + chunk_size], image_size)
+            for start in range(0, len(paths), chunk_size)
+        ]
+        for future in futures:
+            future.result()
+
+    image_bytes = image_size * image_size * 3
+    tmp_index = output_dir / (INDEX_FILE + '.tmp.npz')
+    np.savez(
+        tmp_index,
+        labels=np.asarray(labels, dtype=np.int64),
+        offsets=np.arange(len(paths), dtype=np.int64) * image_bytes,
+        label_names=np.asarray(label_names, dtype=str),
+        paths=np.asarray(paths, dtype=str),
+        image_size=np.int64(image_size)
+    )
+    os.replace(tmp_images, output_dir / IMAGES_FILE)
+    os.replace(tmp_index, output_dir / INDEX_FILE)
+    return output_dir
+
+
+def shard_exists(shard_dir):
+    """Indique si un shard complet existe dans le répertoire."""
+    shard_dir = Path(shard_dir)
+    return (shard_dir / IMAGES_FILE).exists() and (shard_dir / INDEX_FILE).exists()
+
+
+def load_shard_index(shard_dir):
+    """Charge l'index d'un shard (dict de tableaux NumPy)."""
+    with np.load(Path(shard_dir) / INDEX_FILE) as index:
+        return {key: index[key] for key in index.files}
+
+
+def open_shard_images(shard_dir, num_images, image_size):
+    """Ouvre les images d'un shard en lecture seule (np.memmap)."""
+    return np.memmap(Path(shard_dir) / IMAGES_FILE, dtype=np.uint8, mode='r',
+                     shape=(num_images, image_size, image_size, 3))
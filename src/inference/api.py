@@ -1,25 +1,40 @@
 """
 API FastAPI pour l'inférence de détection de maladies végétales.
+
+L'import du module reste léger (ni torch, ni PIL, ni lecture de la
+configuration) : la configuration (variable PLANT_API_CONFIG, défaut
+configs/config.yaml) et le modèle sont chargés au démarrage de l'API.
+Budget vérifié par scripts/benchmark_imports.py.
 """
 
+import time
+
+# Début du démarrage (durée des imports, voir startup_stage_duration_seconds)
+_startup_start = time.perf_counter()
+
+import os
 import sys
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import signal
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header
 from fastapi.responses import JSONResponse, Response
-import uvicorn
 from pathlib import Path
-import yaml
-import time
-from typing import Optional
+from typing import List, Optional
 
-from .predictor import PlantDiseasePredictor
+from .batching import MicroBatcher
+from .executor import InferenceQueueFull, predict_image, predict_images
+from .model_manager import ModelManager
+from .archives import is_archive, extract_images
+from .cache import PredictionCache
+from . import metrics as prometheus_metrics
 from .metrics import (
     prediction_requests_total,
     prediction_errors_total,
-    prediction_duration_seconds,
     prediction_confidence,
     model_loaded,
-    model_classes_total,
-    generate_latest,
+    startup_stage_duration_seconds,
+    configure_latency_metrics,
+    observe_stage_durations,
+    latest_metrics,
     CONTENT_TYPE_LATEST
 )
 
@@ -31,13 +46,18 @@ if sys.platform == 'win32':
 # Charger la configuration
 def load_config(config_path="configs/config.yaml"):
     """Charge la configuration."""
+    import yaml
     with open(config_path, 'r') as f:
         config = yaml.safe_load(f)
     return config
 
 
-config = load_config()
-inference_config = config['inference']
+_imports_seconds = time.perf_counter() - _startup_start
+
+# Configuration chargée au démarrage (pas à l'import du module)
+CONFIG_PATH = os.environ.get('PLANT_API_CONFIG', 'configs/config.yaml')
+config = None
+inference_config = {}
 
 # Créer l'application FastAPI
 app = FastAPI(
@@ -46,31 +66,117 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Charger le modèle au démarrage
+# Charger le modèle au démarrage (predictor et executor remplacés au rechargement)
+model_manager = None
 predictor = None
+executor = None
+batcher = None
+cache = None
+# Predictor chargé avant le fork par src/inference/serve.py (poids partagés entre workers)
+preloaded_predictor = None
+# Processus parent de src/inference/serve.py : il recharge le modèle pour tous les workers
+supervisor_pid = None
+
+
+def on_model_swap(new_predictor, new_executor):
+    """Nouveau modèle servi : les requêtes suivantes utilisent son pool."""
+    global predictor, executor
+    predictor = new_predictor
+    executor = new_executor
+    if batcher is not None:
+        batcher.executor = new_executor
+    # Invalider les résultats du modèle précédent
+    if cache is not None:
+        cache.clear()
 
 
 @app.on_event("startup")
 async def load_model():
-    """Charge le modèle au démarrage de l'API."""
-    global predictor
-    model_path = inference_config['model_path']
-    device = inference_config['device']
+    """Charge la configuration et le modèle au démarrage de l'API."""
+    global config, inference_config, model_manager, batcher, cache
     
-    try:
-        predictor = PlantDiseasePredictor(
-            model_path=model_path,
-            config_path="configs/config.yaml",
-            device=device
+    config_start = time.perf_counter()
+    config = load_config(CONFIG_PATH)
+    inference_config = config['inference']
+    config_seconds = time.perf_counter() - config_start
+    
+    # Histogrammes de latence (buckets configurables, SLO < 50 ms)
+    latency_config = inference_config.get('latency_metrics', {})
+    configure_latency_metrics(
+        request_buckets=latency_config.get('request_buckets'),
+        stage_buckets=latency_config.get('stage_buckets')
+    )
+    
+    # Cache des résultats (clé = hash image + top_k + version du modèle)
+    cache_config = inference_config.get('cache', {})
+    if cache_config.get('enabled', False) and cache is None:
+        cache = PredictionCache(
+            max_entries=cache_config.get('max_entries', 10000),
+            max_bytes=cache_config.get('max_bytes', 16 * 1024 * 1024),
+            ttl_seconds=cache_config.get('ttl_seconds', 600)
         )
+    
+    # Modèle et pool d'inférence borné (hors de l'event loop)
+    executor_config = inference_config.get('executor', {})
+    model_manager = ModelManager(
+        inference_config['model_path'],
+        config_path=CONFIG_PATH,
+        device=inference_config['device'],
+        executor_config=executor_config,
+        on_swap=on_model_swap,
+        predictor=preloaded_predictor
+    )
+    try:
+        await model_manager.load()
         print(f"[OK] Modele charge avec succes")
-        # Mettre à jour les métriques
-        model_loaded.set(1)
-        model_classes_total.set(predictor.num_classes)
     except Exception as e:
         print(f"[ERREUR] Erreur lors du chargement du modele: {e}")
         model_loaded.set(0)
         raise
+    
+    # Durées du démarrage à froid par étape (suivi des régressions)
+    startup_timings = {
+        'imports': _imports_seconds,
+        'config': config_seconds,
+        **model_manager.load_timings,
+        'total': time.perf_counter() - _startup_start
+    }
+    for stage, seconds in startup_timings.items():
+        startup_stage_duration_seconds.labels(stage=stage).set(seconds)
+    print("[INFO] Demarrage: " + ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in startup_timings.items()))
+    
+    if cache is not None:
+        print(f"[OK] Cache des predictions active (version modele {predictor.model_version})")
+    print(f"[OK] Executor d'inference: {executor.kind} "
+          f"({executor.max_workers} workers, file max {executor.max_queue_size})")
+    
+    # Micro-batching des requêtes concurrentes
+    batching_config = inference_config.get('batching', {})
+    if batching_config.get('enabled', False):
+        batcher = MicroBatcher(
+            executor,
+            max_batch_size=batching_config.get('max_batch_size', 8),
+            max_wait_ms=batching_config.get('max_wait_ms', 5)
+        )
+        await batcher.start()
+        print(f"[OK] Micro-batching active (max {batcher.max_batch_size} images, "
+              f"{batching_config.get('max_wait_ms', 5)} ms)")
+    
+    # Rechargement à chaud quand model_path est remplacé (surveillé par le parent si multi-workers)
+    reload_config = inference_config.get('reload', {})
+    if reload_config.get('watch', False) and supervisor_pid is None:
+        interval = reload_config.get('poll_interval_seconds', 10)
+        model_manager.start_watching(interval)
+        print(f"[OK] Surveillance de {model_manager.model_path} (toutes les {interval} s)")
+
+
+@app.on_event("shutdown")
+async def stop_inference():
+    """Arrête le micro-batching et le pool d'inférence à l'arrêt de l'API."""
+    if batcher is not None:
+        await batcher.stop()
+    if model_manager is not None:
+        await model_manager.stop()
 
 
 @app.get("/")
@@ -81,6 +187,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "predict": "/predict",
+            "predict_batch": "/predict/batch",
             "health": "/health",
             "docs": "/docs"
         }
@@ -89,7 +196,7 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
+    """Health check endpoint (healthy une fois le modèle chargé et chauffé)."""
     is_loaded = predictor is not None
     
     status = "healthy" if is_loaded else "unhealthy"
@@ -103,12 +210,19 @@ async def health():
     if is_loaded:
         response.update({
             "num_classes": predictor.num_classes,
-            "device": str(predictor.device)
+            "device": str(predictor.device),
+            "model_version": predictor.model_version
         })
     
     return JSONResponse(content=response, status_code=status_code)
 
 
+def server_timing_header(timings, total):
+    """En-tête Server-Timing : durée de chaque étape en ms (ex: decode;dur=2.31)."""
+    stages = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    return ", ".join(stages + [f"total;dur={total * 1000:.2f}"])
+
+
 @app.post("/predict")
 async def predict(
     file: UploadFile = File(..., description="Image de la feuille à analyser"),
@@ -139,7 +253,9 @@ async def predict(
     
     try:
         # Lire l'image
+        request_start = time.perf_counter()
         image_bytes = await file.read()
+        timings = {'read': time.perf_counter() - request_start}
         
         # Vérifier la taille (max 10MB)
         if len(image_bytes) > 10 * 1024 * 1024:
@@ -148,28 +264,175 @@ async def predict(
             raise HTTPException(status_code=400, detail="Image trop grande (max 10MB)")
         
         # Prédiction avec métriques
-        start_time = time.time()
-        with prediction_duration_seconds.time():
-            result = predictor.predict(image_bytes, top_k=top_k or 3)
+        start_time = time.perf_counter()
+        cache_key = None
+        result = None
+        if cache is not None:
+            cache_key = PredictionCache.make_key(image_bytes, top_k or 3, predictor.model_version)
+            result = cache.get(cache_key)
+        cache_hit = result is not None
+        
+        if result is None:
+            with prometheus_metrics.prediction_duration_seconds.time():
+                if batcher is not None:
+                    result, stage_timings = await batcher.submit(image_bytes, top_k=top_k or 3)
+                else:
+                    result, stage_timings = await executor.submit(predict_image, image_bytes, top_k or 3)
+            timings.update(stage_timings)
+            if cache_key is not None:
+                cache.put(cache_key, result)
         
         # Enregistrer les métriques
         prediction_requests_total.labels(status='success').inc()
         prediction_confidence.observe(result['confidence'])
         
         # Calculer le temps de traitement
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         result['processing_time_ms'] = round(processing_time * 1000, 2)
         
-        return JSONResponse(content=result)
+        headers = None
+        if cache_key is not None:
+            headers = {"X-Cache": "HIT" if cache_hit else "MISS"}
+        serialize_start = time.perf_counter()
+        response = JSONResponse(content=result, headers=headers)
+        timings['serialize'] = time.perf_counter() - serialize_start
+        
+        # Durée de chaque étape (histogrammes et en-tête Server-Timing optionnel) ;
+        # les étapes batch_* sont enregistrées une fois par batch par MicroBatcher
+        observe_stage_durations({
+            stage: seconds for stage, seconds in timings.items() if not stage.startswith('batch_')
+        })
+        if inference_config.get('latency_metrics', {}).get('server_timing', False):
+            response.headers['Server-Timing'] = server_timing_header(
+                timings, time.perf_counter() - request_start
+            )
+        return response
     
     except HTTPException:
         raise
+    except InferenceQueueFull as e:
+        prediction_requests_total.labels(status='error').inc()
+        prediction_errors_total.labels(error_type='queue_full').inc()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service surchargé, réessayez plus tard: {e}",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         prediction_requests_total.labels(status='error').inc()
         prediction_errors_total.labels(error_type='prediction_error').inc()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction: {str(e)}")
 
 
+@app.post("/predict/batch")
+async def predict_batch(
+    files: List[UploadFile] = File(..., description="Images des feuilles, ou une archive tar/zip"),
+    top_k: Optional[int] = 3
+):
+    """
+    Prédit les maladies de plusieurs images en une seule requête.
+    
+    Args:
+        files: Fichiers images (JPEG, PNG) en multipart, ou une archive tar/zip
+        top_k: Nombre de prédictions top à retourner par image (default: 3)
+    
+    Returns:
+        dict: Résultats par image (même format que /predict, avec le nom du fichier)
+    """
+    if predictor is None:
+        prediction_errors_total.labels(error_type='model_not_loaded').inc()
+        raise HTTPException(status_code=503, detail="Modèle non chargé")
+    
+    batch_config = inference_config.get('batch_prediction', {})
+    max_images = batch_config.get('max_images', 256)
+    max_image_size = 10 * 1024 * 1024
+    max_archive_bytes = batch_config.get('max_archive_bytes', 100 * 1024 * 1024)
+    
+    # Lire les images (multipart ou archive)
+    images = []
+    for upload in files:
+        if is_archive(upload.filename, upload.content_type):
+            # Taille vérifiée avant de charger l'archive en mémoire (lecture bornée
+            # si la taille n'est pas connue)
+            size = upload.size
+            if size is None or size <= max_archive_bytes:
+                data = await upload.read(max_archive_bytes + 1)
+                size = len(data)
+            if size > max_archive_bytes:
+                prediction_errors_total.labels(error_type='archive_too_large').inc()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Archive trop grande (max {max_archive_bytes} bytes): {upload.filename}"
+                )
+            try:
+                images.extend(extract_images(
+                    data,
+                    max_images=max_images - len(images),
+                    max_image_size=max_image_size,
+                    # Images déjà compressées : contenu du même ordre que l'archive
+                    max_total_bytes=max_archive_bytes
+                ))
+            except ValueError as e:
+                prediction_errors_total.labels(error_type='invalid_archive').inc()
+                raise HTTPException(status_code=400, detail=str(e))
+        elif upload.content_type and upload.content_type.startswith('image/'):
+            data = await upload.read()
+            if len(data) > max_image_size:
+                prediction_errors_total.labels(error_type='file_too_large').inc()
+                raise HTTPException(status_code=400, detail=f"Image trop grande (max 10MB): {upload.filename}")
+            images.append((upload.filename, data))
+        else:
+            prediction_errors_total.labels(error_type='invalid_file_type').inc()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Type de fichier non supporté: {upload.content_type}. Utilisez des images ou une archive tar/zip"
+            )
+        
+        if len(images) > max_images:
+            raise HTTPException(status_code=400, detail=f"Trop d'images (max {max_images})")
+    
+    if not images:
+        raise HTTPException(status_code=400, detail="Aucune image trouvée dans la requête")
+    
+    try:
+        start_time = time.perf_counter()
+        with prometheus_metrics.prediction_duration_seconds.time():
+            results = await executor.submit(
+                predict_images,
+                [data for _, data in images],
+                top_k or 3
+            )
+        processing_time = time.perf_counter() - start_time
+    except InferenceQueueFull as e:
+        prediction_requests_total.labels(status='error').inc(len(images))
+        prediction_errors_total.labels(error_type='queue_full').inc()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service surchargé, réessayez plus tard: {e}",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        prediction_requests_total.labels(status='error').inc(len(images))
+        prediction_errors_total.labels(error_type='prediction_error').inc()
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction: {str(e)}")
+    
+    # Enregistrer les métriques par image
+    for (filename, _), result in zip(images, results):
+        result['filename'] = filename
+        if 'error' in result:
+            prediction_requests_total.labels(status='error').inc()
+            prediction_errors_total.labels(error_type='prediction_error').inc()
+        else:
+            prediction_requests_total.labels(status='success').inc()
+            prediction_confidence.observe(result['confidence'])
+    
+    return JSONResponse(content={
+        'results': results,
+        'count': len(results),
+        'processing_time_ms': round(processing_time * 1000, 2)
+    })
+
+
 @app.get("/model/info")
 async def model_info():
     """Retourne des informations sur le modèle."""
@@ -180,17 +443,74 @@ async def model_info():
         "num_classes": predictor.num_classes,
         "class_names": predictor.class_names[:10],  # Premiers 10 pour éviter réponse trop longue
         "device": str(predictor.device),
-        "model_type": "ResNet18"
+        "model_type": "ResNet18",
+        "backend": predictor.backend.name,
+        "version": predictor.model_version,
+        "model_path": model_manager.model_path,
+        "loaded_at": model_manager.loaded_at,
+        "worker_pid": os.getpid()
+    }
+
+
+@app.post("/admin/reload")
+async def reload_model(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Recharge le modèle depuis model_path sans redémarrer l'API.
+    
+    Le nouveau modèle est chargé et chauffé en arrière-plan ; le modèle
+    courant continue de servir jusqu'à l'échange. Désactivé par défaut
+    (inference.reload.admin_endpoint) ; une fois activé, l'en-tête
+    X-Admin-Token doit fournir la variable MODEL_ADMIN_TOKEN (403 si elle
+    n'est pas définie).
+    
+    Avec plusieurs workers (src/inference/serve.py), la demande est
+    transmise au processus parent qui recharge le modèle puis remplace tous
+    les workers : la réponse (202) n'attend pas la fin du rechargement,
+    suivre la version dans /model/info.
+    
+    Args:
+        force: Recharger même si le fichier n'a pas changé
+    
+    Returns:
+        dict: Version servie et indication de rechargement
+    """
+    if not inference_config.get('reload', {}).get('admin_endpoint', False):
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = os.environ.get('MODEL_ADMIN_TOKEN')
+    if not token:
+        raise HTTPException(status_code=403, detail="MODEL_ADMIN_TOKEN non défini")
+    if x_admin_token != token:
+        raise HTTPException(status_code=403, detail="Token d'administration invalide")
+    if model_manager is None:
+        raise HTTPException(status_code=503, detail="Modèle non chargé")
+    
+    previous = model_manager.version
+    if supervisor_pid is not None:
+        os.kill(supervisor_pid, signal.SIGUSR1 if force else signal.SIGHUP)
+        return JSONResponse(status_code=202, content={
+            "status": "reload_requested",
+            "version": previous
+        })
+    try:
+        reloaded = await model_manager.load(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rechargement impossible (modèle {previous} conservé): {e}")
+    
+    return {
+        "reloaded": reloaded,
+        "previous_version": previous,
+        "version": model_manager.version
     }
 
 
 @app.get("/metrics")
 async def metrics():
     """Endpoint Prometheus pour les métriques."""
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=latest_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(
         "src.inference.api:app",
         host="0.0.0.0",
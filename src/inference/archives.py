@@ -0,0 +1,102 @@
+"""
+Extraction des images depuis une archive tar/zip (endpoint /predict/batch).
+"""
+
+import io
+import tarfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+ARCHIVE_CONTENT_TYPES = {
+    'application/zip',
+    'application/x-zip-compressed',
+    'application/x-tar',
+    'application/gzip',
+    'application/x-gzip',
+    'application/x-gtar',
+}
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+
+def is_archive(filename, content_type):
+    """Indique si un fichier uploadé est une archive tar/zip."""
+    if content_type in ARCHIVE_CONTENT_TYPES:
+        return True
+    return (filename or '').lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_image_name(name):
+    """Filtre les membres d'archive qui ressemblent à des images."""
+    path = PurePosixPath(name)
+    if any(part.startswith('.') or part == '__MACOSX' for part in path.parts):
+        return False
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+# Erreurs levées par une archive tronquée ou corrompue
+ARCHIVE_ERRORS = (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, OSError)
+
+
+def extract_images(archive_bytes, max_images=None, max_image_size=None, max_total_bytes=None):
+    """
+    Extrait les images d'une archive zip ou tar (éventuellement gzip).
+
+    Les tailles déclarées dans l'archive ne sont pas prises pour acquises :
+    chaque membre est lu au plus jusqu'à max_image_size + 1 octets et le
+    total réellement décompressé est borné par max_total_bytes.
+
+    Args:
+        archive_bytes: Contenu de l'archive
+        max_images: Nombre maximum d'images acceptées (None = illimité)
+        max_image_size: Taille maximale d'une image en bytes (None = illimité)
+        max_total_bytes: Taille décompressée maximale de toutes les images (None = illimité)
+
+    Returns:
+        list: Liste de tuples (nom, bytes), dans l'ordre de l'archive
+
+    Raises:
+        ValueError: Archive illisible ou limites dépassées
+    """
+    members = []
+    total_bytes = 0
+
+    def add(name, size, open_member):
+        nonlocal total_bytes
+        if max_image_size is not None and size > max_image_size:
+            raise ValueError(f"Image trop grande dans l'archive: {name}")
+        with open_member() as f:
+            data = f.read(-1 if max_image_size is None else max_image_size + 1)
+        if max_image_size is not None and len(data) > max_image_size:
+            raise ValueError(f"Image trop grande dans l'archive: {name}")
+        total_bytes += len(data)
+        if max_total_bytes is not None and total_bytes > max_total_bytes:
+            raise ValueError(f"Contenu de l'archive trop volumineux (max {max_total_bytes} bytes)")
+        members.append((name, data))
+        if max_images is not None and len(members) > max_images:
+            raise ValueError(f"Trop d'images dans l'archive (max {max_images})")
+
+    buffer = io.BytesIO(archive_bytes)
+    try:
+        if zipfile.is_zipfile(buffer):
+            with zipfile.ZipFile(buffer) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and _is_image_name(info.filename):
+                        add(info.filename, info.file_size,
+                            lambda info=info: archive.open(info))
+            return members
+
+        buffer.seek(0)
+        with tarfile.open(fileobj=buffer, mode='r:*') as archive:
+            for info in archive:
+                if info.isfile() and _is_image_name(info.name):
+                    add(info.name, info.size,
+                        lambda info=info: archive.extractfile(info))
+    except ARCHIVE_ERRORS as e:
+        raise ValueError(f"Archive illisible (zip ou tar attendu): {e}")
+
+    return members
@@ -0,0 +1,155 @@
+"""
+Backends d'inférence interchangeables (eager PyTorch, TorchScript, ONNX Runtime).
+
+Chaque backend prend un batch (N, 3, H, W) et retourne les logits (N, num_classes)
+sous forme de torch.Tensor : le predictor construit le même résultat quel que
+soit le backend choisi via inference.backend dans configs/config.yaml.
+"""
+
+from pathlib import Path
+
+import torch
+
+from src.models.export import is_torchscript_file, load_torchscript
+
+
+class InferenceBackend:
+    """Interface commune des backends d'inférence."""
+
+    name = None
+
+    def __init__(self, model_path, device='cpu', num_classes=None):
+        """
+        Args:
+            model_path: Fichier du modèle
+            device: Device à utiliser ('cpu' ou 'cuda')
+            num_classes: Nombre de classes par défaut (si absent du fichier)
+        """
+        self.model_path = Path(model_path)
+        self.device = torch.device(device)
+        self.num_classes = num_classes
+        self.model = None
+
+    def __call__(self, batch):
+        """Retourne les logits (N, num_classes) pour un batch (N, 3, H, W)."""
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager : ResNet18 reconstruit depuis un checkpoint d'entraînement."""
+
+    name = 'torch'
+
+    def __init__(self, model_path, device='cpu', num_classes=None):
+        super().__init__(model_path, device, num_classes)
+        # Import différé : torchvision (models, ops) n'est chargé que pour ce backend
+        from src.models.resnet import create_resnet18
+        
+        checkpoint = torch.load(self.model_path, map_location=self.device)
+
+        # Récupérer le nombre de classes depuis le checkpoint ou config
+        self.num_classes = checkpoint.get('num_classes', num_classes)
+
+        # Créer le modèle (pas besoin de pretrained pour l'inférence)
+        self.model = create_resnet18(num_classes=self.num_classes, pretrained=False)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.model.to(self.device)
+        self.model.eval()
+
+    def __call__(self, batch):
+        with torch.no_grad():
+            return self.model(batch.to(self.device))
+
+
+class TorchScriptBackend(InferenceBackend):
+    """TorchScript figé (scripts/export_model.py, ou INT8 via scripts/quantize_model.py)."""
+
+    name = 'torchscript'
+
+    def __init__(self, model_path, device='cpu', num_classes=None):
+        super().__init__(model_path, device, num_classes)
+        self.model, metadata = load_torchscript(self.model_path, device=self.device)
+        self.num_classes = metadata.get('num_classes', num_classes)
+
+        # Modèle INT8 (scripts/quantize_model.py) : même moteur qu'à la calibration
+        engine = metadata.get('quantization_backend')
+        if engine and engine in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = engine
+
+    def __call__(self, batch):
+        with torch.no_grad():
+            return self.model(batch.to(self.device))
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime (fichier .onnx exporté par scripts/export_model.py --format onnx)."""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, device='cpu', num_classes=None):
+        super().__init__(model_path, device, num_classes)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError(
+                "Le backend 'onnx' nécessite onnxruntime: pip install onnxruntime"
+            )
+
+        providers = ['CPUExecutionProvider']
+        if self.device.type == 'cuda':
+            providers.insert(0, 'CUDAExecutionProvider')
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        intra_op_threads = torch.get_num_threads()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.model = ort.InferenceSession(str(self.model_path), options, providers=providers)
+        self._input_name = self.model.get_inputs()[0].name
+
+        metadata = self.model.get_modelmeta().custom_metadata_map
+        if 'num_classes' in metadata:
+            self.num_classes = int(metadata['num_classes'])
+
+    def __call__(self, batch):
+        inputs = batch.detach().cpu().contiguous().numpy()
+        outputs = self.model.run(None, {self._input_name: inputs})[0]
+        return torch.from_numpy(outputs)
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    TorchScriptBackend.name: TorchScriptBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def detect_backend(model_path):
+    """Choisit le backend d'après le fichier du modèle (mode 'auto')."""
+    model_path = Path(model_path)
+    if model_path.suffix.lower() == '.onnx':
+        return OnnxRuntimeBackend.name
+    if is_torchscript_file(model_path):
+        return TorchScriptBackend.name
+    return TorchBackend.name
+
+
+def create_backend(name, model_path, device='cpu', num_classes=None):
+    """
+    Crée un backend d'inférence.
+
+    Args:
+        name: 'torch', 'torchscript', 'onnx' ou 'auto' (détection d'après le fichier)
+        model_path: Fichier du modèle
+        device: Device à utiliser
+        num_classes: Nombre de classes par défaut
+
+    Returns:
+        InferenceBackend: Backend chargé
+    """
+    if name in (None, 'auto'):
+        name = detect_backend(model_path)
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu: {name} (disponibles: {', '.join(BACKENDS)}, auto)")
+    return BACKENDS[name](model_path, device=device, num_classes=num_classes)
@@ -0,0 +1,198 @@
+"""
+Micro-batching dynamique des requêtes de prédiction.
+
+Les requêtes /predict concurrentes sont regroupées (jusqu'à max_batch_size
+images ou max_wait_ms d'attente) pour faire un seul forward pass batché.
+"""
+
+import asyncio
+import time
+
+from .executor import InferenceQueueFull
+from .metrics import (
+    batch_size_images,
+    batch_queue_wait_seconds,
+    inference_queue_depth,
+    inference_rejected_total,
+    observe_stage_durations
+)
+
+
+def run_batch(predictor, images, top_ks):
+    """
+    Exécute un batch de prédictions.
+
+    Les erreurs de décodage sont isolées par image : une image invalide
+    n'empêche pas la prédiction des autres.
+
+    Args:
+        predictor: PlantDiseasePredictor
+        images: Liste de bytes d'images
+        top_ks: Liste des top_k demandés (un par image)
+
+    Returns:
+        tuple: (pour chaque image, le dictionnaire de résultat ou l'exception
+            levée ; durée de chaque étape du batch en secondes : decode,
+            transform, forward, topk)
+    """
+    results = [None] * len(images)
+    timings = {}
+    batch, errors = predictor.preprocess_batch(images, timings=timings)
+    for i, error in errors.items():
+        results[i] = error
+    valid = [i for i in range(len(images)) if i not in errors]
+
+    if valid:
+        try:
+            outputs = predictor.predict_tensor(batch, [top_ks[i] for i in valid], timings=timings)
+        except Exception as e:
+            outputs = [e] * len(valid)
+        for i, output in zip(valid, outputs):
+            results[i] = output
+
+    return results, timings
+
+
+class MicroBatcher:
+    """
+    Ordonnanceur asynchrone qui regroupe les requêtes concurrentes en batchs.
+    """
+
+    def __init__(self, executor, max_batch_size=8, max_wait_ms=5.0, max_queue_size=None):
+        """
+        Args:
+            executor: InferenceExecutor qui exécute les batchs
+            max_batch_size: Nombre maximum d'images par batch
+            max_wait_ms: Temps d'attente maximum (ms) pour compléter un batch
+            max_queue_size: Nombre maximum d'images en attente avant rejet
+                (défaut: capacité de l'executor x max_batch_size)
+        """
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        if max_queue_size is None:
+            max_queue_size = executor.capacity * self.max_batch_size
+        self.max_queue_size = max(1, int(max_queue_size))
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._inflight = set()
+
+    async def start(self):
+        """Démarre la boucle de batching (à appeler depuis l'event loop)."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            # Un batch en vol par worker de l'executor
+            self._slots = asyncio.Semaphore(self.executor.max_workers)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la boucle de batching."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Libérer les requêtes encore en attente
+        while self._queue is not None and not self._queue.empty():
+            _, _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, image_bytes, top_k=3):
+        """
+        Soumet une image et attend son résultat.
+
+        Args:
+            image_bytes: Bytes de l'image
+            top_k: Nombre de prédictions top à retourner
+
+        Returns:
+            tuple: (résultat de la prédiction (même format que predictor.predict),
+                durées en secondes : 'queue' (attente de cette requête) et
+                'batch_decode', 'batch_transform', 'batch_forward', 'batch_topk'
+                (étapes du batch entier, partagées par ses requêtes))
+
+        Raises:
+            InferenceQueueFull: Si trop d'images sont déjà en attente
+        """
+        if self._task is None:
+            raise RuntimeError("MicroBatcher non démarré")
+        if self._queue.qsize() >= self.max_queue_size:
+            inference_rejected_total.inc()
+            raise InferenceQueueFull(
+                f"File de batching pleine ({self._queue.qsize()} images en attente)"
+            )
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((image_bytes, top_k, time.perf_counter(), future))
+        inference_queue_depth.labels(queue='batching').set(self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        """Attend une première requête puis complète le batch."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Vider d'abord ce qui est déjà en attente
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Boucle principale : attend un worker libre, collecte puis lance le batch."""
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            inference_queue_depth.labels(queue='batching').set(self._queue.qsize())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        """Exécute un batch dans l'executor et distribue les résultats."""
+        try:
+            now = time.perf_counter()
+            waits = [now - enqueued_at for _, _, enqueued_at, _ in batch]
+            for wait in waits:
+                batch_queue_wait_seconds.observe(wait)
+            batch_size_images.observe(len(batch))
+
+            images = [item[0] for item in batch]
+            top_ks = [item[1] for item in batch]
+            timings = {}
+            try:
+                results, timings = await self.executor.submit(run_batch, images, top_ks)
+            except Exception as e:
+                results = [e] * len(batch)
+        finally:
+            self._slots.release()
+
+        # Étapes du batch : une observation par batch (pas par requête)
+        batch_timings = {f'batch_{stage}': seconds for stage, seconds in timings.items()}
+        observe_stage_durations(batch_timings)
+
+        for (_, _, _, future), result, wait in zip(batch, results, waits):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result((result, {'queue': wait, **batch_timings}))
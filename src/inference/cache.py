@@ -0,0 +1,109 @@
+"""
+Cache LRU/TTL des résultats de prédiction.
+
+Les clients mobiles renvoient souvent la même image (retry, réseau instable) :
+le résultat est mis en cache par hash du contenu, top_k et version du modèle.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .metrics import (
+    prediction_cache_hits_total,
+    prediction_cache_misses_total,
+    prediction_cache_evictions_total,
+    prediction_cache_bytes
+)
+
+
+class PredictionCache:
+    """
+    Cache LRU borné en nombre d'entrées et en taille, avec expiration (TTL).
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl_seconds=600):
+        """
+        Args:
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximale des résultats stockés (bytes)
+            ttl_seconds: Durée de vie d'une entrée (None ou 0 = pas d'expiration)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds or None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_bytes, top_k, model_version):
+        """Clé de cache : hash du contenu de l'image, top_k et version du modèle."""
+        digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        return f"{model_version}:{top_k}:{digest}"
+
+    def get(self, key):
+        """
+        Retourne une copie du résultat en cache, ou None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._evict(key, reason='ttl')
+                entry = None
+
+            if entry is None:
+                prediction_cache_misses_total.inc()
+                return None
+
+            self._entries.move_to_end(key)
+            prediction_cache_hits_total.inc()
+            payload = entry[0]
+
+        return json.loads(payload)
+
+    def put(self, key, result):
+        """Ajoute un résultat au cache (évince les entrées LRU si nécessaire)."""
+        payload = json.dumps(result)
+        size = len(payload) + len(key)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._evict(key, reason='replaced')
+            self._entries[key] = (payload, size, time.monotonic())
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._evict(oldest, reason='capacity')
+
+            prediction_cache_bytes.set(self._bytes)
+
+    def clear(self):
+        """Vide le cache (ex: chargement d'un nouveau modèle)."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            prediction_cache_bytes.set(0)
+        if count:
+            prediction_cache_evictions_total.labels(reason='invalidated').inc(count)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_expired(self, entry):
+        """Indique si une entrée a dépassé son TTL."""
+        return self.ttl_seconds is not None and time.monotonic() - entry[2] > self.ttl_seconds
+
+    def _evict(self, key, reason):
+        """Retire une entrée (appelé avec le verrou)."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        prediction_cache_bytes.set(self._bytes)
+        if reason != 'replaced':
+            prediction_cache_evictions_total.labels(reason=reason).inc()
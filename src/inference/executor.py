@@ -0,0 +1,158 @@
+"""
+Exécution de l'inférence hors de l'event loop asyncio.
+
+Le décodage PIL, les transformations et le forward pass torch sont bloquants :
+ils sont exécutés dans un pool de threads ou de processus borné pour que
+/health et /metrics restent réactifs pendant l'inférence.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .metrics import inference_queue_depth, inference_rejected_total
+
+
+class InferenceQueueFull(Exception):
+    """Levée quand la file d'inférence est pleine (l'API répond 503)."""
+
+
+# Predictor propre à chaque processus du pool (mode 'process')
+_worker_predictor = None
+
+
+def _init_worker(model_path, config_path, device, num_threads):
+    """Initialise le predictor dans un processus du pool."""
+    global _worker_predictor
+    import torch
+    from .predictor import PlantDiseasePredictor
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    _worker_predictor = PlantDiseasePredictor(
+        model_path=model_path,
+        config_path=config_path,
+        device=device
+    )
+    _worker_predictor.warmup()
+
+
+def _ping():
+    """Job vide : force le démarrage (et le warm-up) d'un processus du pool."""
+    return True
+
+
+def predict_image(predictor, image_bytes, top_k):
+    """Job /predict : (résultat, durée de chaque étape en secondes)."""
+    timings = {}
+    result = predictor.predict(image_bytes, top_k, timings=timings)
+    return result, timings
+
+
+def predict_images(predictor, images, top_k):
+    """Job /predict/batch : prédiction de plusieurs images."""
+    return predictor.predict_batch(images, top_k)
+
+
+def _call_in_worker(fn, args):
+    """Appelle fn(predictor, *args) avec le predictor du processus courant."""
+    return fn(_worker_predictor, *args)
+
+
+class InferenceExecutor:
+    """
+    Pool d'inférence borné (threads ou processus).
+
+    Les fonctions soumises reçoivent le predictor en premier argument :
+    fn(predictor, *args). En mode 'process', fn et args doivent être picklables.
+    """
+
+    def __init__(self, predictor, kind='thread', max_workers=1, max_queue_size=32,
+                 model_path=None, config_path="configs/config.yaml", device="cpu",
+                 num_threads=None):
+        """
+        Args:
+            predictor: PlantDiseasePredictor (utilisé en mode 'thread')
+            kind: 'thread' ou 'process'
+            max_workers: Nombre de workers du pool
+            max_queue_size: Nombre de jobs en attente (en plus de ceux en cours)
+                au-delà duquel les nouvelles soumissions sont rejetées
+            model_path: Chemin du modèle (mode 'process')
+            config_path: Chemin de la configuration (mode 'process')
+            device: Device à utiliser (mode 'process')
+            num_threads: Threads intra-op torch par processus (mode 'process')
+        """
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Type d'executor inconnu: {kind} (attendu 'thread' ou 'process')")
+
+        self.predictor = predictor
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue_size = max(0, int(max_queue_size))
+        self._pending = 0
+
+        if kind == 'thread':
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='inference'
+            )
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_path, config_path, device, num_threads)
+            )
+        inference_queue_depth.labels(queue='executor').set(0)
+
+    def warmup(self):
+        """
+        Démarre et chauffe chaque worker du pool avant les premières requêtes :
+        les buffers de prétraitement et les caches de kernels oneDNN sont
+        propres à chaque thread. En mode 'process', le warm-up est fait par
+        l'initializer des processus.
+        """
+        if self.kind == 'thread':
+            futures = [self._pool.submit(self.predictor.warmup) for _ in range(self.max_workers)]
+        else:
+            futures = [self._pool.submit(_ping) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    @property
+    def capacity(self):
+        """Nombre maximum de jobs acceptés simultanément (en cours + en attente)."""
+        return self.max_workers + self.max_queue_size
+
+    @property
+    def pending(self):
+        """Nombre de jobs en cours ou en attente."""
+        return self._pending
+
+    async def submit(self, fn, *args):
+        """
+        Exécute fn(predictor, *args) dans le pool.
+
+        Raises:
+            InferenceQueueFull: Si la file est pleine
+        """
+        if self._pending >= self.capacity:
+            inference_rejected_total.inc()
+            raise InferenceQueueFull(
+                f"File d'inférence pleine ({self._pending} jobs en attente)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        inference_queue_depth.labels(queue='executor').set(self._pending)
+        try:
+            if self.kind == 'thread':
+                return await loop.run_in_executor(self._pool, fn, self.predictor, *args)
+            return await loop.run_in_executor(self._pool, _call_in_worker, fn, args)
+        finally:
+            self._pending -= 1
+            inference_queue_depth.labels(queue='executor').set(self._pending)
+
+    def shutdown(self, wait=True):
+        """Arrête le pool."""
+        self._pool.shutdown(wait=wait)
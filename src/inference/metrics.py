@@ -1,8 +1,14 @@
 """
 Métriques Prometheus pour l'API de prédiction.
+
+Avec plusieurs workers (src/inference/serve.py), PROMETHEUS_MULTIPROC_DIR
+est défini avant l'import de ce module : chaque processus écrit ses valeurs
+dans ce répertoire et /metrics agrège tous les workers (latest_metrics).
 """
 
-from prometheus_client import Counter, Histogram, Gauge
+import os
+
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # Compteurs
@@ -18,28 +24,154 @@ prediction_errors_total = Counter(
     ['error_type']
 )
 
-# Histogrammes
-prediction_duration_seconds = Histogram(
-    'prediction_duration_seconds',
-    'Prediction processing time in seconds',
-    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0]
+prediction_cache_hits_total = Counter(
+    'prediction_cache_hits_total',
+    'Total number of prediction cache hits'
+)
+
+prediction_cache_misses_total = Counter(
+    'prediction_cache_misses_total',
+    'Total number of prediction cache misses'
+)
+
+model_reload_total = Counter(
+    'model_reload_total',
+    'Total number of model reload attempts',
+    ['status']
+)
+
+prediction_cache_evictions_total = Counter(
+    'prediction_cache_evictions_total',
+    'Total number of prediction cache evictions',
+    ['reason']
 )
 
+# Histogrammes
 prediction_confidence = Histogram(
     'prediction_confidence',
     'Prediction confidence scores',
     buckets=[0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0]
 )
 
+# Histogrammes de latence : buckets lus dans inference.latency_metrics,
+# créés au démarrage de l'API (configure_latency_metrics)
+DEFAULT_REQUEST_BUCKETS = [0.005, 0.01, 0.02, 0.03, 0.04, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0]
+DEFAULT_STAGE_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.0075, 0.01, 0.015, 0.02, 0.03, 0.05, 0.1, 0.25]
+
+prediction_duration_seconds = None
+prediction_stage_duration_seconds = None
+
+
+def configure_latency_metrics(request_buckets=None, stage_buckets=None):
+    """
+    Crée les histogrammes de latence (une seule fois par processus).
+
+    Args:
+        request_buckets: Bornes (s) de prediction_duration_seconds
+        stage_buckets: Bornes (s) de prediction_stage_duration_seconds
+    """
+    global prediction_duration_seconds, prediction_stage_duration_seconds
+    if prediction_duration_seconds is not None:
+        return
+    prediction_duration_seconds = Histogram(
+        'prediction_duration_seconds',
+        'Prediction processing time in seconds',
+        buckets=request_buckets or DEFAULT_REQUEST_BUCKETS
+    )
+    prediction_stage_duration_seconds = Histogram(
+        'prediction_stage_duration_seconds',
+        'Time spent in each /predict stage in seconds (read, queue, decode, transform, forward, topk, '
+        'serialize; batch_* stages are observed once per micro-batch)',
+        ['stage'],
+        buckets=stage_buckets or DEFAULT_STAGE_BUCKETS
+    )
+
+
+def observe_stage_durations(timings):
+    """
+    Enregistre des durées {étape: secondes} : étapes d'une requête, ou
+    étapes batch_* une fois par batch (micro-batching).
+    """
+    if prediction_stage_duration_seconds is None:
+        # Histogrammes non configurés (predictor utilisé hors de l'API)
+        return
+    for stage, seconds in timings.items():
+        prediction_stage_duration_seconds.labels(stage=stage).observe(seconds)
+
+
 # Gauges
+# multiprocess_mode : agrégation entre workers vivants (ignoré avec un seul processus)
 model_loaded = Gauge(
     'model_loaded',
-    'Whether the model is loaded (1) or not (0)'
+    'Whether the model is loaded (1) or not (0)',
+    multiprocess_mode='livemax'
 )
 
 model_classes_total = Gauge(
     'model_classes_total',
-    'Total number of classes in the model'
+    'Total number of classes in the model',
+    multiprocess_mode='livemax'
+)
+
+model_version_info = Gauge(
+    'model_version_info',
+    'Version (file hash) and backend of the model being served',
+    ['version', 'backend'],
+    multiprocess_mode='livemax'
+)
+
+startup_stage_duration_seconds = Gauge(
+    'startup_stage_duration_seconds',
+    'Duration of each API startup stage in seconds (imports, config, checkpoint_load, ...)',
+    ['stage'],
+    multiprocess_mode='livemax'
+)
+
+prediction_cache_bytes = Gauge(
+    'prediction_cache_bytes',
+    'Size of the cached prediction results in bytes',
+    multiprocess_mode='livesum'
+)
+
+
+
+# Micro-batching
+batch_size_images = Histogram(
+    'prediction_batch_size',
+    'Number of images per batched forward pass',
+    buckets=[1, 2, 4, 8, 16, 32, 64]
 )
 
+batch_queue_wait_seconds = Histogram(
+    'prediction_batch_queue_wait_seconds',
+    'Time spent by a request waiting in the batching queue',
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+)
+
+# Executor d'inférence
+inference_queue_depth = Gauge(
+    'inference_queue_depth',
+    'Number of inference jobs waiting or running',
+    ['queue'],
+    multiprocess_mode='livesum'
+)
+
+inference_rejected_total = Counter(
+    'inference_rejected_total',
+    'Total number of requests rejected because the inference queue is full'
+)
+
+
+def latest_metrics():
+    """
+    Exposition Prometheus des métriques.
 
+    En mode multiprocess, les valeurs de tous les workers (vivants ou non
+    pour les compteurs et histogrammes) sont lues dans PROMETHEUS_MULTIPROC_DIR.
+    """
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return generate_latest()
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,200 @@
+"""
+Modèle servi par l'API et rechargement à chaud.
+
+Un nouveau checkpoint est chargé dans un thread, chauffé (passes
+synthétiques, inference.warmup) et doté de son propre pool d'inférence,
+puis échangé d'un coup avec le modèle courant depuis l'event loop : les
+requêtes déjà soumises se terminent sur l'ancien pool, les suivantes
+utilisent le nouveau. Le rechargement est déclenché par la surveillance
+de model_path (inference.reload.watch) ou par l'endpoint POST /admin/reload.
+"""
+
+import os
+import time
+import asyncio
+
+from .executor import InferenceExecutor
+from .metrics import model_loaded, model_classes_total, model_version_info, model_reload_total
+
+
+def import_predictor():
+    """
+    Importe le predictor et ses dépendances (torch, PIL, backends).
+
+    Import différé : `import src.inference.api` reste léger. Appelé au
+    chargement du modèle, ou dans le processus parent avant un fork.
+    """
+    from .predictor import PlantDiseasePredictor
+    return PlantDiseasePredictor
+
+
+class ModelManager:
+    """
+    Predictor et pool d'inférence courants, remplacés ensemble au rechargement.
+    """
+
+    def __init__(self, model_path, config_path="configs/config.yaml", device="cpu",
+                 executor_config=None, on_swap=None, predictor=None):
+        """
+        Args:
+            model_path: Chemin du modèle surveillé
+            config_path: Chemin de la configuration
+            device: Device à utiliser
+            executor_config: Section inference.executor
+            on_swap: Callback appelé après chaque échange: on_swap(predictor, executor)
+            predictor: Predictor déjà chargé pour le premier chargement (chargé
+                avant le fork par src/inference/serve.py, poids partagés) ;
+                les rechargements suivants chargent une copie propre au processus
+        """
+        self.model_path = model_path
+        self.config_path = config_path
+        self.device = device
+        self.executor_config = executor_config or {}
+        self.on_swap = on_swap
+        self.predictor = None
+        self.executor = None
+        self.loaded_at = None
+        self.load_timings = {}
+        self._file_state = None
+        self._lock = None
+        self._watch_task = None
+        self._preloaded = predictor
+
+    @property
+    def version(self):
+        """Version du modèle servi (hash du fichier), ou None."""
+        return self.predictor.model_version if self.predictor is not None else None
+
+    def _stat(self):
+        """(mtime, taille) du fichier modèle, ou None s'il est absent."""
+        try:
+            stat = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self):
+        """Charge et chauffe un predictor puis crée son pool (bloquant, hors event loop)."""
+        if self._preloaded is not None:
+            predictor, self._preloaded = self._preloaded, None
+            import_seconds = 0.0
+        else:
+            start = time.perf_counter()
+            predictor_class = import_predictor()
+            import_seconds = time.perf_counter() - start
+
+            predictor = predictor_class(
+                model_path=self.model_path,
+                config_path=self.config_path,
+                device=self.device
+            )
+        executor = InferenceExecutor(
+            predictor,
+            kind=self.executor_config.get('kind', 'thread'),
+            max_workers=self.executor_config.get('max_workers', 1),
+            max_queue_size=self.executor_config.get('max_queue_size', 32),
+            model_path=self.model_path,
+            config_path=self.config_path,
+            device=self.device,
+            num_threads=self.executor_config.get('num_threads')
+        )
+        # Passes synthétiques dans les workers avant de servir des requêtes
+        start = time.perf_counter()
+        executor.warmup()
+        timings = {'model_imports': import_seconds, **predictor.load_timings,
+                   'warmup': time.perf_counter() - start}
+        return predictor, executor, timings
+
+    def _swap(self, predictor, executor):
+        """Remplace le modèle courant (dans l'event loop, sans await : atomique)."""
+        old_predictor, old_executor = self.predictor, self.executor
+        self.predictor, self.executor = predictor, executor
+        self.loaded_at = time.time()
+
+        if old_predictor is not None:
+            # Remise à 0 avant remove : en mode multiprocess, la valeur reste dans le fichier du worker
+            model_version_info.labels(version=old_predictor.model_version,
+                                      backend=old_predictor.backend.name).set(0)
+            model_version_info.remove(old_predictor.model_version, old_predictor.backend.name)
+        model_version_info.labels(version=predictor.model_version, backend=predictor.backend.name).set(1)
+        model_loaded.set(1)
+        model_classes_total.set(predictor.num_classes)
+
+        if self.on_swap is not None:
+            self.on_swap(predictor, executor)
+        # Les jobs déjà soumis à l'ancien pool se terminent avant son arrêt
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+
+    async def load(self, force=False):
+        """
+        Charge model_path et l'échange avec le modèle courant.
+
+        Args:
+            force: Recharger même si le fichier n'a pas changé (même hash)
+
+        Returns:
+            bool: True si un nouveau modèle est servi
+
+        Raises:
+            Exception: Erreur de chargement (le modèle courant reste servi)
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            file_state = self._stat()
+            if not force and self.predictor is not None:
+                version = await asyncio.to_thread(import_predictor()._file_hash, self.model_path)
+                if version == self.version:
+                    self._file_state = file_state
+                    model_reload_total.labels(status='unchanged').inc()
+                    return False
+
+            try:
+                predictor, executor, timings = await asyncio.to_thread(self._build)
+            except Exception as e:
+                # Pas de nouvel essai tant que le fichier ne change pas
+                self._file_state = file_state
+                model_reload_total.labels(status='error').inc()
+                print(f"[ERREUR] Chargement du modele impossible ({self.model_path}): {e}")
+                raise
+
+            previous = self.version
+            self._file_state = file_state
+            self.load_timings = timings
+            self._swap(predictor, executor)
+            model_reload_total.labels(status='loaded').inc()
+            if previous is not None:
+                print(f"[OK] Modele recharge: {previous} -> {self.version}")
+            return True
+
+    async def _watch(self, interval):
+        """Recharge le modèle quand model_path change puis reste stable un intervalle."""
+        previous = self._stat()
+        while True:
+            await asyncio.sleep(interval)
+            current = self._stat()
+            # Fichier stable sur deux relevés : pas de chargement d'une copie partielle
+            if current is not None and current != self._file_state and current == previous:
+                try:
+                    await self.load()
+                except Exception:
+                    pass
+            previous = current
+
+    def start_watching(self, interval=10.0):
+        """Démarre la surveillance de model_path (à appeler depuis l'event loop)."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def stop(self):
+        """Arrête la surveillance et le pool d'inférence."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
@@ -2,16 +2,20 @@
 Module pour charger le modèle et faire des prédictions.
 """
 
+import io
+import os
 import sys
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import torch.nn.functional as F
 from pathlib import Path
 import yaml
 from PIL import Image
-import numpy as np
 
-from src.models.resnet import create_resnet18
-from src.data.preprocessing import preprocess_image_from_bytes
+from src.data.preprocessing import PreprocessingEngine
+from .backends import create_backend
 
 # Configurer l'encodage pour Windows
 if sys.platform == 'win32':
@@ -32,15 +36,25 @@ class PlantDiseasePredictor:
         """
         self.device = torch.device(device)
         self.config = self._load_config(config_path)
+        self.preprocessing = PreprocessingEngine(self.config['data']['image_size'])
         self.model = None
+        self.backend = None
         self.class_names = None
         self.num_classes = None
+        self.model_version = None
+        self._decode_pool = None
+        # Durées de chargement par étape (secondes)
+        self.load_timings = {}
         
         # Charger le modèle
+        start = time.perf_counter()
         self._load_model(model_path)
+        self.load_timings['checkpoint_load'] = time.perf_counter() - start
         
         # Charger le mapping des classes
+        start = time.perf_counter()
         self._load_class_mapping()
+        self.load_timings['class_mapping'] = time.perf_counter() - start
     
     def _load_config(self, config_path):
         """Charge la configuration."""
@@ -54,26 +68,34 @@ class PlantDiseasePredictor:
         if not checkpoint_path.exists():
             raise FileNotFoundError(f"Modèle non trouvé: {model_path}")
         
-        # Charger le checkpoint
-        checkpoint = torch.load(checkpoint_path, map_location=self.device)
+        # Version du modèle = hash du fichier (sert de clé de cache)
+        self.model_version = self._file_hash(checkpoint_path)
         
-        # Récupérer le nombre de classes depuis le checkpoint ou config
-        self.num_classes = checkpoint.get('num_classes', self.config['model']['num_classes'])
-        
-        # Créer le modèle
-        self.model = create_resnet18(
-            num_classes=self.num_classes,
-            pretrained=False  # Pas besoin de pretrained pour l'inférence
+        # Backend d'inférence (torch, torchscript, onnx ou auto)
+        backend_name = self.config.get('inference', {}).get('backend', 'auto')
+        self.backend = create_backend(
+            backend_name,
+            checkpoint_path,
+            device=self.device,
+            num_classes=self.config['model']['num_classes']
         )
-        
-        # Charger les poids
-        self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.model.to(self.device)
-        self.model.eval()
+        self.model = self.backend.model
+        self.num_classes = self.backend.num_classes
         
         print(f"[OK] Modele charge depuis {model_path}")
         print(f"   Device: {self.device}")
         print(f"   Classes: {self.num_classes}")
+        print(f"   Backend: {self.backend.name}")
+        print(f"   Version: {self.model_version}")
+    
+    @staticmethod
+    def _file_hash(path, chunk_size=1024 * 1024):
+        """Hash court (sha256) du contenu d'un fichier."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:12]
     
     def _load_class_mapping(self):
         """Charge le mapping des classes depuis le fichier YAML."""
@@ -91,35 +113,105 @@ class PlantDiseasePredictor:
             self.class_names = list(self.id_to_class.values())
             print(f"[WARN] Fichier class_mapping.yaml non trouve, utilisation de noms generiques")
     
-    def predict(self, image_bytes, top_k=3):
+    def preprocess(self, image_bytes, timings=None):
         """
-        Prédit la classe d'une image.
+        Preprocess une image depuis des bytes.
         
         Args:
             image_bytes: Bytes de l'image
-            top_k: Nombre de prédictions top à retourner
+            timings: Dictionnaire optionnel, complété avec les durées (s)
+                des étapes 'decode' et 'transform' (resize + normalisation)
         
         Returns:
-            dict: Dictionnaire avec prédiction, confidence, et probabilités
+            torch.Tensor: Image préprocessée (1, 3, H, W), dans le buffer
+                réutilisable du thread courant
         """
-        # Preprocessing
-        image_size = self.config['data']['image_size']
-        input_tensor = preprocess_image_from_bytes(image_bytes, image_size)
-        input_tensor = input_tensor.to(self.device)
+        start = time.perf_counter()
+        image = self.preprocessing.decode(image_bytes)
+        decoded = time.perf_counter()
+        tensor = self.preprocessing.normalize([self.preprocessing.resize(image)])
+        if timings is not None:
+            timings['decode'] = decoded - start
+            timings['transform'] = time.perf_counter() - decoded
+        return tensor
+    
+    def preprocess_batch(self, images, parallel=False, timings=None):
+        """
+        Preprocess plusieurs images en un seul batch.
+        
+        Args:
+            images: Liste de bytes d'images
+            parallel: Si True, décode les images en parallèle
+            timings: Dictionnaire optionnel, complété avec les durées (s) du
+                batch : 'decode' et 'transform' (resize + normalisation),
+                comme preprocess
+        
+        Returns:
+            tuple: (tensor (N_valides, 3, H, W), {index: exception} des images illisibles)
+        """
+        parallel = parallel and len(images) > 1
+        start = time.perf_counter()
+        if parallel:
+            decoded = list(self._get_decode_pool().map(self._safe_decode, images))
+        else:
+            decoded = [self._safe_decode(image_bytes) for image_bytes in images]
+        decoded_at = time.perf_counter()
+        
+        errors = {i: d for i, d in enumerate(decoded) if isinstance(d, Exception)}
+        valid = [d for d in decoded if not isinstance(d, Exception)]
+        if parallel and len(valid) > 1:
+            valid = list(self._get_decode_pool().map(self.preprocessing.resize, valid))
+        else:
+            valid = [self.preprocessing.resize(image) for image in valid]
+        batch = self.preprocessing.normalize(valid)
+        if timings is not None:
+            timings['decode'] = decoded_at - start
+            timings['transform'] = time.perf_counter() - decoded_at
+        return batch, errors
+    
+    def predict_tensor(self, input_tensor, top_k=3, timings=None):
+        """
+        Prédit les classes d'un batch d'images déjà préprocessées.
+        
+        Args:
+            input_tensor: Tensor (N, 3, H, W)
+            top_k: Nombre de prédictions top (int, ou liste d'int par image)
+            timings: Dictionnaire optionnel, complété avec les durées (s)
+                des étapes 'forward' et 'topk' (softmax, top k, résultats)
+        
+        Returns:
+            list: Un dictionnaire de résultat par image (même format que predict)
+        """
+        batch_size = input_tensor.shape[0]
+        top_ks = list(top_k) if isinstance(top_k, (list, tuple)) else [top_k] * batch_size
+        max_k = min(max(top_ks), self.num_classes)
         
-        # Prédiction
+        # Prédiction (un seul forward pour tout le batch)
         with torch.no_grad():
-            outputs = self.model(input_tensor)
+            start = time.perf_counter()
+            outputs = self.backend(input_tensor)
+            forwarded = time.perf_counter()
             probabilities = F.softmax(outputs, dim=1)
             
             # Top k prédictions
-            top_probs, top_indices = torch.topk(probabilities, min(top_k, self.num_classes), dim=1)
+            top_probs, top_indices = torch.topk(probabilities, max_k, dim=1)
         
         # Convertir en numpy
-        top_probs = top_probs.cpu().numpy()[0]
-        top_indices = top_indices.cpu().numpy()[0]
+        top_probs = top_probs.cpu().numpy()
+        top_indices = top_indices.cpu().numpy()
         
-        # Construire le résultat
+        results = [
+            self._build_result(top_indices[i], top_probs[i], top_ks[i])
+            for i in range(batch_size)
+        ]
+        if timings is not None:
+            timings['forward'] = forwarded - start
+            timings['topk'] = time.perf_counter() - forwarded
+        return results
+    
+    def _build_result(self, top_indices, top_probs, top_k):
+        """Construit le dictionnaire de résultat pour une image."""
+        k = min(top_k, self.num_classes)
         result = {
             'prediction': self.id_to_class.get(int(top_indices[0]), f"class_{top_indices[0]}"),
             'class_id': int(top_indices[0]),
@@ -128,12 +220,127 @@ class PlantDiseasePredictor:
         }
         
         # Ajouter les top k probabilités
-        for idx, prob in zip(top_indices, top_probs):
+        for idx, prob in zip(top_indices[:k], top_probs[:k]):
             class_name = self.id_to_class.get(int(idx), f"class_{idx}")
             result['probabilities'][class_name] = float(prob)
         
         return result
     
+    def predict(self, image_bytes, top_k=3, timings=None):
+        """
+        Prédit la classe d'une image.
+        
+        Args:
+            image_bytes: Bytes de l'image
+            top_k: Nombre de prédictions top à retourner
+            timings: Dictionnaire optionnel, complété avec la durée (s) de
+                chaque étape : decode, transform, forward, topk
+        
+        Returns:
+            dict: Dictionnaire avec prédiction, confidence, et probabilités
+        """
+        input_tensor = self.preprocess(image_bytes, timings)
+        return self.predict_tensor(input_tensor, top_k, timings)[0]
+    
+    def warmup(self, batch_sizes=None, iterations=None):
+        """
+        Passes synthétiques (décodage JPEG + forward) pour chaque taille de
+        batch attendue : allocations et sélection des kernels oneDNN sont
+        faites avant les premières requêtes.
+        
+        Args:
+            batch_sizes: Tailles de batch (défaut: inference.warmup.batch_sizes)
+            iterations: Passes par taille (défaut: inference.warmup.iterations)
+        
+        Returns:
+            float: Durée du warm-up en secondes (0 si désactivé)
+        """
+        warmup_config = self.config.get('inference', {}).get('warmup', {})
+        if not warmup_config.get('enabled', True):
+            return 0.0
+        batch_sizes = batch_sizes or warmup_config.get('batch_sizes') or [1]
+        iterations = iterations or warmup_config.get('iterations', 1)
+        
+        image_size = self.config['data']['image_size']
+        buffer = io.BytesIO()
+        Image.new('RGB', (image_size, image_size), color=(90, 140, 60)).save(buffer, format='JPEG')
+        image_bytes = buffer.getvalue()
+        
+        start = time.perf_counter()
+        for batch_size in batch_sizes:
+            for _ in range(iterations):
+                if batch_size == 1:
+                    # Chemin de /predict (buffer réutilisable du thread)
+                    self.predict(image_bytes, top_k=1)
+                else:
+                    batch, _ = self.preprocess_batch([image_bytes] * batch_size, parallel=True)
+                    self.predict_tensor(batch, top_k=1)
+        self.load_timings['warmup'] = time.perf_counter() - start
+        return self.load_timings['warmup']
+    
+    def default_batch_size(self):
+        """
+        Taille de batch par défaut pour predict_batch.
+        
+        Utilise inference.batch_prediction.max_batch_size si défini, sinon
+        une taille dimensionnée sur le nombre de threads torch de l'hôte.
+        """
+        batch_config = self.config.get('inference', {}).get('batch_prediction', {})
+        batch_size = batch_config.get('max_batch_size')
+        if batch_size:
+            return int(batch_size)
+        return min(64, 8 * torch.get_num_threads())
+    
+    def _get_decode_pool(self):
+        """Pool de threads pour le décodage parallèle (PIL libère le GIL)."""
+        if self._decode_pool is None:
+            batch_config = self.config.get('inference', {}).get('batch_prediction', {})
+            num_workers = batch_config.get('decode_workers') or min(8, os.cpu_count() or 1)
+            self._decode_pool = ThreadPoolExecutor(
+                max_workers=num_workers,
+                thread_name_prefix='decode'
+            )
+        return self._decode_pool
+    
+    def _safe_decode(self, image_bytes):
+        """Décode une image, retourne l'exception au lieu de la lever."""
+        try:
+            return self.preprocessing.decode(image_bytes)
+        except Exception as e:
+            return e
+    
+    def predict_batch(self, images, top_k=3, batch_size=None):
+        """
+        Prédit les classes de plusieurs images.
+        
+        Les images sont décodées en parallèle puis passées au modèle par
+        batchs de batch_size images.
+        
+        Args:
+            images: Liste de bytes d'images
+            top_k: Nombre de prédictions top à retourner
+            batch_size: Nombre d'images par forward pass (défaut: default_batch_size())
+        
+        Returns:
+            list: Un dictionnaire par image, dans l'ordre d'entrée (même format
+                que predict). Une image illisible donne {'error': message}.
+        """
+        batch_size = batch_size or self.default_batch_size()
+        results = []
+        
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            batch, errors = self.preprocess_batch(chunk, parallel=True)
+            outputs = iter(self.predict_tensor(batch, top_k) if len(batch) else [])
+            
+            for i in range(len(chunk)):
+                if i in errors:
+                    results.append({'error': f"Image illisible: {errors[i]}"})
+                else:
+                    results.append(next(outputs))
+        
+        return results
+    
     def predict_from_path(self, image_path, top_k=3):
         """
         Prédit depuis un chemin d'image.
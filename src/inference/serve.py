@@ -0,0 +1,573 @@
+"""
+Lanceur multi-workers de l'API (pré-fork).
+
+Le processus parent charge le modèle une seule fois, place ses poids en
+mémoire partagée (share_memory) puis crée N workers uvicorn par fork sur
+le même socket : les poids ne sont pas dupliqués par worker. Le nombre de
+workers est déduit du quota CPU du conteneur (cgroup) et du nombre de
+threads intra-op par worker (inference.serving).
+
+Les métriques Prometheus de tous les workers sont écrites dans un même
+répertoire (PROMETHEUS_MULTIPROC_DIR, vidé à chaque lancement) et agrégées
+par /metrics, quel que soit le worker qui répond. Le cache et le
+micro-batching restent propres à chaque worker.
+
+Le rechargement à chaud est fait par le parent (POST /admin/reload sur
+n'importe quel worker, SIGHUP, surveillance de model_path) : il charge et
+partage le nouveau modèle, démarre une nouvelle génération de workers et
+n'arrête les anciens qu'une fois tous les nouveaux prêts. Si le modèle ou
+un worker ne démarre pas, l'ancienne génération continue de servir.
+
+Usage:
+    python -m src.inference.serve
+    python -m src.inference.serve --workers 4 --threads 1 --port 8000
+    kill -HUP <pid du parent>   # Recharger si model_path a changé (-USR1 : forcer)
+"""
+
+import gc
+import os
+import sys
+import time
+import shutil
+import select
+import signal
+import socket
+import argparse
+import tempfile
+import traceback
+from pathlib import Path
+
+# src.inference.api et prometheus_client sont importés après la création du
+# répertoire des métriques multiprocess (prepare_metrics_dir)
+
+# Code de sortie d'un worker dont le démarrage a échoué (comme uvicorn)
+STARTUP_FAILURE = 3
+# Délai max de démarrage (chargement + warm-up) d'une nouvelle génération de workers
+READY_TIMEOUT = 300
+# Délai entre la fin des acceptations et l'arrêt d'un worker (secondes)
+SHUTDOWN_GRACE = 0.5
+
+# Configurer l'encodage pour Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def cgroup_cpu_limit():
+    """
+    CPUs disponibles : quota cgroup (v2 puis v1) borné par l'affinité du processus.
+
+    Returns:
+        float: Nombre de CPUs (éventuellement fractionnaire, ex: 2.5)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+
+    quota = None
+    try:
+        # cgroup v2 : "max 100000" ou "<quota> <période>"
+        value, period = Path('/sys/fs/cgroup/cpu.max').read_text().split()
+        if value != 'max':
+            quota = int(value) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1 : quota -1 = illimité
+            value = int(Path('/sys/fs/cgroup/cpu/cpu.cfs_quota_us').read_text())
+            period = int(Path('/sys/fs/cgroup/cpu/cpu.cfs_period_us').read_text())
+            if value > 0 and period > 0:
+                quota = value / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, quota)
+    return cpus
+
+
+def plan_workers(cpus, workers=None, threads_per_worker=None):
+    """
+    Répartit les CPUs entre workers et threads intra-op.
+
+    Args:
+        cpus: CPUs disponibles (cgroup_cpu_limit)
+        workers: Nombre de workers imposé (None = déduit des CPUs)
+        threads_per_worker: Threads intra-op par worker (None = 1, ou CPUs / workers)
+
+    Returns:
+        tuple: (workers, threads_per_worker)
+    """
+    if workers and not threads_per_worker:
+        threads_per_worker = max(1, int(cpus // workers))
+    threads_per_worker = threads_per_worker or 1
+    if not workers:
+        # Un quota fractionnaire (ex: 2.5 CPUs) est arrondi à l'inférieur
+        workers = max(1, int(cpus // threads_per_worker))
+    return workers, threads_per_worker
+
+
+def bind_socket(host, port):
+    """Socket d'écoute partagé par les workers (hérité au fork)."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_metrics_dir():
+    """
+    Répertoire des métriques Prometheus partagé par les workers.
+
+    À appeler avant tout import de prometheus_client. Un répertoire imposé
+    par PROMETHEUS_MULTIPROC_DIR est vidé des fichiers d'un lancement
+    précédent ; sinon un répertoire temporaire est créé.
+
+    Returns:
+        str ou None: Répertoire temporaire à supprimer à l'arrêt
+    """
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for db_file in Path(path).glob('*.db'):
+            db_file.unlink()
+        return None
+    path = tempfile.mkdtemp(prefix='plant-api-metrics-')
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = path
+    return path
+
+
+def preload_predictor(config, config_path):
+    """
+    Charge le predictor dans le processus parent, poids en mémoire partagée.
+
+    Returns:
+        PlantDiseasePredictor ou None si le modèle ne peut pas être partagé
+        (GPU, backend ONNX Runtime, executor en mode 'process')
+    """
+    from .backends import detect_backend
+    from .model_manager import import_predictor
+
+    inference_config = config['inference']
+    model_path = inference_config['model_path']
+    backend = inference_config.get('backend', 'auto')
+    if backend in (None, 'auto'):
+        backend = detect_backend(model_path)
+    executor_kind = inference_config.get('executor', {}).get('kind', 'thread')
+
+    if inference_config['device'] != 'cpu' or backend == 'onnx' or executor_kind == 'process':
+        print(f"[NOTE] Pas de prechargement (device {inference_config['device']}, "
+              f"backend {backend}, executor {executor_kind}): un modele par worker")
+        return None
+
+    import torch
+    # Pas de pool de threads OpenMP dans le parent : il ne survivrait pas au fork
+    torch.set_num_threads(1)
+
+    predictor = import_predictor()(
+        model_path=model_path,
+        config_path=config_path,
+        device=inference_config['device']
+    )
+    # Paramètres et buffers en mémoire partagée : mêmes pages pour tous les workers
+    # (les modules TorchScript figés restent partagés par copy-on-write)
+    predictor.model.share_memory()
+    return predictor
+
+
+def run_worker(sock, threads, host, port, log_level, ready_fd=None):
+    """
+    Processus enfant : fixe les threads intra-op et sert l'API sur sock.
+
+    Args:
+        ready_fd: Pipe vers le parent, écrit une fois le modèle chargé et
+            chauffé (nouvelle génération de workers lors d'un rechargement)
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Rechargements coordonnés par le parent
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    import asyncio
+    import torch
+    import uvicorn
+    from . import api
+
+    class WorkerServer(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets=sockets)
+            if ready_fd is not None and self.started:
+                os.write(ready_fd, b'1')
+                os.close(ready_fd)
+
+        async def shutdown(self, sockets=None):
+            # uvicorn ferme les connexions acceptées dont la requête n'est pas
+            # encore lue : ne plus accepter (les autres workers prennent le
+            # relais sur le socket partagé) puis laisser ces requêtes arriver
+            for server in self.servers:
+                server.close()
+            await asyncio.sleep(SHUTDOWN_GRACE)
+            await super().shutdown(sockets=sockets)
+
+    if ready_fd is not None:
+        # Nouvelle génération : durée totale du démarrage mesurée depuis le fork
+        api._startup_start = time.perf_counter()
+    torch.set_num_threads(threads)
+    server = WorkerServer(uvicorn.Config(
+        api.app, host=host, port=port, log_level=log_level
+    ))
+    try:
+        server.run(sockets=[sock])
+        code = 0 if server.started else STARTUP_FAILURE
+    except SystemExit as e:
+        # Échec du démarrage (lifespan) : uvicorn récent lève SystemExit(3)
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    # Pas de retour dans la boucle du parent (ni de handlers atexit hérités)
+    os._exit(code)
+
+
+class Supervisor:
+    """
+    Processus parent : crée les workers, les redémarre s'ils s'arrêtent et
+    recharge le modèle en remplaçant tous les workers.
+
+    Signaux : SIGTERM/SIGINT arrêtent les workers, SIGHUP recharge le modèle
+    si model_path a changé, SIGUSR1 force le rechargement.
+    """
+
+    def __init__(self, config, config_path, workers, threads, host, port, log_level, preload=True):
+        """
+        Args:
+            config: Configuration complète
+            config_path: Chemin de la configuration (relu par les workers)
+            workers: Nombre de workers
+            threads: Threads intra-op par worker
+            host, port, log_level: Paramètres uvicorn
+            preload: Charger le modèle dans le parent (poids partagés)
+        """
+        self.config = config
+        self.config_path = config_path
+        self.workers = workers
+        self.threads = threads
+        self.host = host
+        self.port = port
+        self.log_level = log_level
+        self.preload = preload
+        self.model_path = config['inference']['model_path']
+
+        reload_config = config['inference'].get('reload', {})
+        self.watch_interval = None
+        if reload_config.get('watch', False):
+            self.watch_interval = reload_config.get('poll_interval_seconds', 10)
+
+        self.sock = None
+        self.children = set()
+        # Workers remplacés par un rechargement : arrêtés, pas redémarrés
+        self.retiring = set()
+        # Pipes de démarrage des workers d'une nouvelle génération (pid -> fd)
+        self.ready_fds = {}
+        self.version = None
+        self.file_state = None
+        self.reload_request = None
+        self.stopping = False
+        self.exit_code = 0
+
+    def _stat(self):
+        """(mtime, taille) du fichier modèle, ou None s'il est absent."""
+        try:
+            stat = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _file_hash(self):
+        from .model_manager import import_predictor
+        return import_predictor()._file_hash(self.model_path)
+
+    def load_model(self):
+        """
+        Charge model_path dans le parent (poids hérités par les workers créés ensuite).
+
+        Returns:
+            str: Version du modèle (hash du fichier), None si le fichier est illisible
+                sans préchargement (chaque worker signalera l'erreur)
+        """
+        from . import api
+
+        if self.preload:
+            start = time.perf_counter()
+            predictor = preload_predictor(self.config, self.config_path)
+            if predictor is not None:
+                api.preloaded_predictor = predictor
+                print(f"[OK] Modele precharge dans le parent ({time.perf_counter() - start:.2f} s), "
+                      f"poids partages entre les workers")
+                return predictor.model_version
+            self.preload = False
+        try:
+            return self._file_hash()
+        except OSError:
+            return None
+
+    def spawn(self, ready=False):
+        """Crée un worker ; avec ready, il signale la fin de son démarrage par un pipe."""
+        read_fd = write_fd = None
+        if ready:
+            read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            for fd in [*self.ready_fds.values(), read_fd]:
+                if fd is not None:
+                    os.close(fd)
+            run_worker(self.sock, self.threads, self.host, self.port, self.log_level,
+                       ready_fd=write_fd)
+        if ready:
+            os.close(write_fd)
+            self.ready_fds[pid] = read_fd
+        self.children.add(pid)
+        return pid
+
+    def _kill(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stop(self, signum=None, frame=None):
+        """Arrête tous les workers (SIGTERM/SIGINT)."""
+        self.stopping = True
+        self._kill(self.children | self.retiring)
+
+    def request_reload(self, signum=None, frame=None):
+        """Rechargement demandé (SIGHUP : si le fichier a changé, SIGUSR1 : forcé)."""
+        if signum == signal.SIGUSR1:
+            self.reload_request = 'force'
+        else:
+            self.reload_request = self.reload_request or 'changed'
+
+    def reap(self):
+        """Traite les workers arrêtés (sans bloquer)."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._exited(pid, os.waitstatus_to_exitcode(status))
+
+    def _exited(self, pid, code):
+        from prometheus_client import multiprocess
+        # Gauges "live*" : le worker arrêté n'est plus compté dans /metrics
+        multiprocess.mark_process_dead(pid)
+
+        if pid in self.retiring:
+            self.retiring.discard(pid)
+            return
+        self.children.discard(pid)
+        if self.stopping or pid in self.ready_fds:
+            # Échec d'un worker d'une nouvelle génération : traité par reload()
+            return
+        if code == STARTUP_FAILURE:
+            # Modèle ou configuration invalide : redémarrer ne servirait à rien
+            print(f"[ERREUR] Demarrage du worker {pid} impossible, arret des workers")
+            self.exit_code = code
+            self.stop()
+        else:
+            print(f"[WARN] Worker {pid} arrete (code {code}), redemarrage")
+            time.sleep(1)
+            self.spawn()
+
+    def _wait_ready(self, pids, timeout=READY_TIMEOUT):
+        """Attend que les workers pids aient chargé et chauffé le modèle."""
+        pending = {self.ready_fds[pid]: pid for pid in pids}
+        deadline = time.monotonic() + timeout
+        try:
+            while pending and not self.stopping:
+                if time.monotonic() > deadline:
+                    print(f"[ERREUR] Nouveaux workers non prets apres {timeout} s")
+                    return False
+                readable, _, _ = select.select(list(pending), [], [], 0.5)
+                for fd in readable:
+                    if not os.read(fd, 1):
+                        print(f"[ERREUR] Worker {pending[fd]} arrete pendant son demarrage")
+                        return False
+                    del pending[fd]
+                self.reap()
+            return not pending
+        finally:
+            for pid in pids:
+                fd = self.ready_fds.pop(pid, None)
+                if fd is not None:
+                    os.close(fd)
+
+    def reload(self, force=False):
+        """
+        Charge model_path et remplace tous les workers.
+
+        Args:
+            force: Recharger même si le fichier n'a pas changé (même hash)
+
+        Returns:
+            bool: True si les nouveaux workers servent le nouveau modèle
+        """
+        from . import api
+        from .metrics import model_reload_total
+
+        self.reload_request = None
+        file_state = self._stat()
+        # Pas de nouvel essai automatique tant que le fichier ne change pas
+        self.file_state = file_state
+        previous_predictor = api.preloaded_predictor
+        try:
+            if not force and self._file_hash() == self.version:
+                model_reload_total.labels(status='unchanged').inc()
+                print(f"[INFO] Modele inchange ({self.version}), pas de rechargement")
+                return False
+            version = self.load_model()
+        except Exception as e:
+            model_reload_total.labels(status='error').inc()
+            print(f"[ERREUR] Chargement du modele impossible ({self.model_path}): {e}")
+            return False
+
+        # Nouveau modèle exclu du GC avant le fork (voir main)
+        gc.collect()
+        gc.freeze()
+        new = [self.spawn(ready=True) for _ in range(self.workers)]
+        if not self._wait_ready(new):
+            # L'ancienne génération continue de servir l'ancien modèle
+            failed = self.children.intersection(new)
+            self.children -= failed
+            self.retiring |= failed
+            self._kill(failed)
+            api.preloaded_predictor = previous_predictor
+            if not self.stopping:
+                model_reload_total.labels(status='error').inc()
+                print(f"[ERREUR] Nouveaux workers en echec, modele {self.version} conserve")
+            return False
+
+        old = self.children.difference(new)
+        self.children -= old
+        self.retiring |= old
+        self._kill(old)
+        previous, self.version = self.version, version
+        # Libérer l'ancien predictor du parent
+        del previous_predictor
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        print(f"[OK] Modele recharge: {previous} -> {version} "
+              f"(workers {', '.join(str(pid) for pid in sorted(new))})")
+        return True
+
+    def _check_model_file(self, previous):
+        """Rechargement quand model_path change puis reste stable un intervalle."""
+        current = self._stat()
+        # Fichier stable sur deux relevés : pas de chargement d'une copie partielle
+        if current is not None and current != self.file_state and current == previous:
+            self.reload_request = self.reload_request or 'changed'
+        return current
+
+    def run(self, sock):
+        """
+        Démarre les workers sur sock et les supervise jusqu'à l'arrêt.
+
+        Returns:
+            int: Code de sortie (STARTUP_FAILURE si les workers ne démarrent pas)
+        """
+        self.sock = sock
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.request_reload)
+        signal.signal(signal.SIGUSR1, self.request_reload)
+
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"[OK] {self.workers} workers demarres "
+              f"(pid {', '.join(str(pid) for pid in sorted(self.children))})")
+
+        self.file_state = watched_state = self._stat()
+        next_check = time.monotonic() + (self.watch_interval or 0)
+        if self.watch_interval:
+            print(f"[OK] Surveillance de {self.model_path} (toutes les {self.watch_interval} s)")
+
+        while True:
+            self.reap()
+            if self.stopping:
+                if not self.children and not self.retiring:
+                    break
+            else:
+                if self.watch_interval and time.monotonic() >= next_check:
+                    watched_state = self._check_model_file(watched_state)
+                    next_check = time.monotonic() + self.watch_interval
+                if self.reload_request:
+                    self.reload(force=self.reload_request == 'force')
+            time.sleep(0.2)
+        sock.close()
+        return self.exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API multi-workers (modèle partagé entre workers)')
+    parser.add_argument('--host', type=str, default='0.0.0.0',
+                        help='Adresse d\'écoute')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='Port d\'écoute')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Nombre de workers (défaut: inference.serving.workers ou quota CPU)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Threads intra-op par worker (défaut: inference.serving.threads_per_worker)')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='Chaque worker charge son propre modèle')
+    parser.add_argument('--log-level', type=str, default='info',
+                        help='Niveau de log uvicorn')
+    args = parser.parse_args()
+
+    metrics_dir = prepare_metrics_dir() if hasattr(os, 'fork') else None
+    try:
+        from . import api
+
+        config = api.load_config(api.CONFIG_PATH)
+        serving_config = config['inference'].get('serving', {})
+        cpus = cgroup_cpu_limit()
+        workers, threads = plan_workers(
+            cpus,
+            workers=args.workers or serving_config.get('workers'),
+            threads_per_worker=args.threads or serving_config.get('threads_per_worker')
+        )
+        print(f"[INFO] CPUs disponibles: {cpus:g} -> {workers} workers x {threads} threads")
+
+        if not hasattr(os, 'fork'):
+            # Windows : un seul processus uvicorn
+            import torch
+            import uvicorn
+            print("[NOTE] fork indisponible: un seul worker")
+            torch.set_num_threads(threads)
+            uvicorn.run(api.app, host=args.host, port=args.port, log_level=args.log_level)
+            return
+
+        supervisor = Supervisor(
+            config, api.CONFIG_PATH, workers, threads, args.host, args.port, args.log_level,
+            preload=serving_config.get('preload', True) and not args.no_preload
+        )
+        supervisor.version = supervisor.load_model()
+        # Les workers transmettent POST /admin/reload au parent
+        api.supervisor_pid = os.getpid()
+
+        # Objets créés avant le fork exclus du GC : ses passes ne copient pas leurs pages
+        gc.collect()
+        gc.freeze()
+        sock = bind_socket(args.host, args.port)
+        sys.exit(supervisor.run(sock))
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Export du modèle entraîné vers des formats optimisés pour l'inférence.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+
+import torch
+
+
+TORCHSCRIPT_METADATA = 'metadata.json'
+
+
+def load_checkpoint_model(checkpoint_path, num_classes=None, device='cpu'):
+    """
+    Reconstruit le ResNet18 depuis un checkpoint (.pth) d'entraînement.
+
+    Args:
+        checkpoint_path: Chemin vers le checkpoint (best_model.pth)
+        num_classes: Nombre de classes (défaut: valeur du checkpoint)
+        device: Device sur lequel charger le modèle
+
+    Returns:
+        tuple: (modèle en mode eval, checkpoint)
+    """
+    # Import différé : torchvision n'est pas nécessaire pour charger un TorchScript
+    from src.models.resnet import create_resnet18
+
+    checkpoint = torch.load(checkpoint_path, map_location=device)
+    num_classes = checkpoint.get('num_classes', num_classes)
+    if num_classes is None:
+        raise ValueError(f"num_classes absent du checkpoint {checkpoint_path}")
+
+    model = create_resnet18(num_classes=num_classes, pretrained=False)
+    model.load_state_dict(checkpoint['model_state_dict'])
+    model.to(device)
+    model.eval()
+    return model, checkpoint
+
+
+def is_torchscript_file(path):
+    """Indique si un fichier est une archive TorchScript (torch.jit.save)."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return any(name.endswith('/constants.pkl') for name in archive.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def load_torchscript(path, device='cpu', optimize=True):
+    """
+    Charge un modèle TorchScript exporté par export_torchscript.
+
+    Args:
+        path: Fichier TorchScript (.pt)
+        device: Device sur lequel charger le modèle
+        optimize: Si True, applique torch.jit.optimize_for_inference
+            (le résultat n'est pas sérialisable, d'où l'application au chargement)
+
+    Returns:
+        tuple: (modèle TorchScript, métadonnées)
+    """
+    extra_files = {TORCHSCRIPT_METADATA: ''}
+    model = torch.jit.load(str(path), map_location=device, _extra_files=extra_files)
+    model.eval()
+    if optimize:
+        model = torch.jit.optimize_for_inference(model)
+    metadata = json.loads(extra_files[TORCHSCRIPT_METADATA] or '{}')
+    return model, metadata
+
+
+def export_torchscript(checkpoint_path, output_path, image_size=224, num_classes=None):
+    """
+    Exporte un checkpoint en TorchScript figé.
+
+    Le modèle est tracé, puis torch.jit.freeze intègre les poids comme
+    constantes et fusionne les BatchNorm dans les convolutions. Les
+    optimisations CPU restantes (optimize_for_inference) sont appliquées
+    au chargement par load_torchscript.
+
+    Args:
+        checkpoint_path: Checkpoint d'entraînement (.pth)
+        output_path: Fichier TorchScript de sortie (.pt)
+        image_size: Taille des images en entrée
+        num_classes: Nombre de classes (si absent du checkpoint)
+
+    Returns:
+        tuple: (modèle eager, modèle TorchScript exporté)
+    """
+    model, checkpoint = load_checkpoint_model(checkpoint_path, num_classes)
+    example = torch.randn(1, 3, image_size, image_size)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        scripted = torch.jit.freeze(traced)
+
+    metadata = {
+        'num_classes': checkpoint.get('num_classes', num_classes),
+        'image_size': image_size,
+        'epoch': checkpoint.get('epoch'),
+        'val_acc': checkpoint.get('val_acc'),
+        'source': Path(checkpoint_path).name
+    }
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(scripted, str(output_path),
+                   _extra_files={TORCHSCRIPT_METADATA: json.dumps(metadata)})
+    return model, scripted
+
+
+def export_onnx(checkpoint_path, output_path, image_size=224, num_classes=None, opset=17):
+    """
+    Exporte un checkpoint au format ONNX (batch dynamique) pour ONNX Runtime.
+
+    Args:
+        checkpoint_path: Checkpoint d'entraînement (.pth)
+        output_path: Fichier ONNX de sortie (.onnx)
+        image_size: Taille des images en entrée
+        num_classes: Nombre de classes (si absent du checkpoint)
+        opset: Version d'opset ONNX
+
+    Returns:
+        torch.nn.Module: Modèle eager exporté (pour le contrôle de parité)
+    """
+    import onnx
+
+    model, checkpoint = load_checkpoint_model(checkpoint_path, num_classes)
+    example = torch.randn(1, 3, image_size, image_size)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    export_kwargs = {
+        'input_names': ['input'],
+        'output_names': ['logits'],
+        'dynamic_axes': {'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+        'opset_version': opset,
+    }
+    with torch.no_grad():
+        try:
+            # Exporteur TorchScript (les versions récentes utilisent dynamo par défaut)
+            torch.onnx.export(model, (example,), str(output_path), dynamo=False, **export_kwargs)
+        except TypeError:
+            torch.onnx.export(model, (example,), str(output_path), **export_kwargs)
+
+    # Métadonnées lues par le backend ONNX Runtime
+    onnx_model = onnx.load(str(output_path))
+    metadata = {
+        'num_classes': checkpoint.get('num_classes', num_classes),
+        'image_size': image_size,
+        'source': Path(checkpoint_path).name
+    }
+    for key, value in metadata.items():
+        prop = onnx_model.metadata_props.add()
+        prop.key = key
+        prop.value = str(value)
+    onnx.save(onnx_model, str(output_path))
+    return model
+
+
+def check_parity(reference, candidate, image_size=224, batch_sizes=(1, 4), seed=0):
+    """
+    Compare les sorties de deux modèles sur des entrées aléatoires.
+
+    Args:
+        reference: Modèle de référence (eager)
+        candidate: Modèle à vérifier (callable batch -> logits)
+        image_size: Taille des images
+        batch_sizes: Tailles de batch testées
+        seed: Graine des entrées aléatoires
+
+    Returns:
+        dict: {'max_abs_diff': float, 'top1_agreement': float}
+    """
+    generator = torch.Generator().manual_seed(seed)
+    max_diff = 0.0
+    agree = 0
+    total = 0
+
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            inputs = torch.randn(batch_size, 3, image_size, image_size, generator=generator)
+            expected = reference(inputs)
+            actual = torch.as_tensor(candidate(inputs))
+            max_diff = max(max_diff, float((expected - actual).abs().max()))
+            agree += int((expected.argmax(dim=1) == actual.argmax(dim=1)).sum())
+            total += batch_size
+
+    return {'max_abs_diff': max_diff, 'top1_agreement': agree / total}
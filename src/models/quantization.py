@@ -0,0 +1,117 @@
+"""
+Quantification INT8 statique (post-training) du ResNet18.
+
+Le modèle FP32 est préparé en mode FX, calibré sur un échantillon d'images
+de validation, puis converti en INT8 et exporté en TorchScript figé : le
+fichier produit se charge directement avec le backend 'torchscript' du
+predictor.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+from src.models.export import TORCHSCRIPT_METADATA
+
+
+def quantize_static(model, calibration_loader, image_size=224, backend='x86', num_batches=None):
+    """
+    Quantifie un modèle en INT8 (quantification statique post-training).
+
+    Args:
+        model: Modèle FP32 en mode eval
+        calibration_loader: DataLoader d'images (images, labels) pour la calibration
+        image_size: Taille des images en entrée
+        backend: Moteur de quantification ('x86', 'fbgemm' ou 'qnnpack')
+        num_batches: Nombre maximum de batchs de calibration (None = tout le loader)
+
+    Returns:
+        torch.nn.Module: Modèle quantifié INT8
+    """
+    torch.backends.quantized.engine = backend
+    model = model.cpu().eval()
+    example_inputs = (torch.randn(1, 3, image_size, image_size),)
+
+    prepared = prepare_fx(model, get_default_qconfig_mapping(backend), example_inputs)
+
+    # Calibration : collecte des plages d'activation
+    with torch.no_grad():
+        for i, (images, _) in enumerate(calibration_loader):
+            if num_batches is not None and i >= num_batches:
+                break
+            prepared(images)
+
+    return convert_fx(prepared)
+
+
+def save_quantized(model, output_path, image_size=224, metadata=None, backend='x86'):
+    """
+    Exporte le modèle quantifié en TorchScript figé.
+
+    Args:
+        model: Modèle quantifié (quantize_static)
+        output_path: Fichier de sortie (.pt)
+        image_size: Taille des images en entrée
+        metadata: Métadonnées à stocker dans l'archive (num_classes, ...)
+        backend: Moteur de quantification utilisé
+
+    Returns:
+        torch.jit.ScriptModule: Modèle exporté
+    """
+    example = torch.randn(1, 3, image_size, image_size)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, example))
+
+    metadata = dict(metadata or {})
+    metadata.update({
+        'image_size': image_size,
+        'quantized': True,
+        'quantization_backend': backend
+    })
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(scripted, str(output_path),
+                   _extra_files={TORCHSCRIPT_METADATA: json.dumps(metadata)})
+    return scripted
+
+
+def evaluate_per_class(model, dataloader, num_classes):
+    """
+    Calcule les prédictions correctes et le nombre d'images par classe.
+
+    Returns:
+        tuple: (np.ndarray correct par classe, np.ndarray total par classe)
+    """
+    correct = np.zeros(num_classes, dtype=np.int64)
+    total = np.zeros(num_classes, dtype=np.int64)
+
+    with torch.no_grad():
+        for images, labels in dataloader:
+            preds = model(images).argmax(dim=1)
+            labels = labels.numpy()
+            total += np.bincount(labels, minlength=num_classes)
+            correct += np.bincount(labels[preds.numpy() == labels], minlength=num_classes)
+
+    return correct, total
+
+
+def measure_latency(model, image_size=224, batch_size=1, iterations=20, warmup=3):
+    """
+    Mesure la latence moyenne d'un forward pass.
+
+    Returns:
+        dict: {'batch_ms': latence par batch, 'image_ms': latence par image}
+    """
+    inputs = torch.randn(batch_size, 3, image_size, image_size)
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(inputs)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            model(inputs)
+    batch_ms = (time.perf_counter() - start) / iterations * 1000
+    return {'batch_ms': batch_ms, 'image_ms': batch_ms / batch_size}
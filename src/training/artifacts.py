@@ -0,0 +1,139 @@
+"""
+Envoi des artifacts MLflow en arrière-plan pendant l'entraînement.
+
+Le meilleur modèle n'est sérialisé qu'une fois (best_model.pth) ; un
+instantané est pris par lien physique (save_atomic remplace le fichier, le
+lien garde donc le contenu de l'epoch soumise), puis un thread dédié
+l'envoie dans MLflow sans bloquer l'epoch suivante. Un envoi en attente est
+remplacé par un plus récent de même clé : seul le dernier meilleur modèle
+est envoyé.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import mlflow
+
+
+class ArtifactUploader:
+    """
+    Envoie les artifacts d'un run MLflow dans un thread d'arrière-plan.
+
+    Le thread utilise MlflowClient avec l'identifiant du run : le run actif
+    de mlflow est propre au thread d'entraînement.
+    """
+
+    def __init__(self, run_id, staging_dir):
+        """
+        Args:
+            run_id: Identifiant du run MLflow
+            staging_dir: Dossier des instantanés (même disque que les checkpoints)
+        """
+        self.run_id = run_id
+        self.staging_dir = Path(staging_dir)
+        self.upload_seconds = 0.0
+        self.uploads = 0
+        self.coalesced = 0
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='artifact-uploader', daemon=True)
+        self._thread.start()
+
+    def _snapshot(self, source, targets):
+        """Instantané de source sous chaque nom cible (lien physique, sinon copie)."""
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        directory = Path(tempfile.mkdtemp(dir=self.staging_dir))
+        files = []
+        for name, artifact_path in targets:
+            destination = directory / name
+            try:
+                os.link(source, destination)
+            except OSError:
+                shutil.copy2(source, destination)
+            files.append((destination, artifact_path))
+        return directory, files
+
+    def submit(self, key, source, targets):
+        """
+        Planifie l'envoi d'un fichier déjà sérialisé.
+
+        Args:
+            key: Clé de coalescence (un envoi en attente de même clé est remplacé)
+            source: Fichier local (ex: models/best_model.pth)
+            targets: Liste de (nom du fichier, artifact_path),
+                     ex: [('model.pth', 'model')]
+        """
+        job = self._snapshot(source, targets)
+        with self._lock:
+            queued = key in self._pending
+            if queued:
+                self.coalesced += 1
+                shutil.rmtree(self._pending[key][0], ignore_errors=True)
+            self._pending[key] = job
+            # Un envoi plus récent rend caduc un échec précédent
+            failed = self._failed.pop(key, None)
+        if failed:
+            shutil.rmtree(failed[0], ignore_errors=True)
+        if not queued:
+            self._queue.put(key)
+
+    def _upload(self, key, job):
+        """Envoie un instantané ; False en cas d'échec."""
+        directory, files = job
+        start = time.perf_counter()
+        try:
+            client = mlflow.tracking.MlflowClient()
+            for path, artifact_path in files:
+                client.log_artifact(self.run_id, str(path), artifact_path)
+            self.uploads += 1
+            print(f"[OK] Artifacts MLflow envoyes ({key}): "
+                  f"{', '.join(f'{a}/{p.name}' for p, a in files)}")
+            return True
+        except Exception as e:
+            print(f"[ERREUR] Impossible d'envoyer les artifacts MLflow ({key}): {e}")
+            return False
+        finally:
+            self.upload_seconds += time.perf_counter() - start
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                if key is None:
+                    return
+                with self._lock:
+                    job = self._pending.pop(key)
+                success = self._upload(key, job)
+                with self._lock:
+                    # Gardé pour un nouvel essai sauf si un envoi plus récent existe
+                    stale = self._failed.pop(key, None)
+                    if not success and key not in self._pending:
+                        self._failed[key] = job
+                        job = None
+                for old_job in (stale, job):
+                    if old_job:
+                        shutil.rmtree(old_job[0], ignore_errors=True)
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        """Attend que tous les envois planifiés soient terminés."""
+        self._queue.join()
+
+    def close(self):
+        """Envoie les artifacts en attente (nouvel essai des échecs) et arrête le thread."""
+        self._queue.put(None)
+        self._thread.join()
+        for key, job in self._failed.items():
+            print(f"[INFO] Nouvel essai d'envoi MLflow ({key})...")
+            self._upload(key, job)
+            shutil.rmtree(job[0], ignore_errors=True)
+        self._failed.clear()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
@@ -0,0 +1,147 @@
+"""
+Checkpoints d'entraînement : écriture atomique en arrière-plan et reprise.
+
+L'état (modèle, optimizer, scheduler, RNG...) est copié sur le CPU dans le
+thread d'entraînement, puis sérialisé par un thread dédié : l'epoch suivante
+démarre sans attendre l'écriture disque. Chaque fichier est écrit sous un
+nom temporaire puis renommé (os.replace), un checkpoint n'est donc jamais
+lu à moitié écrit après une interruption.
+"""
+
+import os
+import queue
+import random
+import threading
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+def _to_cpu(obj):
+    """Copie récursive d'un état (dicts, listes, tensors) sur le CPU."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: _to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(value) for value in obj)
+    return obj
+
+
+def save_atomic(state, path):
+    """Sauvegarde un état avec torch.save (fichier temporaire puis renommage)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def capture_rng_state():
+    """États des générateurs aléatoires (Python, NumPy, torch CPU et CUDA)."""
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state):
+    """Restaure les générateurs aléatoires (capture_rng_state)."""
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def training_state(model, optimizer, scheduler, precision):
+    """
+    États nécessaires à la reprise : poids, optimizer, scheduler, scaler et RNG.
+
+    Args:
+        model: Modèle sans wrapper DDP
+        optimizer: Optimizer
+        scheduler: Scheduler du learning rate
+        precision: MixedPrecision (état du GradScaler)
+    """
+    return {
+        'model_state_dict': model.state_dict(),
+        'optimizer_state_dict': optimizer.state_dict(),
+        'scheduler_state_dict': scheduler.state_dict(),
+        'scaler_state_dict': precision.state_dict(),
+        'rng_state': capture_rng_state(),
+    }
+
+
+def restore_training_state(state, model, optimizer, scheduler, precision):
+    """Restaure les états sauvegardés par training_state."""
+    model.load_state_dict(state['model_state_dict'])
+    optimizer.load_state_dict(state['optimizer_state_dict'])
+    scheduler.load_state_dict(state['scheduler_state_dict'])
+    precision.load_state_dict(state.get('scaler_state_dict'))
+    restore_rng_state(state['rng_state'])
+
+
+def load_checkpoint(path, device='cpu'):
+    """Charge un checkpoint d'entraînement complet."""
+    # weights_only=False : le checkpoint contient les états RNG (objets Python)
+    return torch.load(path, map_location=device, weights_only=False)
+
+
+class CheckpointWriter:
+    """
+    Écrit les checkpoints dans un thread d'arrière-plan.
+
+    Un seul checkpoint par fichier est en attente : une sauvegarde plus
+    récente vers le même chemin remplace celle qui n'a pas encore été écrite.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def save(self, state, path):
+        """
+        Planifie l'écriture d'un checkpoint.
+
+        Les tensors sont copiés immédiatement sur le CPU : l'entraînement
+        peut modifier les poids pendant l'écriture.
+        """
+        path = str(path)
+        snapshot = _to_cpu(state)
+        with self._lock:
+            queued = path in self._pending
+            self._pending[path] = snapshot
+        if not queued:
+            self._queue.put(path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                if path is None:
+                    return
+                with self._lock:
+                    state = self._pending.pop(path)
+                save_atomic(state, path)
+            except Exception as e:
+                print(f"[ERREUR] Impossible d'ecrire le checkpoint {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        """Attend que tous les checkpoints planifiés soient écrits."""
+        self._queue.join()
+
+    def close(self):
+        """Écrit les checkpoints en attente et arrête le thread."""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,122 @@
+"""
+Entraînement data-parallel multi-processus (DistributedDataParallel).
+
+Compatible torchrun : le rang et la taille du groupe sont lus dans les
+variables d'environnement (RANK, WORLD_SIZE, LOCAL_RANK, LOCAL_WORLD_SIZE).
+Sans ces variables, l'entraînement reste mono-processus.
+
+    torchrun --standalone --nproc_per_node 8 src/training/train.py --config configs/config.yaml
+"""
+
+import os
+import builtins
+
+import torch
+import torch.distributed as dist
+
+
+class DistributedContext:
+    """Position du processus courant dans le groupe."""
+
+    def __init__(self, rank=0, world_size=1, local_rank=0):
+        self.rank = rank
+        self.world_size = world_size
+        self.local_rank = local_rank
+
+    @property
+    def enabled(self):
+        return self.world_size > 1
+
+    @property
+    def is_main(self):
+        """Seul le rang 0 logge dans MLflow et écrit les checkpoints."""
+        return self.rank == 0
+
+
+def available_cpus():
+    """Cœurs utilisables par le processus (affinité CPU si disponible, ex: taskset, cpuset)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def setup_distributed(config=None):
+    """
+    Initialise le groupe de processus si lancé via torchrun.
+
+    Les threads intra-op sont répartis entre les processus d'une machine :
+    torchrun fixe OMP_NUM_THREADS=1 par défaut, ce qui laisserait la plupart
+    des cœurs inutilisés.
+
+    Args:
+        config: Section training.distributed ({backend, threads_per_process})
+
+    Returns:
+        DistributedContext: Rang et taille du groupe
+    """
+    config = config or {}
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size <= 1:
+        return DistributedContext()
+
+    context = DistributedContext(
+        rank=int(os.environ['RANK']),
+        world_size=world_size,
+        local_rank=int(os.environ.get('LOCAL_RANK', 0))
+    )
+    backend = config.get('backend', 'gloo')
+    if backend == 'nccl':
+        # Un GPU par processus : device courant utilisé par les collectives NCCL
+        torch.cuda.set_device(context.local_rank)
+    if not dist.is_initialized():
+        dist.init_process_group(backend=backend)
+
+    threads = config.get('threads_per_process')
+    if not threads:
+        local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', world_size))
+        threads = max(1, available_cpus() // local_world_size)
+    torch.set_num_threads(threads)
+
+    # Un seul processus affiche les logs (print(..., force=True) pour forcer)
+    if not context.is_main:
+        _silence_print()
+    return context
+
+
+def _silence_print():
+    """Désactive print sur les rangs non principaux."""
+    builtin_print = builtins.print
+
+    def print(*args, **kwargs):
+        if kwargs.pop('force', False):
+            builtin_print(*args, **kwargs)
+
+    builtins.print = print
+
+
+def cleanup_distributed():
+    """Détruit le groupe de processus (fin d'entraînement)."""
+    if dist.is_initialized():
+        dist.barrier()
+        dist.destroy_process_group()
+
+
+def broadcast_flag(flag):
+    """
+    Décision du rang 0 partagée par tous les rangs (ex: arrêt sur budget de
+    temps, mesuré différemment par chaque processus).
+    """
+    if not dist.is_initialized():
+        return flag
+    # NCCL ne diffuse que des tensors sur GPU
+    device = 'cpu'
+    if dist.get_backend() == 'nccl':
+        device = torch.device('cuda', torch.cuda.current_device())
+    tensor = torch.tensor([int(flag)], device=device)
+    dist.broadcast(tensor, src=0)
+    return bool(tensor.item())
+
+
+def is_main_process():
+    """True hors mode distribué ou sur le rang 0."""
+    return not dist.is_initialized() or dist.get_rank() == 0
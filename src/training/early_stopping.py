@@ -0,0 +1,90 @@
+"""
+Critères d'arrêt anticipé de l'entraînement.
+
+- EarlyStopping : arrêt quand la métrique surveillée (val_accuracy ou
+  val_loss) ne s'améliore plus d'au moins min_delta pendant patience epochs
+- TimeBudget : arrêt avant une epoch qui dépasserait le budget de temps
+"""
+
+import time
+
+
+class EarlyStopping:
+    """Arrêt sur plateau de la métrique de validation."""
+
+    def __init__(self, monitor='val_accuracy', patience=3, min_delta=0.0, mode=None):
+        """
+        Args:
+            monitor: Métrique surveillée ('val_accuracy' ou 'val_loss')
+            patience: Epochs sans amélioration avant l'arrêt
+            min_delta: Amélioration minimale prise en compte
+            mode: 'max' ou 'min' (défaut: 'min' pour une loss, 'max' sinon)
+        """
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode or ('min' if 'loss' in monitor else 'max')
+        if self.mode not in ('min', 'max'):
+            raise ValueError(f"mode inconnu: {self.mode} (min ou max)")
+        self.best = None
+        self.epochs_without_improvement = 0
+
+    def _improved(self, value):
+        if self.best is None:
+            return True
+        if self.mode == 'max':
+            return value > self.best + self.min_delta
+        return value < self.best - self.min_delta
+
+    def step(self, metrics):
+        """
+        Met à jour le critère après une epoch.
+
+        Args:
+            metrics: Dictionnaire des métriques de l'epoch (contient monitor)
+
+        Returns:
+            bool: True si l'entraînement doit s'arrêter
+        """
+        value = metrics[self.monitor]
+        if self._improved(value):
+            self.best = value
+            self.epochs_without_improvement = 0
+        else:
+            self.epochs_without_improvement += 1
+        return self.epochs_without_improvement >= self.patience
+
+    def state_dict(self):
+        return {'best': self.best, 'epochs_without_improvement': self.epochs_without_improvement}
+
+    def load_state_dict(self, state):
+        if state:
+            self.best = state['best']
+            self.epochs_without_improvement = state['epochs_without_improvement']
+
+
+class TimeBudget:
+    """Budget de temps d'entraînement, vérifié entre deux epochs."""
+
+    def __init__(self, max_minutes):
+        """
+        Args:
+            max_minutes: Durée maximale en minutes (None = illimitée)
+        """
+        self.max_seconds = max_minutes * 60 if max_minutes else None
+        self.start = time.monotonic()
+        self.epoch_durations = []
+
+    def record_epoch(self, seconds):
+        self.epoch_durations.append(seconds)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def exhausted(self):
+        """True si l'epoch suivante (estimée par la plus longue) dépasserait le budget."""
+        if self.max_seconds is None:
+            return False
+        estimate = max(self.epoch_durations) if self.epoch_durations else 0.0
+        return self.elapsed + estimate > self.max_seconds
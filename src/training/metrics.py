@@ -0,0 +1,99 @@
+"""
+Accumulateur des métriques d'une epoch, conservé sur le device.
+
+La loss et la matrice de confusion sont additionnées dans des tensors sur
+le device d'entraînement : aucune synchronisation CPU/GPU ni conversion en
+liste Python à chaque batch. Les valeurs ne sont lues qu'à la demande (fin
+d'epoch ou barre de progression tous les N batchs).
+"""
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from sklearn.metrics import classification_report
+
+
+class MetricsAccumulator:
+    """Loss moyenne par batch, accuracy et matrice de confusion d'une epoch."""
+
+    def __init__(self, num_classes=None, device='cpu'):
+        """
+        Args:
+            num_classes: Nombre de classes (déduit des logits si None)
+            device: Device des tensors d'accumulation
+        """
+        self.device = torch.device(device)
+        self.num_classes = num_classes
+        self.loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+        self.num_batches = 0
+        self.confusion = None
+        if num_classes is not None:
+            self._init_confusion(num_classes)
+
+    def _init_confusion(self, num_classes):
+        self.num_classes = num_classes
+        self.confusion = torch.zeros(num_classes * num_classes, dtype=torch.int64, device=self.device)
+
+    @torch.no_grad()
+    def update(self, loss, outputs, labels):
+        """
+        Ajoute un batch (sans synchronisation).
+
+        Args:
+            loss: Loss moyenne du batch (tensor scalaire)
+            outputs: Logits (N, num_classes)
+            labels: Labels (N,)
+        """
+        if self.confusion is None:
+            self._init_confusion(outputs.size(1))
+        self.loss_sum += loss.detach().to(self.loss_sum.dtype)
+        self.num_batches += 1
+        preds = outputs.detach().argmax(dim=1)
+        # Index ligne = vrai label, colonne = prédiction
+        self.confusion += torch.bincount(labels * self.num_classes + preds,
+                                         minlength=self.num_classes * self.num_classes)
+
+    def all_reduce(self):
+        """Somme les métriques de tous les processus (mode distribué)."""
+        if not dist.is_initialized() or dist.get_world_size() == 1:
+            return
+        num_batches = torch.tensor(self.num_batches, dtype=torch.int64, device=self.device)
+        dist.all_reduce(self.loss_sum)
+        dist.all_reduce(num_batches)
+        if self.confusion is not None:
+            dist.all_reduce(self.confusion)
+        self.num_batches = int(num_batches.item())
+
+    @property
+    def loss(self):
+        """Loss moyenne par batch (lecture sur le CPU)."""
+        return self.loss_sum.item() / max(self.num_batches, 1)
+
+    def confusion_matrix(self):
+        """Matrice de confusion (num_classes, num_classes) en NumPy."""
+        if self.confusion is None:
+            return np.zeros((0, 0), dtype=np.int64)
+        return self.confusion.view(self.num_classes, self.num_classes).cpu().numpy()
+
+    @property
+    def accuracy(self):
+        matrix = self.confusion_matrix()
+        total = matrix.sum()
+        return float(np.trace(matrix) / total) if total else 0.0
+
+    def classification_report(self, digits=4, output_dict=False):
+        """
+        Rapport sklearn reconstruit depuis la matrice de confusion.
+
+        Identique à classification_report(labels, preds) : le rapport ne
+        dépend que des effectifs (vrai label, prédiction).
+
+        Args:
+            digits: Nombre de décimales du rapport texte
+            output_dict: Si True, retourne le rapport sous forme de dict
+        """
+        matrix = self.confusion_matrix()
+        true_ids, pred_ids = np.nonzero(matrix)
+        counts = matrix[true_ids, pred_ids]
+        return classification_report(np.repeat(true_ids, counts), np.repeat(pred_ids, counts),
+                                     digits=digits, output_dict=output_dict)
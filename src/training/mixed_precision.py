@@ -0,0 +1,122 @@
+"""
+Précision mixte et format channels_last pour l'entraînement.
+
+- CPU : autocast bfloat16 (gain avec AVX512-BF16 / AMX via oneDNN)
+- CUDA : autocast float16 avec GradScaler (bfloat16 sans scaler si demandé)
+
+Si le matériel ne supporte pas le type demandé, l'entraînement repasse en
+FP32 avec un avertissement au lieu d'échouer.
+"""
+
+import contextlib
+
+import torch
+
+
+def _bf16_supported(device):
+    """Indique si le bfloat16 est accéléré sur le device."""
+    if device.type == 'cuda':
+        return torch.cuda.is_bf16_supported()
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def _make_grad_scaler(device, enabled):
+    """GradScaler (torch.amp depuis 2.3, torch.cuda.amp avant)."""
+    if hasattr(torch.amp, 'GradScaler'):
+        return torch.amp.GradScaler(device.type, enabled=enabled)
+    return torch.cuda.amp.GradScaler(enabled=enabled)
+
+
+class MixedPrecision:
+    """
+    Réglages de précision d'un entraînement (section training.mixed_precision).
+
+    Encapsule autocast, le format mémoire des entrées et le pas
+    d'optimisation (avec mise à l'échelle du gradient en float16).
+    """
+
+    def __init__(self, config, device):
+        """
+        Args:
+            config: Section training.mixed_precision ({enabled, dtype, channels_last})
+            device: torch.device d'entraînement
+        """
+        config = config or {}
+        self.device = torch.device(device)
+        self.channels_last = bool(config.get('channels_last', False))
+        self.dtype = None
+
+        if config.get('enabled', False):
+            self.dtype = self._resolve_dtype(config.get('dtype', 'auto'))
+
+        self.scaler = _make_grad_scaler(self.device, enabled=self.dtype == torch.float16)
+
+    def _resolve_dtype(self, name):
+        """Choisit le type d'autocast, ou None (FP32) s'il n'est pas supporté."""
+        if name == 'auto':
+            name = 'float16' if self.device.type == 'cuda' else 'bfloat16'
+        if name not in ('bfloat16', 'float16'):
+            raise ValueError(f"dtype de précision mixte inconnu: {name} (bfloat16, float16 ou auto)")
+
+        if name == 'float16' and self.device.type != 'cuda':
+            print("[WARN] float16 n'est supporte que sur CUDA, entrainement en FP32")
+            return None
+        if name == 'bfloat16' and not _bf16_supported(self.device):
+            print(f"[WARN] bfloat16 non supporte sur {self.device}, entrainement en FP32")
+            return None
+
+        dtype = getattr(torch, name)
+        try:
+            # Vérifie qu'autocast fonctionne réellement sur ce device
+            with torch.autocast(device_type=self.device.type, dtype=dtype):
+                torch.nn.functional.conv2d(
+                    torch.ones(1, 3, 8, 8, device=self.device),
+                    torch.ones(4, 3, 3, 3, device=self.device)
+                )
+        except RuntimeError as e:
+            print(f"[WARN] autocast {name} indisponible ({e}), entrainement en FP32")
+            return None
+        return dtype
+
+    @property
+    def enabled(self):
+        return self.dtype is not None
+
+    @property
+    def name(self):
+        """Nom de la précision effective ('bfloat16', 'float16' ou 'float32')."""
+        return str(self.dtype or torch.float32).replace('torch.', '')
+
+    def prepare_model(self, model):
+        """Convertit le modèle au format mémoire choisi."""
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        return model
+
+    def prepare_inputs(self, images):
+        """Convertit un batch d'images au format mémoire choisi."""
+        if self.channels_last:
+            images = images.contiguous(memory_format=torch.channels_last)
+        return images
+
+    def autocast(self):
+        """Contexte autocast (sans effet en FP32)."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device.type, dtype=self.dtype)
+
+    def step(self, loss, optimizer):
+        """Backward + pas d'optimisation (gradient mis à l'échelle en float16)."""
+        self.scaler.scale(loss).backward()
+        self.scaler.step(optimizer)
+        self.scaler.update()
+
+    def state_dict(self):
+        return self.scaler.state_dict()
+
+    def load_state_dict(self, state):
+        if state:
+            self.scaler.load_state_dict(state)
@@ -4,21 +4,43 @@ Script d'entraînement pour le modèle de détection de maladies végétales.
 
 import os
 import sys
+import time
 import argparse
+import contextlib
 import yaml
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader
+from torch.utils.data.distributed import DistributedSampler
+from torch.nn.parallel import DistributedDataParallel
 from pathlib import Path
 import mlflow
 import mlflow.pytorch
 from tqdm import tqdm
 import numpy as np
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
 from src.models.resnet import create_resnet18
-from src.data.dataset import PlantDiseaseDataset
+from src.data.dataset import PlantDiseaseDataset, PackedPlantDiseaseDataset
+from src.data.preprocessing import get_uint8_transforms
+from src.data.augmentation import get_batch_augmentation
+from src.training.mixed_precision import MixedPrecision
+from src.training.metrics import MetricsAccumulator
+from src.training.checkpoint import (
+    CheckpointWriter,
+    save_atomic,
+    training_state,
+    restore_training_state,
+    load_checkpoint
+)
+from src.training.distributed import (
+    setup_distributed,
+    cleanup_distributed,
+    is_main_process,
+    broadcast_flag
+)
+from src.training.early_stopping import EarlyStopping, TimeBudget
+from src.training.artifacts import ArtifactUploader
 
 # Configurer l'encodage pour Windows
 if sys.platform == 'win32':
@@ -32,75 +54,159 @@ def load_config(config_path):
     return config
 
 
-def train_epoch(model, dataloader, criterion, optimizer, device):
-    """Entraîne le modèle pour une epoch."""
+def create_dataset(data_config, split, augmentation=False):
+    """
+    Crée le dataset d'un split (shards pré-décodés ou metadata.csv).
+    
+    Avec data.augmentation_mode: batch, le dataset d'entraînement retourne
+    des tensors uint8 non augmentés : l'augmentation est appliquée au batch
+    dans train_epoch.
+    """
+    use_packed = data_config.get('use_packed_shards', False)
+    transform = None
+    if augmentation and get_batch_augmentation(data_config) is not None:
+        tensor_input = use_packed or bool(data_config.get('cache_dir'))
+        transform = get_uint8_transforms(data_config['image_size'], tensor_input)
+    
+    if use_packed:
+        return PackedPlantDiseaseDataset(
+            processed_dir=data_config['processed_dir'],
+            split=split,
+            transform=transform,
+            image_size=data_config['image_size'],
+            augmentation=augmentation
+        )
+    return PlantDiseaseDataset(
+        metadata_path=data_config['metadata_path'],
+        split=split,
+        transform=transform,
+        image_size=data_config['image_size'],
+        augmentation=augmentation,
+        cache_dir=data_config.get('cache_dir')
+    )
+
+
+def create_dataloader(dataset, data_config, device, shuffle=False, sampler=None, batch_size=None):
+    """
+    Crée un DataLoader avec les réglages de data (num_workers, prefetch_factor,
+    persistent_workers), ajustables via scripts/tune_dataloader.py.
+    """
+    num_workers = data_config.get('num_workers', 2)
+    kwargs = {}
+    if num_workers > 0:
+        kwargs['prefetch_factor'] = data_config.get('prefetch_factor', 2)
+        kwargs['persistent_workers'] = data_config.get('persistent_workers', False)
+    return DataLoader(
+        dataset,
+        batch_size=batch_size or data_config['batch_size'],
+        shuffle=shuffle and sampler is None,
+        sampler=sampler,
+        num_workers=num_workers,
+        pin_memory=True if device.type == 'cuda' else False,
+        **kwargs
+    )
+
+
+def train_epoch(model, dataloader, criterion, optimizer, device, precision=None, log_interval=10,
+                augment=None):
+    """
+    Entraîne le modèle pour une epoch.
+    
+    Les métriques restent sur le device ; la loss affichée n'est relue
+    que tous les log_interval batchs. Le temps passé à attendre le
+    DataLoader est mesuré séparément du calcul. augment (BatchAugmentation)
+    est appliqué au batch uint8 sur le device.
+    
+    Returns:
+        tuple: (loss, accuracy, images par seconde, fraction du temps en attente des données)
+    """
+    precision = precision or MixedPrecision(None, device)
     model.train()
-    running_loss = 0.0
-    all_preds = []
-    all_labels = []
+    metrics = MetricsAccumulator(device=device)
+    data_time = 0.0
+    start = time.perf_counter()
+    step_end = start
     
-    pbar = tqdm(dataloader, desc="Training")
-    for images, labels in pbar:
+    pbar = tqdm(dataloader, desc="Training", disable=not is_main_process())
+    for step, (images, labels) in enumerate(pbar, 1):
+        # Attente du batch suivant (DataLoader trop lent si élevée)
+        data_time += time.perf_counter() - step_end
+        
         images = images.to(device)
+        if augment is not None:
+            images = augment(images)
+        images = precision.prepare_inputs(images)
         labels = labels.to(device)
         
         # Forward pass
         optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
+        with precision.autocast():
+            outputs = model(images)
+            loss = criterion(outputs, labels)
         
         # Backward pass
-        loss.backward()
-        optimizer.step()
+        precision.step(loss, optimizer)
         
         # Métriques
-        running_loss += loss.item()
-        _, preds = torch.max(outputs, 1)
-        all_preds.extend(preds.cpu().numpy())
-        all_labels.extend(labels.cpu().numpy())
+        metrics.update(loss, outputs, labels)
         
-        # Update progress bar
-        pbar.set_postfix({'loss': loss.item()})
+        # Update progress bar (loss locale au processus)
+        if log_interval and step % log_interval == 0:
+            elapsed = time.perf_counter() - start
+            pbar.set_postfix({'loss': metrics.loss, 'data': f"{data_time / elapsed:.0%}"})
+        
+        step_end = time.perf_counter()
+    
+    elapsed = time.perf_counter() - start
     
-    epoch_loss = running_loss / len(dataloader)
-    epoch_acc = accuracy_score(all_labels, all_preds)
+    # Mode distribué : métriques et débit sur l'ensemble des processus
+    metrics.all_reduce()
+    num_samples = int(metrics.confusion_matrix().sum())
+    samples_per_sec = num_samples / elapsed
     
-    return epoch_loss, epoch_acc
+    return metrics.loss, metrics.accuracy, samples_per_sec, data_time / elapsed
 
 
-def validate_epoch(model, dataloader, criterion, device):
-    """Valide le modèle pour une epoch."""
+def validate_epoch(model, dataloader, criterion, device, precision=None, log_interval=10):
+    """
+    Valide le modèle pour une epoch.
+    
+    Returns:
+        tuple: (loss, accuracy, MetricsAccumulator avec la matrice de confusion)
+    """
+    precision = precision or MixedPrecision(None, device)
     model.eval()
-    running_loss = 0.0
-    all_preds = []
-    all_labels = []
+    metrics = MetricsAccumulator(device=device)
     
     with torch.no_grad():
-        pbar = tqdm(dataloader, desc="Validation")
-        for images, labels in pbar:
-            images = images.to(device)
+        pbar = tqdm(dataloader, desc="Validation", disable=not is_main_process())
+        for step, (images, labels) in enumerate(pbar, 1):
+            images = precision.prepare_inputs(images.to(device))
             labels = labels.to(device)
             
             # Forward pass
-            outputs = model(images)
-            loss = criterion(outputs, labels)
+            with precision.autocast():
+                outputs = model(images)
+                loss = criterion(outputs, labels)
             
             # Métriques
-            running_loss += loss.item()
-            _, preds = torch.max(outputs, 1)
-            all_preds.extend(preds.cpu().numpy())
-            all_labels.extend(labels.cpu().numpy())
+            metrics.update(loss, outputs, labels)
             
-            pbar.set_postfix({'loss': loss.item()})
-    
-    epoch_loss = running_loss / len(dataloader)
-    epoch_acc = accuracy_score(all_labels, all_preds)
+            if log_interval and step % log_interval == 0:
+                pbar.set_postfix({'loss': metrics.loss})
     
-    return epoch_loss, epoch_acc, all_preds, all_labels
+    metrics.all_reduce()
+    return metrics.loss, metrics.accuracy, metrics
 
 
-def train(config_path):
-    """Fonction principale d'entraînement."""
+def train(config_path, resume=False):
+    """
+    Fonction principale d'entraînement.
+    
+    Args:
+        config_path: Chemin vers le fichier de configuration
+        resume: Reprendre depuis le dernier checkpoint (même run MLflow)
+    """
     # Charger la configuration
     config = load_config(config_path)
     data_config = config['data']
@@ -108,60 +214,107 @@ def train(config_path):
     training_config = config['training']
     mlflow_config = config['mlflow']
     
+    # Budget de temps (training.max_duration_minutes), chargement compris
+    time_budget = TimeBudget(training_config.get('max_duration_minutes'))
+    
+    # Mode distribué (torchrun) : un processus par rang
+    dist_context = setup_distributed(training_config.get('distributed'))
+    
     # Device
     device = torch.device(training_config.get('device', 'cuda' if torch.cuda.is_available() else 'cpu'))
+    if dist_context.enabled and device.type == 'cuda':
+        device = torch.device('cuda', dist_context.local_rank)
     print(f"Utilisation du device: {device}")
+    if dist_context.enabled:
+        print(f"Mode distribue: {dist_context.world_size} processus, "
+              f"{torch.get_num_threads()} threads par processus")
+    
+    # Précision mixte / channels_last (repli en FP32 si non supporté)
+    precision = MixedPrecision(training_config.get('mixed_precision'), device)
+    print(f"Precision: {precision.name}, channels_last: {precision.channels_last}")
     
     # Créer les répertoires
     save_dir = Path(training_config['save_dir'])
     save_dir.mkdir(parents=True, exist_ok=True)
+    last_checkpoint_path = save_dir / "last_checkpoint.pth"
     
-    # MLflow
-    mlflow.set_tracking_uri(mlflow_config['tracking_uri'])
-    mlflow.set_experiment(mlflow_config['experiment_name'])
+    # Reprise : dernier checkpoint complet
+    resume_state = None
+    if resume:
+        if last_checkpoint_path.exists():
+            resume_state = load_checkpoint(last_checkpoint_path, device)
+            print(f"[INFO] Reprise depuis {last_checkpoint_path} (epoch {resume_state['epoch'] + 1} terminee)")
+        else:
+            print(f"[WARN] Aucun checkpoint dans {last_checkpoint_path}, entrainement depuis le debut")
     
-    with mlflow.start_run():
-        # Log des paramètres
-        mlflow.log_params({
-            'model_name': model_config['name'],
-            'num_classes': model_config['num_classes'],
-            'pretrained': model_config['pretrained'],
-            'batch_size': data_config['batch_size'],
-            'learning_rate': training_config['learning_rate'],
-            'num_epochs': training_config['num_epochs'],
-            'image_size': data_config['image_size']
-        })
+    # MLflow (rang 0 uniquement)
+    run_context = contextlib.nullcontext()
+    if dist_context.is_main:
+        mlflow.set_tracking_uri(mlflow_config['tracking_uri'])
+        mlflow.set_experiment(mlflow_config['experiment_name'])
+        run_id = resume_state.get('mlflow_run_id') if resume_state else None
+        run_context = mlflow.start_run(run_id=run_id)
+    
+    # Learning rate mis à l'échelle du batch global
+    learning_rate = training_config['learning_rate']
+    distributed_config = training_config.get('distributed') or {}
+    if dist_context.enabled and distributed_config.get('scale_lr', True):
+        learning_rate *= dist_context.world_size
+    
+    # Arrêt anticipé sur la métrique de validation (training.early_stopping)
+    early_stopping_config = training_config.get('early_stopping') or {}
+    early_stopping = None
+    if early_stopping_config.get('enabled', False):
+        early_stopping = EarlyStopping(
+            monitor=early_stopping_config.get('monitor', 'val_accuracy'),
+            patience=early_stopping_config.get('patience', 3),
+            min_delta=early_stopping_config.get('min_delta', 0.0)
+        )
+    
+    with run_context as run:
+        # Log des paramètres (déjà loggés si le run est repris)
+        if dist_context.is_main and resume_state is None:
+            mlflow.log_params({
+                'model_name': model_config['name'],
+                'num_classes': model_config['num_classes'],
+                'pretrained': model_config['pretrained'],
+                'batch_size': data_config['batch_size'],
+                'num_workers': data_config.get('num_workers', 2),
+                'prefetch_factor': data_config.get('prefetch_factor', 2),
+                'augmentation_mode': data_config.get('augmentation_mode', 'per_image'),
+                'learning_rate': learning_rate,
+                'world_size': dist_context.world_size,
+                'num_epochs': training_config['num_epochs'],
+                'image_size': data_config['image_size'],
+                'precision': precision.name,
+                'channels_last': precision.channels_last,
+                'early_stopping': early_stopping is not None,
+                'early_stopping_monitor': early_stopping.monitor if early_stopping else None,
+                'early_stopping_patience': early_stopping.patience if early_stopping else None,
+                'early_stopping_min_delta': early_stopping.min_delta if early_stopping else None,
+                'max_duration_minutes': training_config.get('max_duration_minutes')
+            })
         
         # Datasets
         print("Chargement des datasets...")
-        train_dataset = PlantDiseaseDataset(
-            metadata_path=data_config['metadata_path'],
-            split='train',
-            image_size=data_config['image_size'],
-            augmentation=True
-        )
-        val_dataset = PlantDiseaseDataset(
-            metadata_path=data_config['metadata_path'],
-            split='val',
-            image_size=data_config['image_size'],
-            augmentation=False
-        )
+        train_dataset = create_dataset(data_config, 'train', augmentation=True)
+        val_dataset = create_dataset(data_config, 'val', augmentation=False)
+        
+        # Samplers : chaque rang traite une partie des données (batch_size par processus)
+        train_sampler = None
+        val_sampler = None
+        if dist_context.enabled:
+            train_sampler = DistributedSampler(train_dataset, shuffle=True)
+            # Validation répartie sans doublons (métriques exactes après all_reduce)
+            val_sampler = range(dist_context.rank, len(val_dataset), dist_context.world_size)
+        
+        # Augmentation par batch (data.augmentation_mode: batch), sinon par image
+        augment = get_batch_augmentation(data_config)
         
         # DataLoaders
-        train_loader = DataLoader(
-            train_dataset,
-            batch_size=data_config['batch_size'],
-            shuffle=True,
-            num_workers=2,
-            pin_memory=True if device.type == 'cuda' else False
-        )
-        val_loader = DataLoader(
-            val_dataset,
-            batch_size=data_config['batch_size'],
-            shuffle=False,
-            num_workers=2,
-            pin_memory=True if device.type == 'cuda' else False
-        )
+        train_loader = create_dataloader(train_dataset, data_config, device, shuffle=True,
+                                         sampler=train_sampler)
+        val_loader = create_dataloader(val_dataset, data_config, device, sampler=val_sampler)
         
         print(f"Train: {len(train_dataset)} images")
         print(f"Val: {len(val_dataset)} images")
@@ -172,161 +325,189 @@ def train(config_path):
             num_classes=model_config['num_classes'],
             pretrained=model_config['pretrained']
         )
-        model = model.to(device)
+        model = precision.prepare_model(model.to(device))
+        
+        # Modèle sans wrapper DDP : state_dict sans préfixe 'module.'
+        raw_model = model
+        if dist_context.enabled:
+            model = DistributedDataParallel(
+                model, device_ids=[device.index] if device.type == 'cuda' else None
+            )
         
         # Loss et Optimizer
         criterion = nn.CrossEntropyLoss()
-        optimizer = optim.Adam(model.parameters(), lr=training_config['learning_rate'])
+        optimizer = optim.Adam(model.parameters(), lr=learning_rate)
         scheduler = optim.lr_scheduler.StepLR(optimizer, step_size=7, gamma=0.1)
         
         # Entraînement
         best_val_acc = 0.0
+        start_epoch = 0
+        val_metrics = None
+        log_interval = training_config.get('log_interval', 10)
+        checkpoint_interval = training_config.get('checkpoint_interval', 1)
         best_model_path = save_dir / "best_model.pth"
+        checkpoint_writer = CheckpointWriter()
+        artifact_uploader = None
+        if dist_context.is_main:
+            artifact_uploader = ArtifactUploader(run.info.run_id, save_dir / ".mlflow_upload")
+        # model/model.pth (get_latest_model.py) et, si demandé, l'ancien chemin checkpoint/
+        artifact_targets = [('model.pth', 'model')]
+        if mlflow_config.get('upload_checkpoint_copy', False):
+            artifact_targets.append(('best_model.pth', 'checkpoint'))
+        stop_reason = 'completed'
+        epochs_run = 0
+        
+        if resume_state is not None:
+            restore_training_state(resume_state, raw_model, optimizer, scheduler, precision)
+            best_val_acc = resume_state['best_val_acc']
+            start_epoch = resume_state['epoch'] + 1
+            epochs_run = start_epoch
+            if early_stopping is not None:
+                early_stopping.load_state_dict(resume_state.get('early_stopping_state'))
+            # Un run arrêté par early stopping est terminé ; un budget de temps se reprend
+            if resume_state.get('stop_reason') == 'early_stopping':
+                print("[INFO] Run deja arrete par early stopping, rien a reprendre")
+                stop_reason = 'early_stopping'
+                start_epoch = training_config['num_epochs']
+            resume_state = None
         
         print("\nDébut de l'entraînement...")
-        for epoch in range(training_config['num_epochs']):
+        for epoch in range(start_epoch, training_config['num_epochs']):
             print(f"\nEpoch {epoch+1}/{training_config['num_epochs']}")
+            epoch_start = time.monotonic()
+            if train_sampler is not None:
+                train_sampler.set_epoch(epoch)
             
             # Train
-            train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device)
+            train_loss, train_acc, samples_per_sec, data_wait = train_epoch(
+                model, train_loader, criterion, optimizer, device, precision, log_interval,
+                augment
+            )
             
             # Validation
-            val_loss, val_acc, val_preds, val_labels = validate_epoch(model, val_loader, criterion, device)
+            val_loss, val_acc, val_metrics = validate_epoch(
+                model, val_loader, criterion, device, precision, log_interval
+            )
             
             # Learning rate scheduler
             scheduler.step()
             current_lr = optimizer.param_groups[0]['lr']
             
             # Log MLflow
-            mlflow.log_metrics({
-                'train_loss': train_loss,
-                'train_accuracy': train_acc,
-                'val_loss': val_loss,
-                'val_accuracy': val_acc,
-                'learning_rate': current_lr
-            }, step=epoch)
+            if dist_context.is_main:
+                mlflow.log_metrics({
+                    'train_loss': train_loss,
+                    'train_accuracy': train_acc,
+                    'val_loss': val_loss,
+                    'val_accuracy': val_acc,
+                    'learning_rate': current_lr,
+                    'train_samples_per_sec': samples_per_sec,
+                    'train_data_wait_fraction': data_wait
+                }, step=epoch)
             
-            print(f"Train Loss: {train_loss:.4f}, Train Acc: {train_acc:.4f}")
+            print(f"Train Loss: {train_loss:.4f}, Train Acc: {train_acc:.4f} "
+                  f"({samples_per_sec:.1f} images/s, attente donnees {data_wait:.0%})")
+            if data_wait > 0.2:
+                print("[WARN] Entrainement limite par le chargement des donnees "
+                      "(voir scripts/tune_dataloader.py)")
             print(f"Val Loss: {val_loss:.4f}, Val Acc: {val_acc:.4f}")
             print(f"LR: {current_lr:.6f}")
             
-            # Sauvegarder le meilleur modèle
-            if val_acc > best_val_acc:
+            # Sauvegarder le meilleur modèle (rang 0), sérialisé une seule fois
+            if val_acc > best_val_acc and dist_context.is_main:
                 best_val_acc = val_acc
-                torch.save({
+                save_atomic({
                     'epoch': epoch,
-                    'model_state_dict': model.state_dict(),
-                    'optimizer_state_dict': optimizer.state_dict(),
+                    'model_state_dict': raw_model.state_dict(),
                     'val_acc': val_acc,
                     'num_classes': model_config['num_classes']
                 }, best_model_path)
                 print(f"[OK] Meilleur modele sauvegarde (Val Acc: {val_acc:.4f})")
                 
-                # Log le modèle dans MLflow (à chaque amélioration)
-                # Enregistrer directement comme artifact (évite le Model Registry)
-                try:
-                    # Vérifier que le fichier checkpoint existe
-                    if not best_model_path.exists():
-                        print(f"[ERREUR] Le fichier {best_model_path} n'existe pas!")
-                        raise FileNotFoundError(f"Checkpoint file not found: {best_model_path}")
-                    
-                    # Sauvegarder aussi le modèle complet dans un fichier temporaire
-                    import tempfile
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        # Sauvegarder le modèle PyTorch complet
-                        model_path = Path(tmpdir) / "model.pth"
-                        torch.save({
-                            'model_state_dict': model.state_dict(),
-                            'num_classes': model_config['num_classes'],
-                            'val_acc': val_acc,
-                            'epoch': epoch
-                        }, model_path)
-                        
-                        # Vérifier que le fichier a été créé
-                        if not model_path.exists():
-                            raise FileNotFoundError(f"Model file not created: {model_path}")
-                        
-                        print(f"[INFO] Enregistrement du modele dans MLflow...")
-                        print(f"       Model path: {model_path} (exists: {model_path.exists()})")
-                        print(f"       Checkpoint path: {best_model_path} (exists: {best_model_path.exists()})")
-                        
-                        # Enregistrer comme artifact dans MLflow
-                        mlflow.log_artifact(str(model_path), "model")
-                        print(f"[OK] Model artifact logged: model/model.pth")
-                        
-                        # Enregistrer aussi le checkpoint pour compatibilité
-                        mlflow.log_artifact(str(best_model_path), "checkpoint")
-                        print(f"[OK] Checkpoint artifact logged: checkpoint/best_model.pth")
-                        
-                    print(f"[OK] Modele enregistre dans MLflow (Val Acc: {val_acc:.4f})")
-                except Exception as e:
-                    import traceback
-                    print(f"[ERREUR] Impossible d'enregistrer le modele dans MLflow: {e}")
-                    print(f"[DEBUG] Traceback:")
-                    traceback.print_exc()
-                    print("[INFO] Le modele est sauvegarde localement dans models/best_model.pth")
+                # Envoi MLflow en arrière-plan (seul le dernier meilleur modèle en attente est envoyé)
+                artifact_uploader.submit('best_model', best_model_path, artifact_targets)
+            
+            # Critères d'arrêt : métriques déjà agrégées (identiques sur tous les rangs),
+            # budget de temps décidé par le rang 0
+            epochs_run = epoch + 1
+            last_epoch = epoch == training_config['num_epochs'] - 1
+            time_budget.record_epoch(time.monotonic() - epoch_start)
+            if early_stopping is not None and early_stopping.step(
+                    {'val_loss': val_loss, 'val_accuracy': val_acc}):
+                stop_reason = 'early_stopping'
+                print(f"[INFO] Early stopping: {early_stopping.monitor} sans amelioration "
+                      f"depuis {early_stopping.patience} epochs")
+            elif not last_epoch and broadcast_flag(time_budget.exhausted()):
+                stop_reason = 'time_budget'
+                print(f"[INFO] Budget de temps atteint ({time_budget.elapsed / 60:.1f} min), "
+                      f"arret avant l'epoch {epoch + 2}")
+            stopping = stop_reason != 'completed'
+            
+            # Dernier checkpoint complet (écrit en arrière-plan)
+            periodic = (epoch + 1) % checkpoint_interval == 0
+            if dist_context.is_main and (last_epoch or stopping or periodic):
+                checkpoint_writer.save({
+                    'epoch': epoch,
+                    **training_state(raw_model, optimizer, scheduler, precision),
+                    'best_val_acc': best_val_acc,
+                    'early_stopping_state': early_stopping.state_dict() if early_stopping else None,
+                    'stop_reason': stop_reason,
+                    'mlflow_run_id': run.info.run_id,
+                    'num_classes': model_config['num_classes']
+                }, last_checkpoint_path)
+            
+            if stopping:
+                break
+        
+        checkpoint_writer.close()
+        if artifact_uploader is not None:
+            # Envois MLflow en attente (dernier meilleur modèle) avant la fin du run
+            artifact_uploader.close()
+        
+        # Fin du mode distribué : la suite (MLflow, rapport) ne concerne que le rang 0
+        cleanup_distributed()
+        if not dist_context.is_main:
+            return
         
         print(f"\n[OK] Entrainement termine!")
         print(f"Meilleure validation accuracy: {best_val_acc:.4f}")
+        # Comparaison entre runs (précision FP32 / bf16 / fp16)
+        mlflow.log_metric('best_val_accuracy', best_val_acc)
+        # Raison de l'arrêt (tag : modifiable si le run est repris)
+        epochs_saved = training_config['num_epochs'] - epochs_run
+        mlflow.set_tag('stop_reason', stop_reason)
+        mlflow.log_metrics({'epochs_run': epochs_run, 'epochs_saved': epochs_saved})
+        if stop_reason != 'completed':
+            print(f"Arret anticipe ({stop_reason}): {epochs_run} epochs, {epochs_saved} epochs economisees")
         print(f"Modèle sauvegardé dans: {best_model_path}")
         
-        # S'assurer que le modèle final est toujours enregistré dans MLflow
-        # (au cas où aucun modèle n'a été enregistré pendant l'entraînement)
-        print("Verification de l'enregistrement du modele final dans MLflow...")
-        
-        # Vérifier si le modèle a déjà été enregistré
-        try:
-            # Charger le meilleur checkpoint et enregistrer dans MLflow
-            checkpoint = torch.load(best_model_path, map_location=device)
-            model.load_state_dict(checkpoint['model_state_dict'])
-            
-            # Enregistrer le modèle final dans MLflow (méthode directe sans Model Registry)
-            try:
-                # Vérifier que le fichier existe
-                if not best_model_path.exists():
-                    print(f"[ATTENTION] Le fichier {best_model_path} n'existe pas pour l'enregistrement final")
-                else:
-                    import tempfile
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        # Sauvegarder le modèle PyTorch complet
-                        model_path = Path(tmpdir) / "model.pth"
-                        torch.save({
-                            'model_state_dict': model.state_dict(),
-                            'num_classes': model_config['num_classes'],
-                            'val_acc': best_val_acc,
-                            'epoch': checkpoint.get('epoch', 0)
-                        }, model_path)
-                        
-                        print(f"[INFO] Enregistrement final du modele dans MLflow...")
-                        
-                        # Enregistrer comme artifact dans MLflow
-                        mlflow.log_artifact(str(model_path), "model")
-                        mlflow.log_artifact(str(best_model_path), "checkpoint")
-                        
-                    print(f"[OK] Modele final enregistre dans MLflow avec succes!")
-                    print(f"[INFO] Les artifacts seront visibles une fois le run termine.")
-            except Exception as e:
-                import traceback
-                print(f"[ATTENTION] Erreur lors de l'enregistrement final dans MLflow: {e}")
-                traceback.print_exc()
-                print("Le modèle devrait avoir été enregistré pendant l'entraînement.")
-            
-        except Exception as e:
-            print(f"[ATTENTION] Erreur lors de l'enregistrement final dans MLflow: {e}")
-            print("Le modèle devrait avoir été enregistré pendant l'entraînement.")
+        # Temps d'entraînement et d'envoi des artifacts (arrière-plan) mesurés séparément
+        train_seconds = sum(time_budget.epoch_durations)
+        mlflow.log_metrics({
+            'train_seconds': train_seconds,
+            'artifact_upload_seconds': artifact_uploader.upload_seconds,
+            'artifact_uploads': artifact_uploader.uploads,
+            'artifact_uploads_coalesced': artifact_uploader.coalesced
+        })
+        print(f"Temps d'entrainement: {train_seconds:.1f} s, envoi MLflow (arriere-plan): "
+              f"{artifact_uploader.upload_seconds:.1f} s ({artifact_uploader.uploads} envois, "
+              f"{artifact_uploader.coalesced} remplaces avant envoi)")
         
         # Rapport final sur validation
-        print("\nRapport de classification (validation):")
-        print(classification_report(val_labels, val_preds, digits=4))
+        if val_metrics is not None:
+            print("\nRapport de classification (validation):")
+            print(val_metrics.classification_report(digits=4))
 
 
 def main():
     parser = argparse.ArgumentParser(description='Entraîner le modèle de détection de maladies végétales')
     parser.add_argument('--config', type=str, default='configs/config.yaml',
                        help='Chemin vers le fichier de configuration')
+    parser.add_argument('--resume', action='store_true',
+                       help='Reprendre depuis models/last_checkpoint.pth (même run MLflow)')
     args = parser.parse_args()
     
-    train(args.config)
+    train(args.config, resume=args.resume)
 
 
 if __name__ == "__main__":
@@ -99,6 +99,156 @@ def test_model_functionality():
         return False
 
 
+def test_torchscript_export():
+    """Test de l'export TorchScript (parité avec le modèle eager)."""
+    print("\n" + "=" * 60)
+    print("TESTS D'EXPORT TORCHSCRIPT")
+    print("=" * 60)
+    
+    try:
+        import tempfile
+        import torch
+        from src.models.resnet import create_resnet18
+        from src.models.export import export_torchscript, load_torchscript, check_parity
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoint_path = Path(tmpdir) / "model.pth"
+            output_path = Path(tmpdir) / "model.pt"
+            model = create_resnet18(num_classes=10, pretrained=False)
+            torch.save({'model_state_dict': model.state_dict(), 'num_classes': 10}, checkpoint_path)
+            
+            print("  Test: Export TorchScript...")
+            eager, _ = export_torchscript(checkpoint_path, output_path, image_size=64)
+            exported, metadata = load_torchscript(output_path)
+            if metadata.get('num_classes') != 10:
+                print(f"    [ERREUR] Metadonnees incorrectes: {metadata}")
+                return False
+            print("    [OK] Modele exporte et recharge")
+            
+            print("  Test: Parite eager / TorchScript...")
+            parity = check_parity(eager, exported, image_size=64, batch_sizes=(1, 3))
+            if parity['max_abs_diff'] < 1e-4 and parity['top1_agreement'] == 1.0:
+                print(f"    [OK] Ecart max: {parity['max_abs_diff']:.2e}")
+            else:
+                print(f"    [ERREUR] Parite non respectee: {parity}")
+                return False
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_inference_backends():
+    """Test de parité des backends d'inférence (torch, torchscript, onnx)."""
+    print("\n" + "=" * 60)
+    print("TESTS DES BACKENDS D'INFERENCE")
+    print("=" * 60)
+    
+    try:
+        import importlib.util
+        import tempfile
+        import torch
+        from src.models.resnet import create_resnet18
+        from src.models.export import export_torchscript, export_onnx, check_parity
+        from src.inference.backends import create_backend
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoint_path = Path(tmpdir) / "model.pth"
+            model = create_resnet18(num_classes=10, pretrained=False)
+            torch.save({'model_state_dict': model.state_dict(), 'num_classes': 10}, checkpoint_path)
+            
+            reference = create_backend('torch', checkpoint_path)
+            exported = {'torchscript': Path(tmpdir) / "model.pt"}
+            export_torchscript(checkpoint_path, exported['torchscript'], image_size=64)
+            
+            if importlib.util.find_spec("onnx") and importlib.util.find_spec("onnxruntime"):
+                exported['onnx'] = Path(tmpdir) / "model.onnx"
+                export_onnx(checkpoint_path, exported['onnx'], image_size=64)
+            else:
+                print("  [INFO] onnx/onnxruntime non installes, backend onnx ignore")
+            
+            for name, path in exported.items():
+                print(f"  Test: Parite torch / {name}...")
+                backend = create_backend('auto', path)
+                if backend.name != name or backend.num_classes != 10:
+                    print(f"    [ERREUR] Backend detecte: {backend.name}, classes: {backend.num_classes}")
+                    return False
+                parity = check_parity(reference, backend, image_size=64, batch_sizes=(1, 3))
+                if parity['max_abs_diff'] < 1e-4 and parity['top1_agreement'] == 1.0:
+                    print(f"    [OK] Ecart max: {parity['max_abs_diff']:.2e}")
+                else:
+                    print(f"    [ERREUR] Parite non respectee: {parity}")
+                    return False
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_int8_quantization():
+    """Test de la quantification INT8 statique (FX) rechargée via TorchScriptBackend."""
+    print("\n" + "=" * 60)
+    print("TESTS DE QUANTIFICATION INT8")
+    print("=" * 60)
+    
+    try:
+        import tempfile
+        import torch
+        from torch.utils.data import DataLoader, TensorDataset
+        from src.models.resnet import create_resnet18
+        from src.models.export import check_parity
+        from src.models.quantization import quantize_static, save_quantized
+        from src.inference.backends import TorchScriptBackend
+        
+        engines = torch.backends.quantized.supported_engines
+        engine = next((e for e in ('x86', 'fbgemm', 'qnnpack') if e in engines), None)
+        if engine is None:
+            print("  [INFO] Aucun moteur de quantification disponible, test ignore")
+            return True
+        
+        torch.manual_seed(0)
+        model = create_resnet18(num_classes=4, pretrained=False).eval()
+        generator = torch.Generator().manual_seed(1)
+        calibration = TensorDataset(
+            torch.randn(32, 3, 64, 64, generator=generator),
+            torch.zeros(32, dtype=torch.long)
+        )
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "model_int8.pt"
+            
+            print(f"  Test: Calibration et export INT8 ({engine})...")
+            quantized = quantize_static(model, DataLoader(calibration, batch_size=8),
+                                        image_size=64, backend=engine)
+            save_quantized(quantized, output_path, image_size=64,
+                           metadata={'num_classes': 4}, backend=engine)
+            backend = TorchScriptBackend(output_path)
+            if backend.num_classes != 4:
+                print(f"    [ERREUR] Metadonnees incorrectes: {backend.num_classes} classes")
+                return False
+            print("    [OK] Modele INT8 exporte et recharge")
+            
+            print("  Test: Sorties INT8 / FP32...")
+            logits = backend(torch.randn(3, 3, 64, 64))
+            if tuple(logits.shape) != (3, 4):
+                print(f"    [ERREUR] Forme de sortie incorrecte: {tuple(logits.shape)}")
+                return False
+            parity = check_parity(model, backend, image_size=64, batch_sizes=(1, 16, 16))
+            if parity['top1_agreement'] >= 0.9:
+                print(f"    [OK] Accord top-1: {parity['top1_agreement']:.2f}, "
+                      f"ecart max: {parity['max_abs_diff']:.2e}")
+            else:
+                print(f"    [ERREUR] Accord top-1 insuffisant: {parity}")
+                return False
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
 def test_preprocessing():
     """Test du preprocessing."""
     print("\n" + "=" * 60)
@@ -127,6 +277,849 @@ def test_preprocessing():
             print(f"    [ERREUR] Shape attendu {expected_shape}, obtenu {tensor.shape}")
             return False
         
+        print("  Test: PreprocessingEngine vs Compose...")
+        from src.data.preprocessing import PreprocessingEngine
+        img = Image.new('RGB', (256, 240), color=(30, 120, 60))
+        reference = transform(img).unsqueeze(0)
+        result = PreprocessingEngine(224).normalize([img.resize((224, 224), Image.BILINEAR)])
+        max_diff = float((reference - result).abs().max())
+        if max_diff < 1e-4:
+            print(f"    [OK] Ecart max: {max_diff:.2e}")
+        else:
+            print(f"    [ERREUR] Ecart max trop grand: {max_diff:.2e}")
+            return False
+        
+        print("  Test: cache d'images decodees vs chemin sans cache...")
+        import os
+        import tempfile
+        import numpy as np
+        import torch
+        from src.data.image_cache import DecodedImageCache
+        rng = np.random.default_rng(0)
+        # Assez grande pour que le mode draft JPEG réduise l'image au décodage
+        img = Image.fromarray(rng.integers(0, 256, (768, 1024, 3), dtype=np.uint8))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image_path = Path(tmpdir) / "image.jpg"
+            img.save(image_path, format='JPEG', quality=90)
+            cache = DecodedImageCache(Path(tmpdir) / "cache", [image_path], 224)
+            cached = torch.from_numpy(np.array(cache.get(0, image_path))).permute(2, 0, 1)
+            reference = transform(Image.open(image_path).convert('RGB'))
+            result = get_transforms(224, False, tensor_input=True)(cached)
+            
+            # Image remplacée sous le même chemin : décodée à nouveau
+            Image.new('RGB', (300, 200), color=(200, 10, 10)).save(image_path, format='JPEG')
+            os.utime(image_path, ns=(0, 0))
+            refreshed = DecodedImageCache(Path(tmpdir) / "cache", [image_path], 224)
+            stale = not np.array_equal(refreshed.get(0, image_path),
+                                       np.asarray(Image.open(image_path).convert('RGB').resize((224, 224), Image.BILINEAR)))
+        max_diff = float((reference - result).abs().max())
+        if max_diff < 1e-5:
+            print(f"    [OK] Ecart max: {max_diff:.2e}")
+        else:
+            print(f"    [ERREUR] Redimensionnement du cache different de get_transforms: {max_diff:.2e}")
+            return False
+        if stale:
+            print("    [ERREUR] Pixels perimes apres remplacement de l'image source")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_prediction_cache():
+    """Test du cache des prédictions."""
+    print("\n" + "=" * 60)
+    print("TESTS DU CACHE DE PREDICTIONS")
+    print("=" * 60)
+    
+    try:
+        from src.inference.cache import PredictionCache
+        
+        print("  Test: hit/miss et version du modele...")
+        cache = PredictionCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+        key = PredictionCache.make_key(b"image", 3, "v1")
+        cache.put(key, {'prediction': 'a', 'confidence': 0.9})
+        if cache.get(key) != {'prediction': 'a', 'confidence': 0.9}:
+            print("    [ERREUR] Resultat en cache incorrect")
+            return False
+        if cache.get(PredictionCache.make_key(b"image", 3, "v2")) is not None:
+            print("    [ERREUR] Une autre version du modele ne doit pas toucher le cache")
+            return False
+        print("    [OK] Hit/miss corrects")
+        
+        print("  Test: eviction LRU...")
+        cache.put(PredictionCache.make_key(b"b", 3, "v1"), {'prediction': 'b'})
+        cache.put(PredictionCache.make_key(b"c", 3, "v1"), {'prediction': 'c'})
+        if len(cache) != 2 or cache.get(key) is not None:
+            print("    [ERREUR] L'entree la plus ancienne aurait du etre evincee")
+            return False
+        print("    [OK] Eviction correcte")
+        
+        print("  Test: invalidation...")
+        cache.clear()
+        if len(cache) != 0:
+            print("    [ERREUR] Cache non vide apres clear()")
+            return False
+        print("    [OK] Cache invalide")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+class _StubPredictor:
+    """Predictor factice : la prédiction est le contenu de l'image, b'bad...' est illisible."""
+    
+    model_version = 'stub'
+    
+    def __init__(self, release=None):
+        self.release = release
+        self.batch_sizes = []
+    
+    def preprocess_batch(self, images, parallel=False, timings=None):
+        errors = {i: ValueError("image illisible") for i, data in enumerate(images) if data.startswith(b'bad')}
+        return [data for i, data in enumerate(images) if i not in errors], errors
+    
+    def predict_tensor(self, batch, top_k=3, timings=None):
+        self.batch_sizes.append(len(batch))
+        return [{'prediction': data.decode(), 'top_k': k, 'confidence': 1.0} for data, k in zip(batch, top_k)]
+    
+    def predict(self, image_bytes, top_k=3, timings=None):
+        if self.release is not None:
+            self.release.wait(timeout=10)
+        return {'prediction': image_bytes.decode(), 'top_k': top_k, 'confidence': 1.0}
+    
+    def predict_batch(self, images, top_k=3):
+        return [self.predict(data, top_k) for data in images]
+
+
+def test_micro_batching():
+    """Test du micro-batching (predictor factice)."""
+    print("\n" + "=" * 60)
+    print("TESTS DU MICRO-BATCHING")
+    print("=" * 60)
+    
+    try:
+        import asyncio
+        from src.inference.executor import InferenceExecutor
+        from src.inference.batching import MicroBatcher
+        
+        async def scenario(predictor):
+            executor = InferenceExecutor(predictor, max_workers=1, max_queue_size=4)
+            batcher = MicroBatcher(executor, max_batch_size=4, max_wait_ms=50)
+            await batcher.start()
+            try:
+                images = [b'a', b'bad', b'c', b'd']
+                return await asyncio.gather(
+                    *[batcher.submit(data, top_k=i + 1) for i, data in enumerate(images)],
+                    return_exceptions=True
+                )
+            finally:
+                await batcher.stop()
+                executor.shutdown()
+        
+        print("  Test: un batch, resultats rendus a chaque requete...")
+        predictor = _StubPredictor()
+        outcomes = asyncio.run(scenario(predictor))
+        if predictor.batch_sizes != [3]:
+            print(f"    [ERREUR] Batchs attendus [3] (image illisible exclue), obtenus {predictor.batch_sizes}")
+            return False
+        for i, expected in ((0, 'a'), (2, 'c'), (3, 'd')):
+            if isinstance(outcomes[i], BaseException):
+                print(f"    [ERREUR] Requete {i}: {outcomes[i]}")
+                return False
+            result, timings = outcomes[i]
+            if result['prediction'] != expected or result['top_k'] != i + 1 or 'queue' not in timings:
+                print(f"    [ERREUR] Requete {i}: resultat d'une autre requete {result}")
+                return False
+        print("    [OK] Chaque requete recoit son resultat et son top_k")
+        
+        print("  Test: erreur isolee a l'image illisible...")
+        if not isinstance(outcomes[1], ValueError):
+            print(f"    [ERREUR] Exception attendue pour l'image illisible, obtenu {outcomes[1]}")
+            return False
+        print("    [OK] Les autres images du batch sont predites")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_inference_queue_full():
+    """Test de la file d'inférence bornée et des réponses 503 (predictor factice)."""
+    print("\n" + "=" * 60)
+    print("TESTS DE LA FILE D'INFERENCE")
+    print("=" * 60)
+    
+    try:
+        import asyncio
+        import threading
+        import time
+        from fastapi.testclient import TestClient
+        from prometheus_client import REGISTRY
+        from src.inference import api
+        from src.inference.executor import InferenceExecutor, InferenceQueueFull, predict_image
+        from src.inference.metrics import configure_latency_metrics
+        
+        release = threading.Event()
+        predictor = _StubPredictor(release)
+        executor = InferenceExecutor(predictor, max_workers=1, max_queue_size=1)
+        
+        # Deux jobs bloqués (un en cours, un en attente) dans une autre event loop
+        async def occupy():
+            return await asyncio.gather(*[executor.submit(predict_image, b'x', 1) for _ in range(2)])
+        worker = threading.Thread(target=lambda: asyncio.run(occupy()))
+        worker.start()
+        for _ in range(100):
+            if executor.pending == executor.capacity:
+                break
+            time.sleep(0.05)
+        
+        try:
+            print("  Test: soumission refusee quand la file est pleine...")
+            try:
+                asyncio.run(executor.submit(predict_image, b'y', 1))
+                print("    [ERREUR] InferenceQueueFull attendue")
+                return False
+            except InferenceQueueFull:
+                print("    [OK] InferenceQueueFull levee")
+            
+            print("  Test: 503 + Retry-After sur /predict et /predict/batch...")
+            configure_latency_metrics()
+            api.predictor, api.executor, api.batcher, api.cache = predictor, executor, None, None
+            client = TestClient(api.app)
+            
+            def errors():
+                return REGISTRY.get_sample_value('prediction_requests_total', {'status': 'error'}) or 0.0
+            
+            before = errors()
+            image = ('a.jpg', b'a', 'image/jpeg')
+            responses = [
+                client.post('/predict', files={'file': image}),
+                client.post('/predict/batch', files=[('files', image), ('files', image)])
+            ]
+            for response in responses:
+                if response.status_code != 503 or response.headers.get('retry-after') != '1':
+                    print(f"    [ERREUR] Reponse {response.status_code}, Retry-After {response.headers.get('retry-after')}")
+                    return False
+            if errors() - before != 3:
+                print(f"    [ERREUR] Rejets comptes: {errors() - before} (attendu 1 + 2 images)")
+                return False
+            print("    [OK] 503, Retry-After: 1, rejets comptes par image")
+        finally:
+            release.set()
+            worker.join()
+            executor.shutdown()
+            api.predictor = api.executor = None
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_archive_extraction():
+    """Test de l'extraction des archives de /predict/batch (archives corrompues et limites)."""
+    print("\n" + "=" * 60)
+    print("TESTS DES ARCHIVES")
+    print("=" * 60)
+    
+    try:
+        import io
+        import os
+        import tarfile
+        import zipfile
+        from src.inference.archives import extract_images
+        
+        def make_tar(members):
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+                for name, data in members:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+            return buffer.getvalue()
+        
+        def make_zip(members):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for name, data in members:
+                    archive.writestr(name, data)
+            return buffer.getvalue()
+        
+        members = [(f"img_{i}.jpg", os.urandom(4000)) for i in range(3)] + [("notes.txt", b"x")]
+        tar_bytes = make_tar(members)
+        zip_bytes = make_zip(members)
+        
+        print("  Test: extraction tar.gz et zip...")
+        for archive_bytes in (tar_bytes, zip_bytes):
+            if extract_images(archive_bytes) != members[:3]:
+                print("    [ERREUR] Images extraites incorrectes")
+                return False
+        print("    [OK] 3 images extraites (fichier non image ignore)")
+        
+        print("  Test: archives tronquees ou corrompues -> ValueError...")
+        corrupted = {
+            'tar.gz tronque': tar_bytes[:len(tar_bytes) // 2],
+            'zip corrompu': zip_bytes[:40] + b'\0' * 200 + zip_bytes[240:],
+            'zip tronque': zip_bytes[:-30],
+        }
+        for name, archive_bytes in corrupted.items():
+            try:
+                extract_images(archive_bytes)
+                print(f"    [ERREUR] {name}: aucune erreur")
+                return False
+            except ValueError:
+                pass
+        print("    [OK] Erreurs converties en ValueError (400)")
+        
+        print("  Test: limites par image et totale (octets reellement lus)...")
+        bomb = make_zip([("bomb.jpg", b"\0" * 200_000)])
+        limits = [
+            (bomb, {'max_image_size': 100_000}),
+            (zip_bytes, {'max_total_bytes': 10_000}),
+            (tar_bytes, {'max_images': 2}),
+        ]
+        for archive_bytes, kwargs in limits:
+            try:
+                extract_images(archive_bytes, **kwargs)
+                print(f"    [ERREUR] Limite {kwargs} non appliquee")
+                return False
+            except ValueError:
+                pass
+        print("    [OK] Limites appliquees")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_model_reload():
+    """Test du rechargement à chaud via POST /admin/reload (checkpoints temporaires)."""
+    print("\n" + "=" * 60)
+    print("TESTS DU RECHARGEMENT DU MODELE")
+    print("=" * 60)
+    
+    try:
+        import io
+        import os
+        import tempfile
+        import torch
+        import yaml
+        from PIL import Image
+        from fastapi.testclient import TestClient
+        from src.inference import api
+        from src.models.resnet import create_resnet18
+        
+        with open('configs/config.yaml', 'r') as f:
+            config = yaml.safe_load(f)
+        num_classes = config['model']['num_classes']
+        
+        def save_model(path, seed):
+            torch.manual_seed(seed)
+            model = create_resnet18(num_classes=num_classes, pretrained=False)
+            torch.save({'model_state_dict': model.state_dict(), 'num_classes': num_classes}, path)
+        
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), color=(40, 160, 60)).save(buffer, format='JPEG')
+        image = buffer.getvalue()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model_path = Path(tmpdir) / "model.pth"
+            config_path = Path(tmpdir) / "config.yaml"
+            save_model(model_path, seed=0)
+            config['inference'].update({'model_path': str(model_path)})
+            config['inference']['cache']['enabled'] = True
+            config['inference']['warmup']['enabled'] = False
+            config['inference']['batching']['enabled'] = False
+            config['inference']['reload']['watch'] = False
+            config['inference']['reload']['admin_endpoint'] = True
+            with open(config_path, 'w') as f:
+                yaml.safe_dump(config, f)
+            
+            original_config_path = api.CONFIG_PATH
+            original_token = os.environ.pop('MODEL_ADMIN_TOKEN', None)
+            api.CONFIG_PATH = str(config_path)
+            headers = {'X-Admin-Token': 'secret'}
+            try:
+                with TestClient(api.app) as client:
+                    def predict():
+                        return client.post('/predict', files={'file': ('image.jpg', image, 'image/jpeg')})
+                    
+                    version = client.get('/model/info').json()['version']
+                    if predict().status_code != 200 or len(api.cache) == 0:
+                        print("    [ERREUR] Prediction non mise en cache")
+                        return False
+                    
+                    print("  Test: token d'administration obligatoire...")
+                    if client.post('/admin/reload', headers=headers).status_code != 403:
+                        print("    [ERREUR] Endpoint accessible sans MODEL_ADMIN_TOKEN defini")
+                        return False
+                    os.environ['MODEL_ADMIN_TOKEN'] = 'secret'
+                    if client.post('/admin/reload').status_code != 403:
+                        print("    [ERREUR] Endpoint accessible sans en-tete X-Admin-Token")
+                        return False
+                    print("    [OK] 403 sans token")
+                    
+                    print("  Test: fichier inchange (pas de rechargement)...")
+                    response = client.post('/admin/reload', headers=headers)
+                    if response.status_code != 200 or response.json()['reloaded']:
+                        print(f"    [ERREUR] Reponse inattendue: {response.status_code} {response.text}")
+                        return False
+                    print("    [OK] Modele conserve")
+                    
+                    print("  Test: nouveau checkpoint (nouvelle version, cache vide)...")
+                    save_model(model_path, seed=1)
+                    response = client.post('/admin/reload', headers=headers)
+                    new_version = client.get('/model/info').json()['version']
+                    if response.status_code != 200 or not response.json()['reloaded']:
+                        print(f"    [ERREUR] Rechargement refuse: {response.status_code} {response.text}")
+                        return False
+                    if new_version == version or response.json()['version'] != new_version:
+                        print(f"    [ERREUR] Version servie inchangee: {new_version}")
+                        return False
+                    if len(api.cache) != 0:
+                        print("    [ERREUR] Resultats de l'ancien modele encore en cache")
+                        return False
+                    print(f"    [OK] Version {version} -> {new_version}, cache vide")
+                    
+                    print("  Test: checkpoint corrompu (ancien modele conserve)...")
+                    model_path.write_bytes(b'checkpoint corrompu')
+                    response = client.post('/admin/reload', headers=headers)
+                    if response.status_code != 500:
+                        print(f"    [ERREUR] Erreur de chargement attendue: {response.status_code}")
+                        return False
+                    if client.get('/model/info').json()['version'] != new_version or predict().status_code != 200:
+                        print("    [ERREUR] Le modele precedent doit rester servi")
+                        return False
+                    print("    [OK] Modele precedent toujours servi")
+            finally:
+                api.CONFIG_PATH = original_config_path
+                os.environ.pop('MODEL_ADMIN_TOKEN', None)
+                if original_token is not None:
+                    os.environ['MODEL_ADMIN_TOKEN'] = original_token
+                api.model_manager = api.predictor = api.executor = api.batcher = api.cache = None
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_multi_worker_reload():
+    """Test du lanceur multi-workers : rechargement par le parent et métriques agrégées."""
+    print("\n" + "=" * 60)
+    print("TESTS DU LANCEUR MULTI-WORKERS")
+    print("=" * 60)
+    
+    import os
+    if not hasattr(os, 'fork'):
+        print("  [INFO] fork indisponible, test ignore")
+        return True
+    
+    try:
+        import io
+        import socket
+        import subprocess
+        import tempfile
+        import time
+        import requests
+        import torch
+        import yaml
+        from PIL import Image
+        from src.models.resnet import create_resnet18
+        
+        with open('configs/config.yaml', 'r') as f:
+            config = yaml.safe_load(f)
+        num_classes = config['model']['num_classes']
+        
+        def save_model(path, seed):
+            torch.manual_seed(seed)
+            model = create_resnet18(num_classes=num_classes, pretrained=False)
+            torch.save({'model_state_dict': model.state_dict(), 'num_classes': num_classes}, path)
+        
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), color=(40, 160, 60)).save(buffer, format='JPEG')
+        image = buffer.getvalue()
+        
+        def sample_info(url, count):
+            """(version, pid) renvoyés par count requêtes /model/info."""
+            infos = [requests.get(f'{url}/model/info', timeout=10).json() for _ in range(count)]
+            return {(info['version'], info['worker_pid']) for info in infos}
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model_path = Path(tmpdir) / "model.pth"
+            config_path = Path(tmpdir) / "config.yaml"
+            save_model(model_path, seed=0)
+            config['inference']['model_path'] = str(model_path)
+            config['inference']['cache']['enabled'] = False
+            config['inference']['warmup']['enabled'] = False
+            config['inference']['batching']['enabled'] = False
+            config['inference']['reload']['watch'] = False
+            config['inference']['reload']['admin_endpoint'] = True
+            with open(config_path, 'w') as f:
+                yaml.safe_dump(config, f)
+            
+            with socket.socket() as sock:
+                sock.bind(('127.0.0.1', 0))
+                port = sock.getsockname()[1]
+            url = f'http://127.0.0.1:{port}'
+            env = dict(os.environ, PLANT_API_CONFIG=str(config_path), MODEL_ADMIN_TOKEN='secret')
+            env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src.inference.serve', '--host', '127.0.0.1', '--port', str(port),
+                 '--workers', '2', '--threads', '1', '--log-level', 'warning'],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                deadline = time.time() + 120
+                while True:
+                    if process.poll() is not None or time.time() > deadline:
+                        print("    [ERREUR] Le lanceur n'a pas demarre")
+                        return False
+                    try:
+                        if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                            break
+                    except requests.RequestException:
+                        pass
+                    time.sleep(0.5)
+                
+                print("  Test: meme modele sur tous les workers...")
+                infos = sample_info(url, 20)
+                version = next(iter(infos))[0]
+                if len({v for v, _ in infos}) != 1 or len({pid for _, pid in infos}) < 2:
+                    print(f"    [ERREUR] Reponses inattendues: {sorted(infos)}")
+                    return False
+                print(f"    [OK] Version {version} sur {len(infos)} workers")
+                
+                print("  Test: POST /admin/reload recharge tous les workers...")
+                save_model(model_path, seed=1)
+                response = requests.post(f'{url}/admin/reload', headers={'X-Admin-Token': 'secret'},
+                                         timeout=10)
+                if response.status_code != 202:
+                    print(f"    [ERREUR] Reponse inattendue: {response.status_code} {response.text}")
+                    return False
+                # Les anciens workers servent jusqu'à ce que tous les nouveaux soient prêts
+                deadline = time.time() + 120
+                while True:
+                    infos = sample_info(url, 20)
+                    versions = {v for v, _ in infos}
+                    if len(versions) == 1 and version not in versions and len({pid for _, pid in infos}) >= 2:
+                        break
+                    if time.time() > deadline:
+                        print(f"    [ERREUR] Workers non recharges: {sorted(infos)}")
+                        return False
+                    time.sleep(0.5)
+                new_version = versions.pop()
+                print(f"    [OK] Version {version} -> {new_version} sur tous les workers")
+                
+                print("  Test: /metrics agrege tous les workers...")
+                for _ in range(10):
+                    requests.post(f'{url}/predict', files={'file': ('image.jpg', image, 'image/jpeg')},
+                                  timeout=30)
+                # Version des anciens workers exportée jusqu'à leur arrêt
+                deadline = time.time() + 30
+                checks = 0
+                while checks < 4:
+                    lines = requests.get(f'{url}/metrics', timeout=10).text.splitlines()
+                    successes = [line for line in lines
+                                 if line.startswith('prediction_requests_total{status="success"}')]
+                    served = [line for line in lines if line.startswith('model_version_info{')
+                              and not line.endswith(' 0.0')]
+                    if successes != ['prediction_requests_total{status="success"} 10.0']:
+                        print(f"    [ERREUR] Compteur de requetes: {successes}")
+                        return False
+                    if len(served) == 1 and new_version in served[0]:
+                        checks += 1
+                    elif time.time() > deadline:
+                        print(f"    [ERREUR] Versions exportees: {served}")
+                        return False
+                    else:
+                        time.sleep(0.5)
+                print("    [OK] Compteurs et version identiques quel que soit le worker")
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_training_metrics():
+    """Test de MetricsAccumulator contre sklearn (classe jamais prédite incluse)."""
+    print("\n" + "=" * 60)
+    print("TESTS DES METRIQUES D'ENTRAINEMENT")
+    print("=" * 60)
+    
+    try:
+        import numpy as np
+        import torch
+        from sklearn.metrics import classification_report, confusion_matrix
+        from src.training.metrics import MetricsAccumulator
+        
+        num_classes = 5
+        generator = torch.Generator().manual_seed(0)
+        accumulator = MetricsAccumulator(num_classes=num_classes)
+        all_labels, all_preds = [], []
+        for _ in range(4):
+            labels = torch.randint(0, num_classes, (32,), generator=generator)
+            # La classe 4 n'est jamais prédite (logit toujours minimal)
+            preds = torch.randint(0, num_classes - 1, (32,), generator=generator)
+            outputs = torch.nn.functional.one_hot(preds, num_classes).float()
+            outputs[:, num_classes - 1] = -1.0
+            accumulator.update(torch.tensor(1.0), outputs, labels)
+            all_labels.append(labels.numpy())
+            all_preds.append(preds.numpy())
+        labels = np.concatenate(all_labels)
+        preds = np.concatenate(all_preds)
+        
+        print("  Test: matrice de confusion et accuracy...")
+        expected_matrix = confusion_matrix(labels, preds, labels=list(range(num_classes)))
+        if not np.array_equal(accumulator.confusion_matrix(), expected_matrix):
+            print("    [ERREUR] Matrice de confusion differente de sklearn")
+            return False
+        if not np.isclose(accumulator.accuracy, float(np.mean(labels == preds))):
+            print("    [ERREUR] Accuracy differente de sklearn")
+            return False
+        print("    [OK] Matrice de confusion et accuracy identiques")
+        
+        print("  Test: precision/recall/F1 par classe...")
+        expected = classification_report(labels, preds, output_dict=True, zero_division=0)
+        report = accumulator.classification_report(output_dict=True)
+        for class_id in range(num_classes):
+            for metric in ('precision', 'recall', 'f1-score', 'support'):
+                if not np.isclose(report[str(class_id)][metric], expected[str(class_id)][metric]):
+                    print(f"    [ERREUR] {metric} de la classe {class_id} differente de sklearn")
+                    return False
+        if report['4']['precision'] != 0.0 or report['4']['support'] == 0:
+            print("    [ERREUR] La classe jamais predite doit figurer avec une precision nulle")
+            return False
+        if accumulator.classification_report() != classification_report(labels, preds, digits=4):
+            print("    [ERREUR] Rapport texte different de sklearn")
+            return False
+        print("    [OK] Rapport identique a sklearn")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_checkpoint_resume():
+    """Test de l'écriture des checkpoints (atomique, en arrière-plan) et de la reprise."""
+    print("\n" + "=" * 60)
+    print("TESTS DES CHECKPOINTS")
+    print("=" * 60)
+    
+    try:
+        import random
+        import tempfile
+        from pathlib import Path
+        import numpy as np
+        import torch
+        import torch.nn as nn
+        from src.training.checkpoint import (
+            CheckpointWriter, load_checkpoint, training_state, restore_training_state
+        )
+        from src.training.mixed_precision import MixedPrecision
+        
+        def make_run():
+            model = nn.Linear(4, 3)
+            optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+            scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=1, gamma=0.5)
+            precision = MixedPrecision({'enabled': False}, 'cpu')
+            # GradScaler actif (float16) pour vérifier que son état est repris
+            precision.scaler = torch.amp.GradScaler('cpu', init_scale=2.0 ** 16)
+            return model, optimizer, scheduler, precision
+        
+        torch.manual_seed(0)
+        model, optimizer, scheduler, precision = make_run()
+        for _ in range(3):
+            loss = model(torch.randn(8, 4)).pow(2).mean()
+            optimizer.zero_grad()
+            precision.step(loss, optimizer)
+            scheduler.step()
+        # Un pas avec gradient infini : le scaler réduit son échelle
+        optimizer.zero_grad()
+        precision.step(model(torch.full((1, 4), float('inf'))).sum(), optimizer)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'last_checkpoint.pth'
+            
+            print("  Test: ecriture en arriere-plan (copie des poids au moment de save)...")
+            writer = CheckpointWriter()
+            writer.save({'epoch': 2, **training_state(model, optimizer, scheduler, precision)}, path)
+            expected_rng = (random.random(), np.random.rand(), torch.rand(3))
+            expected_weight = model.weight.detach().clone()
+            with torch.no_grad():
+                model.weight.add_(1.0)
+            writer.close()
+            state = load_checkpoint(path)
+            if not torch.equal(state['model_state_dict']['weight'], expected_weight):
+                print("    [ERREUR] Le checkpoint contient des poids modifies apres save()")
+                return False
+            print("    [OK] Poids figes au moment de save()")
+            
+            print("  Test: interruption pendant l'ecriture (fichier temporaire orphelin)...")
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_bytes(b'checkpoint tronque')
+            state = load_checkpoint(path)
+            if state['epoch'] != 2:
+                print("    [ERREUR] Le dernier checkpoint complet doit rester lisible")
+                return False
+            print("    [OK] Dernier checkpoint complet intact")
+            
+            print("  Test: reprise (epoch, optimizer, scheduler, scaler, RNG)...")
+            torch.manual_seed(123)
+            resumed_model, resumed_optimizer, resumed_scheduler, resumed_precision = make_run()
+            restore_training_state(state, resumed_model, resumed_optimizer,
+                                   resumed_scheduler, resumed_precision)
+            checks = {
+                'poids': torch.equal(resumed_model.weight, expected_weight),
+                'pas de l\'optimizer': (resumed_optimizer.state_dict()['state'][0]['step']
+                                        == optimizer.state_dict()['state'][0]['step']),
+                'moments Adam': torch.equal(resumed_optimizer.state_dict()['state'][0]['exp_avg'],
+                                            optimizer.state_dict()['state'][0]['exp_avg']),
+                'learning rate': resumed_optimizer.param_groups[0]['lr'] == optimizer.param_groups[0]['lr'],
+                'scheduler': resumed_scheduler.last_epoch == scheduler.last_epoch,
+                'scaler': resumed_precision.scaler.get_scale() == precision.scaler.get_scale() == 2.0 ** 15,
+                'RNG': (random.random(), np.random.rand()) == expected_rng[:2]
+                       and torch.equal(torch.rand(3), expected_rng[2]),
+            }
+            failed = [name for name, ok in checks.items() if not ok]
+            if failed:
+                print(f"    [ERREUR] Etat non restaure: {', '.join(failed)}")
+                return False
+            print(f"    [OK] Reprise a l'epoch {state['epoch'] + 1}, etat complet restaure")
+            
+            print("  Test: nouvelle ecriture malgre le fichier temporaire orphelin...")
+            writer = CheckpointWriter()
+            writer.save({'epoch': 3, **training_state(resumed_model, resumed_optimizer,
+                                                     resumed_scheduler, resumed_precision)}, path)
+            writer.close()
+            if load_checkpoint(path)['epoch'] != 3 or tmp_path.exists():
+                print("    [ERREUR] Checkpoint non remplace ou fichier temporaire restant")
+                return False
+            print("    [OK] Checkpoint remplace")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_stopping_criteria():
+    """Test de l'early stopping et du budget de temps (séquences de métriques fixes)."""
+    print("\n" + "=" * 60)
+    print("TESTS DES CRITERES D'ARRET")
+    print("=" * 60)
+    
+    try:
+        import time
+        from src.training.early_stopping import EarlyStopping, TimeBudget
+        
+        def stop_epoch(criterion, values):
+            """Epoch (1-based) où step() demande l'arrêt, None si jamais."""
+            for epoch, value in enumerate(values, start=1):
+                if criterion.step({criterion.monitor: value}):
+                    return epoch
+            return None
+        
+        print("  Test: patience et mode (max pour l'accuracy, min pour la loss)...")
+        cases = [
+            (EarlyStopping('val_accuracy', patience=2), [0.5, 0.6, 0.6, 0.55, 0.7], 4),
+            (EarlyStopping('val_accuracy', patience=2), [0.5, 0.6, 0.6, 0.7, 0.65, 0.8], None),
+            (EarlyStopping('val_loss', patience=2), [1.0, 0.8, 0.9, 0.85, 0.5], 4),
+            (EarlyStopping('val_loss', patience=1), [1.0, 0.9, 0.8, 0.7], None),
+            (EarlyStopping('val_loss', patience=1, mode='max'), [1.0, 0.9], 2),
+        ]
+        for criterion, values, expected in cases:
+            if stop_epoch(criterion, values) != expected:
+                print(f"    [ERREUR] {criterion.monitor} ({criterion.mode}, patience {criterion.patience}) "
+                      f"sur {values}: arret attendu a l'epoch {expected}")
+                return False
+        print("    [OK] Arret apres patience epochs sans amelioration")
+        
+        print("  Test: min_delta...")
+        criterion = EarlyStopping('val_accuracy', patience=2, min_delta=0.05)
+        # +0.03 ne compte pas comme une amélioration, +0.06 oui
+        if stop_epoch(criterion, [0.5, 0.53, 0.59, 0.62]) is not None or criterion.best != 0.59:
+            print("    [ERREUR] Amelioration de 0.06 > min_delta ignoree")
+            return False
+        if not criterion.step({'val_accuracy': 0.63}):
+            print("    [ERREUR] Ameliorations < min_delta comptees comme des progres")
+            return False
+        print("    [OK] Ameliorations inferieures a min_delta ignorees")
+        
+        print("  Test: reprise de l'etat (state_dict)...")
+        resumed = EarlyStopping('val_loss', patience=3)
+        original = EarlyStopping('val_loss', patience=3)
+        stop_epoch(original, [1.0, 1.1, 1.2])
+        resumed.load_state_dict(original.state_dict())
+        if not resumed.step({'val_loss': 1.3}) or original.step({'val_loss': 0.9}):
+            print("    [ERREUR] Compteur non repris ou non remis a zero apres amelioration")
+            return False
+        try:
+            EarlyStopping(mode='median')
+            print("    [ERREUR] Mode inconnu accepte")
+            return False
+        except ValueError:
+            pass
+        print("    [OK] Etat repris, mode inconnu refuse")
+        
+        print("  Test: budget de temps...")
+        if TimeBudget(None).exhausted():
+            print("    [ERREUR] Un budget illimite ne doit jamais etre epuise")
+            return False
+        budget = TimeBudget(max_minutes=10)
+        # 7 min écoulées : une epoch de 2 min passe, une epoch de 4 min dépasserait le budget
+        budget.start = time.monotonic() - 7 * 60
+        budget.record_epoch(2 * 60)
+        if budget.exhausted():
+            print("    [ERREUR] Budget epuise alors que l'epoch suivante tient dans le temps restant")
+            return False
+        budget.record_epoch(4 * 60)
+        if not budget.exhausted():
+            print("    [ERREUR] L'epoch la plus longue doit servir d'estimation")
+            return False
+        budget = TimeBudget(max_minutes=1)
+        budget.start = time.monotonic() - 61
+        if not budget.exhausted():
+            print("    [ERREUR] Budget depasse non detecte")
+            return False
+        print("    [OK] Arret avant une epoch qui depasserait le budget")
+        
+        return True
+    except Exception as e:
+        print(f"  [ERREUR] {e}")
+        return False
+
+
+def test_import_budget():
+    """Test du temps d'import de l'API (dépendances lourdes différées)."""
+    print("\n" + "=" * 60)
+    print("TESTS DU TEMPS D'IMPORT")
+    print("=" * 60)
+    
+    try:
+        import subprocess
+        script = Path(__file__).resolve().parent / "scripts" / "benchmark_imports.py"
+        result = subprocess.run(
+            [sys.executable, str(script), "--runs", "3", "--top", "5", "--check"],
+            capture_output=True, text=True
+        )
+        print(result.stdout)
+        if result.returncode != 0:
+            print(f"  [ERREUR] Budget d'import non respecte {result.stderr[-500:]}")
+            return False
+        print("  [OK] Budget d'import respecte")
         return True
     except Exception as e:
         print(f"  [ERREUR] {e}")
@@ -184,7 +1177,20 @@ def main():
     
     # Tests de fonctionnalité
     results.append(("Modele", test_model_functionality()))
+    results.append(("Export TorchScript", test_torchscript_export()))
+    results.append(("Backends inference", test_inference_backends()))
+    results.append(("Quantification INT8", test_int8_quantization()))
     results.append(("Preprocessing", test_preprocessing()))
+    results.append(("Cache predictions", test_prediction_cache()))
+    results.append(("Micro-batching", test_micro_batching()))
+    results.append(("File d'inference", test_inference_queue_full()))
+    results.append(("Archives", test_archive_extraction()))
+    results.append(("Rechargement modele", test_model_reload()))
+    results.append(("Lanceur multi-workers", test_multi_worker_reload()))
+    results.append(("Metriques entrainement", test_training_metrics()))
+    results.append(("Checkpoints", test_checkpoint_resume()))
+    results.append(("Criteres d'arret", test_stopping_criteria()))
+    results.append(("Temps d'import API", test_import_budget()))
     results.append(("Configuration", test_config()))
     
     # Résumé